@@ -8,7 +8,7 @@ from django.http import HttpResponseRedirect
 from django.contrib.auth import logout
 from django.contrib.auth import get_user_model
 
-from games_archive.accounts.models import GamesArchiveUser
+from games_archive.accounts.models import GamesArchiveUser, OutgoingEmail
 
 
 def is_logged_in(user, request=None):
@@ -163,3 +163,19 @@ class GamesArchiveUserAdmin(admin.ModelAdmin):
 
         return HttpResponseRedirect(request. META.get('HTTP_REFERER', '/admin/'))
 
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ['pk', 'subject', 'to', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['status']
+    search_fields = ['to', 'subject']
+    search_help_text = 'Search by: recipient, subject'
+    ordering = ['-created_at']
+    actions = ['retry_now']
+
+    @admin.action(description='Retry the selected emails now')
+    def retry_now(self, request, queryset):
+        count = queryset.exclude(status=OutgoingEmail.STATUS_SENT).update(
+            status=OutgoingEmail.STATUS_PENDING, next_attempt_at=timezone.now(), attempts=0
+        )
+        messages.success(request, f'{count} emails queued again.')
@@ -1,10 +1,12 @@
 from django.contrib.auth.models import AbstractUser
-from django.core.files.storage import default_storage
 from django.db import models
 from django.core import validators
 from django.templatetags.static import static
+from django.utils import timezone
 
+from games_archive.custom_storages import instance_file_exists
 from games_archive.custom_validators import validate_name, validate_file_size
+from games_archive.renditions import rendition_url
 
 
 class GamesArchiveUser(AbstractUser):
@@ -86,6 +88,50 @@ class GamesArchiveUser(AbstractUser):
 
     @property
     def get_profile_picture_or_default(self):
-        if self.profile_picture.name and default_storage.exists(self.profile_picture.name):
+        if self.profile_picture.name and instance_file_exists(self, self.profile_picture.name):
             return self.profile_picture.url
         return self.DEFAULT_PROFILE_PICTURE
+
+    @property
+    def get_profile_thumbnail_or_default(self):
+        # a small variant for the round thumbnails next to the comments and cards, see games_archive.renditions
+        if self.profile_picture.name and instance_file_exists(self, self.profile_picture.name):
+            return rendition_url(self.profile_picture, 'thumb')
+        return self.DEFAULT_PROFILE_PICTURE
+
+
+class OutgoingEmail(models.Model):
+    """An email waiting in the outbox, send_queued_emails delivers it outside of the request."""
+
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=254, blank=True)
+    to = models.EmailField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    # a failed delivery is retried after a backoff, see games_archive.accounts.outbox
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f'{self.subject} to {self.to} ({self.status})'
+
+    class Meta:
+        ordering = ['next_attempt_at', 'pk']
+        indexes = [
+            # the worker's lookup of the due emails
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
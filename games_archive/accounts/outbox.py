@@ -0,0 +1,117 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from games_archive.accounts.models import OutgoingEmail
+
+
+def get_batch_size():
+    return getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 50)
+
+
+def get_max_attempts():
+    return getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 6)
+
+
+def get_retry_delay():
+    return getattr(settings, 'EMAIL_OUTBOX_RETRY_DELAY', 60)
+
+
+def get_max_retry_delay():
+    return getattr(settings, 'EMAIL_OUTBOX_MAX_RETRY_DELAY', 3600)
+
+
+def retry_delay(attempts):
+    # exponential backoff - 1, 2, 4, ... times EMAIL_OUTBOX_RETRY_DELAY, capped at EMAIL_OUTBOX_MAX_RETRY_DELAY
+    return timedelta(seconds=min(get_retry_delay() * 2 ** (attempts - 1), get_max_retry_delay()))
+
+
+def enqueue_email(subject, body, to, html_body='', from_email=None):
+    """Stores the email in the outbox, in the transaction of the caller - it is sent only if that commits."""
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        body=body,
+        html_body=html_body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=to,
+    )
+
+
+def build_message(email, connection):
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email or None,
+        to=[email.to],
+        connection=connection,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+def record_sent(email):
+    email.status = OutgoingEmail.STATUS_SENT
+    email.attempts += 1
+    email.last_error = ''
+    email.sent_at = timezone.now()
+
+
+def record_failure(email, error, now):
+    email.attempts += 1
+    email.last_error = f'{type(error).__name__}: {error}'
+    if email.attempts >= get_max_attempts():
+        email.status = OutgoingEmail.STATUS_FAILED
+    else:
+        email.next_attempt_at = now + retry_delay(email.attempts)
+
+
+def save_attempts(emails):
+    OutgoingEmail.objects.bulk_update(emails, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'])
+
+
+def send_queued_emails(batch_size=None):
+    """
+    Sends one batch of the due emails over a single connection of the email backend and returns (sent, failed).
+    The batch is locked while it is sent (other workers skip it on PostgreSQL), a failed email is retried with a
+    backoff until EMAIL_OUTBOX_MAX_ATTEMPTS, then it stays failed.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutgoingEmail.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=OutgoingEmail.STATUS_PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'pk')[:batch_size or get_batch_size()]
+        )
+        if not emails:
+            return 0, 0
+
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception as error:
+            # the server is unreachable, the whole batch waits for the next attempt
+            for email in emails:
+                record_failure(email, error, now)
+            save_attempts(emails)
+            return 0, len(emails)
+
+        try:
+            for email in emails:
+                try:
+                    connection.send_messages([build_message(email, connection)])
+                except Exception as error:
+                    record_failure(email, error, now)
+                else:
+                    record_sent(email)
+        finally:
+            connection.close()
+
+        save_attempts(emails)
+
+    sent = sum(email.status == OutgoingEmail.STATUS_SENT for email in emails)
+    return sent, len(emails) - sent
@@ -1,27 +1,22 @@
-from django.core.mail import send_mail
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from games_archive import settings
+from games_archive.accounts.outbox import enqueue_email
 
 
 @receiver(signal=post_save, sender=settings.AUTH_USER_MODEL)
 def send_greeting_email(sender, instance, created, **kwargs):
     if created:
-
-        # print("Sending email.... ")
-
+        # queued in the outbox, the registration does not wait for the SMTP server - send_queued_emails sends it
         subject = "Registration greetings"
         html_message = render_to_string('email-greeting.html', {'user': instance})
         plain_message = strip_tags(html_message)
-        to = instance.email
-        send_mail(
+        enqueue_email(
             subject=subject,
-            message=plain_message,
+            body=plain_message,
+            to=instance.email,
+            html_body=html_message,
             from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[to, ],
-            html_message=html_message
         )
-
-
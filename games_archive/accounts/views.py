@@ -11,6 +11,9 @@ from django.utils.http import url_has_allowed_host_and_scheme
 from .forms import UserRegistrationForm, UserProfileForm, UserLoginForm
 from ..common.forms import GameCommentForm
 from ..common.models import GameComment, ConsoleComment, GameRating, ConsoleRating
+from ..common.card_cache import attach_card_versions
+from ..common.user_ratings import attach_user_ratings
+from ..consoles.suppliers import resolve_logos
 from ..games.models import Game
 
 
@@ -160,6 +163,9 @@ class UserDetailView(DetailView):
         paginator = Paginator(games, 4)
         page_number = self.request.GET.get('page')
         page_obj = paginator.get_page(page_number)
+        resolve_logos(page_obj)
+        attach_user_ratings(GameRating, self.request.user, page_obj)
+        attach_card_versions(page_obj)
 
         context.update({
             'comments_count': comments_count,
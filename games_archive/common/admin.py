@@ -1,6 +1,8 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.utils import timezone
 
-from games_archive.common.models import GameRating, ConsoleRating, GameComment, ConsoleComment
+from games_archive.common.models import GameRating, ConsoleRating, GameComment, ConsoleComment, GameLeaderboardEntry, \
+    ImageJob, StoredFile
 
 
 # Register your models here.
@@ -35,3 +37,34 @@ class ConsoleCommentAdmin(admin.ModelAdmin):
     search_fields = ['to_console__pk', 'to_console__name', 'from_user__pk', 'from_user__username']
     search_help_text = 'Search by: console pk, console name, user pk, username'
 
+
+
+@admin.register(GameLeaderboardEntry)
+class GameLeaderboardEntryAdmin(admin.ModelAdmin):
+    list_display = ['to_game', 'board', 'to_console', 'genre', 'score', 'rating_count']
+    list_filter = ['board']
+    search_fields = ['to_game__pk', 'to_game__title', 'genre']
+    search_help_text = 'Search by: game pk, game title, genre'
+
+
+@admin.register(ImageJob)
+class ImageJobAdmin(admin.ModelAdmin):
+    list_display = ['pk', 'image_name', 'model_label', 'object_pk', 'priority', 'status', 'attempts', 'finished_at']
+    list_filter = ['status', 'model_label']
+    search_fields = ['image_name']
+    search_help_text = 'Search by: image name'
+    actions = ['retry_now']
+
+    @admin.action(description='Retry the selected jobs now')
+    def retry_now(self, request, queryset):
+        count = queryset.exclude(status=ImageJob.STATUS_RUNNING).update(
+            status=ImageJob.STATUS_QUEUED, next_attempt_at=timezone.now(), attempts=0
+        )
+        messages.success(request, f'{count} jobs queued again.')
+
+
+@admin.register(StoredFile)
+class StoredFileAdmin(admin.ModelAdmin):
+    list_display = ['pk', 'name', 'size', 'references', 'created_at', 'updated_at']
+    search_fields = ['name', 'sha256']
+    search_help_text = 'Search by: name, SHA-256'
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CommonConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'games_archive.common'
+
+    def ready(self):
+        # connect the rating aggregates receivers
+        import games_archive.common.signals
@@ -0,0 +1,60 @@
+from uuid import uuid4
+
+from django.core.cache import cache
+
+from games_archive.consoles.suppliers import supplier_logo_resolver
+
+CARD_VERSION_GAME = 'game'
+CARD_VERSION_USER = 'user'
+CARD_VERSION_CONSOLE = 'console'
+
+
+def card_version_key(kind, pk):
+    return f'card-version:{kind}:{pk}'
+
+
+def bump_card_versions(kind, pks):
+    # a fresh random stamp - the fragments cached under the old one are never read again and expire
+    cache.set_many({card_version_key(kind, pk): uuid4().hex for pk in pks}, None)
+
+
+def get_card_versions(keys):
+    versions = cache.get_many(keys)
+    # a stamp that was evicted gets a new one, so a fragment of an older stamp can not be served again
+    missing = {key: uuid4().hex for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return versions
+
+
+def attach_card_versions(games):
+    """
+    Set card_version on a page of games - the version stamp of the cached card fragments, made of the stamps of the
+    game, of its uploader and of the supplier logos. Reads all stamps with one cache round trip.
+    Returns the games as a list.
+    """
+    games = list(games)
+    keys = {card_version_key(CARD_VERSION_GAME, game.pk) for game in games}
+    keys.update(card_version_key(CARD_VERSION_USER, game.to_user_id) for game in games)
+    versions = get_card_versions(keys)
+
+    supplier_version = supplier_logo_resolver.current_version()
+    for game in games:
+        game.card_version = '-'.join([
+            versions[card_version_key(CARD_VERSION_GAME, game.pk)],
+            versions[card_version_key(CARD_VERSION_USER, game.to_user_id)],
+            str(supplier_version),
+        ])
+    return games
+
+
+def attach_console_card_versions(consoles):
+    """Like attach_card_versions(), for a page of consoles - the stamps of the console and of the supplier logos."""
+    consoles = list(consoles)
+    versions = get_card_versions({card_version_key(CARD_VERSION_CONSOLE, console.pk) for console in consoles})
+
+    supplier_version = supplier_logo_resolver.current_version()
+    for console in consoles:
+        console.card_version = f'{versions[card_version_key(CARD_VERSION_CONSOLE, console.pk)]}-{supplier_version}'
+    return consoles
@@ -0,0 +1,102 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib import messages
+from django.db.models import Max
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from games_archive.common.page_cache import get_page_versions, default_cache_is_shared, PAGE_SCOPE_ALL
+from games_archive.consoles.suppliers import supplier_logo_resolver
+
+# session keys of the comment form results, they are shown once by the next page
+ONE_TIME_SESSION_KEYS = ('message', 'invalid_comment_form')
+
+
+def get_release_version():
+    return getattr(settings, 'RELEASE_VERSION', '')
+
+
+def conditional_get_enabled():
+    # the stamps bumped by the other processes - the workers, the commands, the other web workers - have to reach this
+    # one, a per process cache would answer 304 for changed pages for good
+    enabled = getattr(settings, 'CONDITIONAL_GET', None)
+    return default_cache_is_shared() if enabled is None else enabled
+
+
+def table_validators(models, scopes):
+    """
+    Validators of a list page - the latest updated_at of the models (an index lookup, no COUNT over the table) and the
+    page cache version stamps of the scopes, which the signals also bump on deletes. No Last-Modified, it can not tell
+    the deletes.
+    """
+    parts = [model.objects.aggregate(last_modified=Max('updated_at'))['last_modified'] for model in models]
+    return [*parts, *get_page_versions([PAGE_SCOPE_ALL, *scopes])], None
+
+
+def object_validators(model, pk, scopes):
+    """
+    Validators of the detail page of one object, None when it does not exist - its updated_at and the page cache
+    version stamps of the scopes, e.g. of the object's page, bumped when its ratings, comments or linked objects change,
+    and of all pages, bumped when a user shown on them changes. No Last-Modified, the object's row does not tell those.
+    """
+    updated_at = model.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+    if updated_at is None:
+        return None
+    return [model._meta.label, pk, updated_at, *get_page_versions([PAGE_SCOPE_ALL, *scopes])], None
+
+
+def has_one_time_content(request):
+    # flash messages and the comment form results are shown once, such a page has to be rendered
+    return bool(len(messages.get_messages(request))) or any(key in request.session for key in ONE_TIME_SESSION_KEYS)
+
+
+def make_etag(request, parts):
+    user = request.user
+    if user.is_authenticated:
+        # the page has the user's name, ratings and forms - and the CSRF cookie changes on every login
+        parts = [*parts, user.pk, user.get_user_name(), user.profile_picture.name,
+                 request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')]
+    # a new release changes the templates and the static file names, the supplier index the logos
+    parts = [*parts, get_release_version(), supplier_logo_resolver.current_version()]
+    return hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def conditional_response(request, view, etag, last_modified, *args, **kwargs):
+    """Runs the view unless the client's copy matches the ETag / Last-Modified, then answers 304 Not Modified."""
+    response = condition(
+        etag_func=lambda *_args, **_kwargs: etag,
+        last_modified_func=lambda *_args, **_kwargs: last_modified,
+    )(view)(request, *args, **kwargs)
+
+    # revalidate every time, instead of a freshness the browser guesses from Last-Modified
+    if request.user.is_authenticated:
+        patch_cache_control(response, no_cache=True, private=True)
+    else:
+        patch_cache_control(response, no_cache=True)
+    patch_vary_headers(response, ['Cookie'])
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Answers GETs with 304 Not Modified, without rendering the page, when the client's copy is still current.
+    get_validators() returns the parts of the ETag and the Last-Modified datetime (None to send only the ETag), or
+    None when the page can not be validated, e.g. it is a 404. Off unless conditional_get_enabled().
+    """
+
+    def get_validators(self):
+        raise NotImplementedError
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or not conditional_get_enabled() or has_one_time_content(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        validators = self.get_validators()
+        if validators is None:
+            return super().dispatch(request, *args, **kwargs)
+
+        parts, last_modified = validators
+        return conditional_response(
+            request, super().dispatch, make_etag(request, parts), last_modified, *args, **kwargs
+        )
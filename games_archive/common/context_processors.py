@@ -0,0 +1,6 @@
+from django.conf import settings
+
+
+def card_cache(request):
+    # timeout of the {% cache %} card fragments, see games_archive.common.card_cache
+    return {'card_cache_timeout': getattr(settings, 'CARD_CACHE_TIMEOUT', 3600)}
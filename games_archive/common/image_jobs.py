@@ -0,0 +1,169 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.db.models import Q
+from django.dispatch import Signal
+from django.utils import timezone
+
+from games_archive.common.models import ImageJob
+from games_archive.renditions import create_renditions, get_manifest, manifest_cache_key, \
+    manifest_missing_cache_key
+
+# sent by the worker when the renditions of a job's image are stored, with job=
+image_job_done = Signal()
+
+# status of an image without renditions nor a job, e.g. uploaded before the job queue
+STATUS_MISSING = 'missing'
+
+# an unreadable image stays unreadable, such a job is not retried
+UNREADABLE_IMAGE_ERROR = 'Not a readable image'
+
+
+def get_worker_processes():
+    return getattr(settings, 'IMAGE_WORKER_PROCESSES', 2)
+
+
+def get_max_attempts():
+    return getattr(settings, 'IMAGE_JOB_MAX_ATTEMPTS', 3)
+
+
+def get_retry_delay():
+    return getattr(settings, 'IMAGE_JOB_RETRY_DELAY', 30)
+
+
+def get_job_timeout():
+    return getattr(settings, 'IMAGE_JOB_TIMEOUT', 600)
+
+
+def enqueue_image_job(image, instance=None, priority=ImageJob.PRIORITY_UPLOAD):
+    """
+    Queues the renditions of an ImageField file, in the transaction of the caller. Nothing is queued when the image is
+    rendered already or waits in the queue.
+    """
+    if not image or not image.name or get_manifest(image.name, image.storage, create=False):
+        return None
+    pending = ImageJob.objects.filter(
+        image_name=image.name, status__in=[ImageJob.STATUS_QUEUED, ImageJob.STATUS_RUNNING]
+    )
+    if pending.exists():
+        return None
+    return ImageJob.objects.create(
+        image_name=image.name,
+        model_label=instance._meta.label_lower if instance is not None else '',
+        object_pk=str(instance.pk) if instance is not None else '',
+        priority=priority,
+    )
+
+
+def enqueue_new_image_jobs(images, priority=ImageJob.PRIORITY_UPLOAD):
+    """Queues the renditions of new uploads, (image, instance) pairs, with one INSERT - they can not have a job yet."""
+    return ImageJob.objects.bulk_create([
+        ImageJob(
+            image_name=image.name,
+            model_label=instance._meta.label_lower,
+            object_pk=str(instance.pk),
+            priority=priority,
+        )
+        for image, instance in images if image and image.name
+    ])
+
+
+def image_job_statuses(image_names):
+    # status of the latest job of each image, images without a job are missing
+    statuses = dict.fromkeys(image_names, STATUS_MISSING)
+    jobs = ImageJob.objects.filter(image_name__in=image_names).order_by('created_at', 'pk')
+    statuses.update(jobs.values_list('image_name', 'status'))
+    return statuses
+
+
+def claim_image_jobs(limit):
+    """
+    Marks the next due jobs - by priority, then age - as running and returns them. A running job older than
+    IMAGE_JOB_TIMEOUT belongs to a worker that died, it is claimed again. Other workers skip the locked rows.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            ImageJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                Q(status=ImageJob.STATUS_QUEUED, next_attempt_at__lte=now)
+                | Q(status=ImageJob.STATUS_RUNNING, started_at__lt=now - timedelta(seconds=get_job_timeout()))
+            )
+            .order_by('-priority', 'next_attempt_at', 'pk')[:limit]
+        )
+        for job in jobs:
+            job.status = ImageJob.STATUS_RUNNING
+            job.attempts += 1
+            job.started_at = now
+        ImageJob.objects.bulk_update(jobs, ['status', 'attempts', 'started_at'])
+    return jobs
+
+
+def init_pool_process():
+    # a forked pool process opens cache connections of its own, instead of sharing the sockets of the worker's clients
+    for alias in settings.CACHES:
+        try:
+            del caches[alias]
+        except AttributeError:
+            pass
+
+
+def render_image(task):
+    """
+    The CPU bound part of a job - decoding, resizing and encoding the variants (written without the EXIF data of the
+    upload). Runs in the worker's pool processes, without database access, so it returns (job pk, manifest, error).
+    """
+    job_pk, image_name = task
+    try:
+        manifest = create_renditions(image_name)
+    except Exception as error:
+        return job_pk, None, f'{type(error).__name__}: {error}'
+    if manifest is None:
+        return job_pk, None, UNREADABLE_IMAGE_ERROR
+    return job_pk, manifest, None
+
+
+def finish_image_job(job, manifest, error, retry=True):
+    now = timezone.now()
+    job.finished_at = now
+    if manifest is not None:
+        job.status = ImageJob.STATUS_DONE
+        job.last_error = ''
+        # the pool process cached it in its own process, a local cache of the worker would not see it
+        cache.set(manifest_cache_key(job.image_name), manifest, None)
+        cache.delete(manifest_missing_cache_key(job.image_name))
+    elif retry and job.attempts < get_max_attempts():
+        job.status = ImageJob.STATUS_QUEUED
+        job.last_error = error
+        job.next_attempt_at = now + timedelta(seconds=get_retry_delay() * 2 ** (job.attempts - 1))
+    else:
+        job.status = ImageJob.STATUS_FAILED
+        job.last_error = error
+    job.save(update_fields=['status', 'last_error', 'next_attempt_at', 'finished_at'])
+
+    if job.status == ImageJob.STATUS_DONE:
+        image_job_done.send(sender=ImageJob, job=job)
+
+
+def process_image_jobs(batch_size, pool=None):
+    """
+    Claims a batch of jobs and renders their images, in parallel in the pool's processes or one by one without a
+    pool. Every job is finished as soon as its image is, so the status endpoint sees the progress of the batch.
+    Returns (done, failed) - the jobs queued again for a retry count as failed.
+    """
+    jobs = claim_image_jobs(batch_size)
+    if not jobs:
+        return 0, 0
+
+    by_pk = {job.pk: job for job in jobs}
+    tasks = [(job.pk, job.image_name) for job in jobs]
+    results = pool.imap_unordered(render_image, tasks) if pool is not None else map(render_image, tasks)
+
+    done = 0
+    for job_pk, manifest, error in results:
+        finish_image_job(by_pk[job_pk], manifest, error, retry=error != UNREADABLE_IMAGE_ERROR)
+        done += manifest is not None
+    return done, len(jobs) - done
@@ -0,0 +1,93 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from games_archive.common.models import GameLeaderboardEntry
+from games_archive.common.ranking import ranking_score
+from games_archive.games.models import Game
+
+
+def get_leaderboard_size():
+    return getattr(settings, 'LEADERBOARD_SIZE', 100)
+
+
+def get_leaderboard_min_ratings():
+    return getattr(settings, 'LEADERBOARD_MIN_RATINGS', 1)
+
+
+def normalize_genre(genre):
+    return ' '.join((genre or '').split()).casefold()
+
+
+def build_game_entries(games, console_pks_by_game):
+    entries = []
+    for game_pk, genre, rating_sum, rating_count in games:
+        # the same confidence weighted score as the popular games lists
+        common = {'to_game_id': game_pk, 'score': ranking_score(rating_sum, rating_count), 'rating_count': rating_count}
+        entries.append(GameLeaderboardEntry(board=GameLeaderboardEntry.BOARD_ALL, **common))
+        entries.extend(
+            GameLeaderboardEntry(board=GameLeaderboardEntry.BOARD_CONSOLE, to_console_id=console_pk, **common)
+            for console_pk in console_pks_by_game[game_pk]
+        )
+        if normalize_genre(genre):
+            entries.append(GameLeaderboardEntry(
+                board=GameLeaderboardEntry.BOARD_GENRE, genre=normalize_genre(genre)[:50], **common
+            ))
+    return entries
+
+
+def refresh_game_leaderboards(game_pks):
+    """Recompute the leaderboard entries of a few games, e.g. after one of them was rated."""
+    game_pks = list(game_pks)
+    if not game_pks:
+        return
+
+    with transaction.atomic():
+        # the game rows are locked, in the order of their keys - a concurrent refresh of the same games waits and reads
+        # their new ratings, instead of inserting its entries next to these
+        games = [
+            game for game in Game.objects.select_for_update().filter(pk__in=game_pks).order_by('pk')
+            .values_list('pk', 'genre', 'rating_sum', 'rating_count')
+            if game[3] >= max(get_leaderboard_min_ratings(), 1)
+        ]
+        console_pks_by_game = defaultdict(list)
+        if games:
+            links = Game.to_consoles.through.objects.filter(game_id__in=[game[0] for game in games])
+            for game_pk, console_pk in links.values_list('game_id', 'console_id'):
+                console_pks_by_game[game_pk].append(console_pk)
+
+        GameLeaderboardEntry.objects.filter(to_game_id__in=game_pks).delete()
+        GameLeaderboardEntry.objects.bulk_create(build_game_entries(games, console_pks_by_game))
+
+
+def rebuild_leaderboards(batch_size=1000):
+    """Recompute all leaderboard entries, returns the number of ranked games."""
+    game_pks = list(
+        Game.objects.filter(rating_count__gte=max(get_leaderboard_min_ratings(), 1))
+        .order_by('pk').values_list('pk', flat=True)
+    )
+    with transaction.atomic():
+        GameLeaderboardEntry.objects.all().delete()
+        for start in range(0, len(game_pks), batch_size):
+            refresh_game_leaderboards(game_pks[start:start + batch_size])
+    return len(game_pks)
+
+
+def get_leaderboard(console=None, genre=None, limit=None):
+    """Top games of the overall board, of a console's board or of a genre's board, as entries with their game."""
+    entries = GameLeaderboardEntry.objects.select_related('to_game')
+    if console is not None:
+        entries = entries.filter(board=GameLeaderboardEntry.BOARD_CONSOLE, to_console=console)
+    elif genre is not None:
+        entries = entries.filter(board=GameLeaderboardEntry.BOARD_GENRE, genre=normalize_genre(genre))
+    else:
+        entries = entries.filter(board=GameLeaderboardEntry.BOARD_ALL)
+    return entries[:limit or get_leaderboard_size()]
+
+
+def get_leaderboard_genres():
+    return list(
+        GameLeaderboardEntry.objects.filter(board=GameLeaderboardEntry.BOARD_GENRE)
+        .order_by('genre').values_list('genre', flat=True).distinct()
+    )
@@ -1,5 +1,6 @@
 from django.core.validators import MaxLengthValidator
 from django.db import models
+from django.utils import timezone
 
 from games_archive.accounts.models import GamesArchiveUser
 from games_archive.consoles.models import Console
@@ -25,6 +26,29 @@ class RatingMixin(models.Model):
     )
 
     from_user = models.ForeignKey(GamesArchiveUser, on_delete=models.CASCADE)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # name of the foreign key to the rated object (set in the concrete models)
+    RATED_OBJECT_FIELD = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember the stored state, so the rating aggregates can be updated with deltas on save
+        instance.remember_stored_rating()
+        return instance
+
+    def remember_stored_rating(self):
+        self._stored_rating = self.__dict__.get('rating')
+        self._stored_rated_object_pk = self.__dict__.get(f'{self.RATED_OBJECT_FIELD}_id')
+
+    @property
+    def stored_rating(self):
+        return getattr(self, '_stored_rating', None)
+
+    @property
+    def stored_rated_object_pk(self):
+        return getattr(self, '_stored_rated_object_pk', None)
 
     class Meta:
         abstract = True
@@ -38,6 +62,7 @@ class CommentMixin(models.Model):
     )
     from_user = models.ForeignKey(GamesArchiveUser, on_delete=models.CASCADE)
     created_on = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         abstract = True
@@ -45,6 +70,8 @@ class CommentMixin(models.Model):
 
 
 class GameRating(RatingMixin):
+    RATED_OBJECT_FIELD = 'to_game'
+
     to_game = models.ForeignKey(Game, on_delete=models.CASCADE)
 
     def __str__(self):
@@ -55,6 +82,8 @@ class GameRating(RatingMixin):
 
 
 class ConsoleRating(RatingMixin):
+    RATED_OBJECT_FIELD = 'to_console'
+
     to_console = models.ForeignKey(Console, on_delete=models.CASCADE)
 
     def __str__(self):
@@ -76,3 +105,114 @@ class ConsoleComment(CommentMixin):
 
     def __str__(self):
         return f'Comment {self.pk} form user {self.from_user.pk} to console {self.to_console.pk} {self.created_on}'
+
+
+class GameLeaderboardEntry(models.Model):
+    """
+    Precomputed score of a rated game on the overall, a console's or a genre's leaderboard.
+    Kept up to date by games_archive.common.leaderboards, rebuilt by the rebuild_leaderboards command.
+    """
+    BOARD_ALL = 'all'
+    BOARD_CONSOLE = 'console'
+    BOARD_GENRE = 'genre'
+    BOARD_CHOICES = (
+        (BOARD_ALL, 'All games'),
+        (BOARD_CONSOLE, 'Console'),
+        (BOARD_GENRE, 'Genre'),
+    )
+
+    board = models.CharField(max_length=10, choices=BOARD_CHOICES)
+    to_console = models.ForeignKey(Console, on_delete=models.CASCADE, blank=True, null=True)
+    # normalized genre of the genre boards
+    genre = models.CharField(max_length=50, blank=True, default='')
+    to_game = models.ForeignKey(Game, on_delete=models.CASCADE)
+    score = models.FloatField()
+    rating_count = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f'{self.board} leaderboard entry of game {self.to_game_id} - score {self.score:.2f}'
+
+    class Meta:
+        # the column of the game, '-to_game' would order by the reversed ordering of Game
+        ordering = ['-score', '-rating_count', '-to_game_id']
+        # a partial index per board in the order of the ranking - the top N of a board is an ordered index scan,
+        # without a sort
+        indexes = [
+            models.Index(fields=['-score', '-rating_count', '-to_game'], name='leaderboard_all_rank_idx',
+                         condition=models.Q(board='all')),
+            models.Index(fields=['to_console', '-score', '-rating_count', '-to_game'],
+                         name='leaderboard_console_rank_idx', condition=models.Q(board='console')),
+            models.Index(fields=['genre', '-score', '-rating_count', '-to_game'], name='leaderboard_genre_rank_idx',
+                         condition=models.Q(board='genre')),
+        ]
+        # a game is once on a board - partial, the columns of the other boards are NULL or empty
+        constraints = [
+            models.UniqueConstraint(fields=['to_game'], name='leaderboard_all_unique_game',
+                                    condition=models.Q(board='all')),
+            models.UniqueConstraint(fields=['to_console', 'to_game'], name='leaderboard_console_unique_game',
+                                    condition=models.Q(board='console')),
+            models.UniqueConstraint(fields=['genre', 'to_game'], name='leaderboard_genre_unique_game',
+                                    condition=models.Q(board='genre')),
+        ]
+
+
+class ImageJob(models.Model):
+    """
+    An uploaded image waiting for its renditions, processed by the process_image_jobs worker outside of the request.
+    See games_archive.common.image_jobs.
+    """
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    # uploads a user waits for go before the backfill of the existing images
+    PRIORITY_UPLOAD = 10
+    PRIORITY_BACKFILL = 0
+
+    image_name = models.CharField(max_length=255, db_index=True)
+    # the object the image belongs to, its pages are refreshed when the renditions are ready
+    model_label = models.CharField(max_length=100, blank=True)
+    object_pk = models.CharField(max_length=40, blank=True)
+    priority = models.SmallIntegerField(default=PRIORITY_BACKFILL)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f'Renditions of {self.image_name} ({self.status})'
+
+    class Meta:
+        ordering = ['-priority', 'created_at', 'pk']
+        indexes = [
+            # the worker's lookup of the next due jobs
+            models.Index(fields=['status', '-priority', 'next_attempt_at'], name='image_job_queue_idx'),
+        ]
+
+
+class StoredFile(models.Model):
+    """
+    A file of the content addressed media storage (games_archive.custom_storages) - stored once per content, with the
+    number of the objects referencing it.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.PositiveBigIntegerField()
+    references = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # moved by every new reference - collect_orphaned_media keeps the files referenced lately, their objects may not
+    # be committed yet
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.name} ({self.references} references)'
@@ -0,0 +1,115 @@
+import hashlib
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.response import SimpleTemplateResponse
+from django.utils.cache import patch_vary_headers, get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from games_archive.consoles.suppliers import supplier_logo_resolver
+
+# scopes of the cached pages - every cached page depends on PAGE_SCOPE_ALL and on a few of the others
+PAGE_SCOPE_ALL = 'all'
+PAGE_SCOPE_GAMES = 'games'
+PAGE_SCOPE_CONSOLES = 'consoles'
+
+
+def game_page_scope(pk):
+    return f'game:{pk}'
+
+
+def console_page_scope(pk):
+    return f'console:{pk}'
+
+
+# cache backends holding their entries in the process - a version stamp bumped in one process is not seen by the others
+PROCESS_LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def default_cache_is_shared():
+    return settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHE_BACKENDS
+
+
+def get_page_cache_timeout():
+    return getattr(settings, 'PAGE_CACHE_TIMEOUT', 60)
+
+
+def page_version_key(scope):
+    return f'page-version:{scope}'
+
+
+def bump_page_versions(scopes):
+    # a fresh random stamp - the pages cached under the old one are never read again and expire
+    cache.set_many({page_version_key(scope): uuid4().hex for scope in scopes}, None)
+
+
+def get_page_versions(scopes):
+    keys = [page_version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    # a stamp that was evicted gets a new one, so a page of an older stamp can not be served again
+    missing = {key: uuid4().hex for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+# headers stored with the page, e.g. the validators of games_archive.common.conditional
+CACHED_PAGE_HEADERS = ('ETag', 'Last-Modified', 'Cache-Control')
+
+
+def page_cache_key(request, scopes):
+    versions = get_page_versions([PAGE_SCOPE_ALL, *scopes])
+    versions.append(str(supplier_logo_resolver.current_version()))
+    digest = hashlib.md5('|'.join([request.get_full_path(), *versions]).encode()).hexdigest()
+    return f'page:{digest}'
+
+
+class AnonymousPageCacheMixin:
+    """
+    Cache-aside for the anonymous GETs of a read view - the rendered page is stored under a key made of the URL and
+    the version stamps of the scopes it shows (get_page_cache_scopes()). The signals in games_archive.common.signals
+    bump the stamps when games, consoles, ratings or comments change, so a stale page is never read again.
+    Logged in users always get a fresh page, it has their ratings, forms and CSRF tokens.
+    """
+    page_cache_scopes = ()
+
+    def get_page_cache_scopes(self):
+        return list(self.page_cache_scopes)
+
+    def dispatch(self, request, *args, **kwargs):
+        timeout = get_page_cache_timeout()
+        if request.method != 'GET' or request.user.is_authenticated or not timeout:
+            return super().dispatch(request, *args, **kwargs)
+
+        key = page_cache_key(request, self.get_page_cache_scopes())
+        cached = cache.get(key)
+        if cached is not None:
+            content, headers = cached
+            response = HttpResponse(content)
+            for header, value in headers.items():
+                response[header] = value
+            # the session cookie decides whether the page can come from the cache
+            patch_vary_headers(response, ['Cookie'])
+            # still a 304 for a client with the current copy, the stored validators are as fresh as the page
+            return get_conditional_response(
+                request, response.get('ETag'), parse_http_date_safe(response.get('Last-Modified', '')), response
+            )
+
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200 and isinstance(response, SimpleTemplateResponse):
+            response.add_post_render_callback(lambda rendered: self.store_page(key, rendered, timeout))
+        return response
+
+    @staticmethod
+    def store_page(key, response, timeout):
+        # a page that sets cookies belongs to a single visitor
+        if not response.cookies:
+            headers = {header: response[header] for header in ('Content-Type', *CACHED_PAGE_HEADERS) if header in response}
+            cache.set(key, (response.content, headers), timeout)
+            patch_vary_headers(response, ['Cookie'])
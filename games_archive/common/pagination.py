@@ -0,0 +1,80 @@
+import binascii
+
+from django.http import Http404
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
+
+
+def encode_keyset_token(pk):
+    return urlsafe_base64_encode(force_bytes(pk))
+
+
+def decode_keyset_token(token):
+    try:
+        return int(urlsafe_base64_decode(token))
+    except (ValueError, TypeError, binascii.Error):
+        raise Http404('Invalid cursor.')
+
+
+class KeysetPage:
+    """Page of a keyset paginated list - there is no total count and no page numbers, only the next cursor."""
+
+    def __init__(self, object_list, next_after, after):
+        self.object_list = object_list
+        self.next_after = next_after
+        self.after = after
+
+    def has_next(self):
+        return self.next_after is not None
+
+    def has_previous(self):
+        return bool(self.after)
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+
+class KeysetPaginationMixin:
+    """
+    Cursor pagination for ListViews ordered by -pk.
+
+    A request with ?after=<token> (an empty token means the first page) gets the next paginate_by objects with a
+    smaller pk, without the COUNT(*) and the OFFSET of the numbered pagination, so every page costs the same.
+    Querysets with another ordering (e.g. ranked searches) keep the numbered pagination.
+    """
+    keyset_query_param = 'after'
+    keyset_orderings = (['-pk'], ['-id'])
+
+    def is_keyset_paginated(self, queryset):
+        if self.keyset_query_param not in self.request.GET:
+            return False
+
+        query = queryset.query
+        ordering = list(query.order_by or (query.default_ordering and queryset.model._meta.ordering) or [])
+        return ordering in self.keyset_orderings
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.is_keyset_paginated(queryset):
+            return super().paginate_queryset(queryset, page_size)
+
+        after = self.request.GET.get(self.keyset_query_param, '').strip()
+        if after:
+            queryset = queryset.filter(pk__lt=decode_keyset_token(after))
+
+        # one extra row tells whether there is a next page
+        object_list = list(queryset[:page_size + 1])
+        next_after = None
+        if len(object_list) > page_size:
+            object_list = object_list[:page_size]
+            next_after = encode_keyset_token(object_list[-1].pk)
+
+        return None, KeysetPage(object_list, next_after, after), object_list, False
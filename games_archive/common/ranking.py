@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+RANKING_FORMULA_AVERAGE = 'average'
+RANKING_FORMULA_BAYESIAN = 'bayesian'
+RANKING_FORMULAS = (RANKING_FORMULA_AVERAGE, RANKING_FORMULA_BAYESIAN)
+
+
+def get_ranking_formula(formula=None):
+    formula = formula or getattr(settings, 'RATING_RANKING_FORMULA', RANKING_FORMULA_BAYESIAN)
+    if formula not in RANKING_FORMULAS:
+        raise ImproperlyConfigured(f'Unknown rating ranking formula {formula!r}, use one of {RANKING_FORMULAS}')
+    return formula
+
+
+def get_ranking_prior():
+    """
+    (mean, weight) of the Bayesian average - every game starts with `weight` imaginary votes of `mean` stars, so a
+    game with a single 5 star vote does not outrank classics with hundreds of good ones.
+    """
+    return (
+        float(getattr(settings, 'RATING_RANKING_PRIOR_MEAN', 3)),
+        float(getattr(settings, 'RATING_RANKING_PRIOR_WEIGHT', 5)),
+    )
+
+
+def ranking_score(rating_sum, rating_count, formula=None):
+    """Ranking score from the stored rating aggregates, in Python."""
+    if get_ranking_formula(formula) == RANKING_FORMULA_AVERAGE:
+        return rating_sum / rating_count if rating_count else 0.0
+
+    prior_mean, prior_weight = get_ranking_prior()
+    votes = prior_weight + rating_count
+    return (prior_weight * prior_mean + rating_sum) / votes if votes else 0.0
+
+
+def ranking_score_expression(formula=None):
+    """The same score as ranking_score() as a database expression over the rating_sum / rating_count columns."""
+    if get_ranking_formula(formula) == RANKING_FORMULA_AVERAGE:
+        return Coalesce(F('rating_avg'), Value(0.0), output_field=FloatField())
+
+    prior_mean, prior_weight = get_ranking_prior()
+    return Coalesce(
+        (Value(prior_weight * prior_mean) + Cast(F('rating_sum'), FloatField())) /
+        NullIf(Value(prior_weight) + Cast(F('rating_count'), FloatField()), Value(0.0)),
+        Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+def rank_by_rating(queryset, formula=None):
+    """Orders games or consoles by their ranking score, best first - slice it to get a top list in one query."""
+    return queryset.annotate(
+        ranking_score=ranking_score_expression(formula),
+    ).order_by('-ranking_score', '-rating_count', '-pk')
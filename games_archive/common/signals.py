@@ -0,0 +1,308 @@
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from games_archive.accounts.models import GamesArchiveUser
+from games_archive.common.card_cache import bump_card_versions, CARD_VERSION_GAME, CARD_VERSION_USER, \
+    CARD_VERSION_CONSOLE
+from games_archive.common.image_jobs import enqueue_image_job, enqueue_new_image_jobs, image_job_done
+from games_archive.common.leaderboards import refresh_game_leaderboards
+from games_archive.common.models import GameRating, ConsoleRating, GameLeaderboardEntry, GameComment, ConsoleComment, \
+    ImageJob
+from games_archive.common.page_cache import bump_page_versions, game_page_scope, console_page_scope, \
+    PAGE_SCOPE_ALL, PAGE_SCOPE_GAMES, PAGE_SCOPE_CONSOLES
+from games_archive.consoles.models import Console, Supplier
+from games_archive.custom_storages import release_stored_file
+from games_archive.games.models import Game, GameReview, Screenshot, screenshots_uploaded
+from games_archive.renditions import image_files
+
+RATING_AGGREGATE_FIELDS = ['rating_sum', 'rating_count', 'rating_avg']
+
+# user fields shown on the cached game cards
+CARD_USER_FIELDS = {'username', 'first_name', 'last_name', 'profile_picture'}
+
+
+def linked_console_pks(game_pks):
+    return set(Game.to_consoles.through.objects.filter(game_id__in=game_pks).values_list('console_id', flat=True))
+
+
+def linked_game_pks(console_pks):
+    return set(Game.to_consoles.through.objects.filter(console_id__in=console_pks).values_list('game_id', flat=True))
+
+
+def mark_pages_changed(game_pks=(), console_pks=(), scopes=()):
+    """
+    The detail pages of these games and consoles changed - bumps their page cache versions (also the conditional GET
+    validators), together with the other scopes, e.g. the lists. No row is written, a rating of a game does not lock
+    the rows of its consoles.
+    """
+    game_pks = set(game_pks) - {None}
+    console_pks = set(console_pks) - {None}
+    bump_page_versions([*scopes, *map(game_page_scope, game_pks), *map(console_page_scope, console_pks)])
+
+
+def mark_games_changed(game_pks):
+    # a game is shown on its own page, on the game lists and on the pages of its consoles
+    mark_pages_changed(game_pks, linked_console_pks(game_pks), [PAGE_SCOPE_GAMES])
+
+
+def mark_consoles_changed(console_pks):
+    # a console is shown on its own page, on the console lists and on the pages of its games
+    mark_pages_changed(linked_game_pks(console_pks), console_pks, [PAGE_SCOPE_CONSOLES])
+
+
+def update_rating_aggregates(rating_model, rated_object_pk, sum_delta, count_delta):
+    # Single atomic UPDATE - all right hand sides are evaluated against the old column values
+    if rated_object_pk is None or (sum_delta == 0 and count_delta == 0):
+        return False
+
+    rated_model = rating_model._meta.get_field(rating_model.RATED_OBJECT_FIELD).related_model
+    new_sum = F('rating_sum') + sum_delta
+    new_count = F('rating_count') + count_delta
+
+    rated_model.objects.filter(pk=rated_object_pk).update(
+        rating_sum=new_sum,
+        rating_count=new_count,
+        rating_avg=Coalesce(
+            Cast(new_sum, FloatField()) / NullIf(new_count, 0),
+            Value(0.0),
+            output_field=FloatField(),
+        ),
+    )
+    return True
+
+
+def refresh_cached_rated_object(instance):
+    # Keep the in-memory rated object (e.g. game.gamerating_set.create(...)) in sync with the database
+    rated_field = instance._meta.get_field(instance.RATED_OBJECT_FIELD)
+    if rated_field.is_cached(instance):
+        try:
+            getattr(instance, instance.RATED_OBJECT_FIELD).refresh_from_db(fields=RATING_AGGREGATE_FIELDS)
+        except ObjectDoesNotExist:
+            pass
+
+
+@receiver(signal=post_save, sender=GameRating)
+@receiver(signal=post_save, sender=ConsoleRating)
+def apply_saved_rating(sender, instance, created, **kwargs):
+    rated_object_pk = getattr(instance, f'{instance.RATED_OBJECT_FIELD}_id')
+    old_rating = None if created else instance.stored_rating
+    old_rated_object_pk = None if created else instance.stored_rated_object_pk
+    new_rating = instance.rating
+
+    changed_pks = set()
+    if old_rated_object_pk is not None and old_rated_object_pk != rated_object_pk:
+        # the rating was moved to another object - take it out of the old one
+        if old_rating is not None and update_rating_aggregates(sender, old_rated_object_pk, -old_rating, -1):
+            changed_pks.add(old_rated_object_pk)
+        old_rating = None
+
+    if update_rating_aggregates(
+        sender,
+        rated_object_pk,
+        (new_rating or 0) - (old_rating or 0),
+        (new_rating is not None) - (old_rating is not None),
+    ):
+        changed_pks.add(rated_object_pk)
+
+    instance.remember_stored_rating()
+    refresh_cached_rated_object(instance)
+    if sender is GameRating:
+        refresh_game_leaderboards(changed_pks)
+        bump_card_versions(CARD_VERSION_GAME, changed_pks)
+        mark_games_changed(changed_pks)
+    elif changed_pks:
+        mark_pages_changed(console_pks=changed_pks, scopes=[PAGE_SCOPE_CONSOLES])
+
+
+@receiver(signal=post_delete, sender=GameRating)
+@receiver(signal=post_delete, sender=ConsoleRating)
+def apply_deleted_rating(sender, instance, **kwargs):
+    rated_object_pk = getattr(instance, f'{instance.RATED_OBJECT_FIELD}_id')
+    rating = instance.stored_rating if instance.stored_rated_object_pk is not None else instance.rating
+
+    if rating is not None:
+        update_rating_aggregates(sender, rated_object_pk, -rating, -1)
+        refresh_cached_rated_object(instance)
+        if sender is GameRating:
+            refresh_game_leaderboards([rated_object_pk])
+            bump_card_versions(CARD_VERSION_GAME, [rated_object_pk])
+            mark_games_changed([rated_object_pk])
+        else:
+            mark_pages_changed(console_pks=[rated_object_pk], scopes=[PAGE_SCOPE_CONSOLES])
+
+
+@receiver(signal=post_save, sender=Game)
+def update_saved_game_leaderboards(sender, instance, created, update_fields, **kwargs):
+    # a new game has no ratings yet, other updates only matter for the genre boards
+    if created or (update_fields and 'genre' not in update_fields):
+        return
+    refresh_game_leaderboards([instance.pk])
+
+
+@receiver(signal=m2m_changed, sender=Game.to_consoles.through)
+def update_game_consoles_leaderboards(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        refresh_game_leaderboards([instance.pk])
+    elif pk_set:
+        refresh_game_leaderboards(pk_set)
+    else:
+        # console.game_set.clear() empties the console's board
+        GameLeaderboardEntry.objects.filter(board=GameLeaderboardEntry.BOARD_CONSOLE, to_console=instance).delete()
+
+
+@receiver(signal=post_save, sender=Game)
+def bump_saved_game_card_version(sender, instance, **kwargs):
+    # also for new games - the test databases reuse the pks of rolled back rows
+    bump_card_versions(CARD_VERSION_GAME, [instance.pk])
+
+
+@receiver(signal=post_save, sender=Console)
+def bump_saved_console_card_version(sender, instance, **kwargs):
+    bump_card_versions(CARD_VERSION_CONSOLE, [instance.pk])
+
+
+@receiver(signal=post_save, sender=settings.AUTH_USER_MODEL)
+def bump_saved_user_versions(sender, instance, created, update_fields, **kwargs):
+    # e.g. the last_login update on every login does not change the cards
+    if not created and update_fields and not CARD_USER_FIELDS.intersection(update_fields):
+        return
+    bump_card_versions(CARD_VERSION_USER, [instance.pk])
+    # the user's name is on the pages of their games, consoles and comments
+    if not created:
+        bump_page_versions([PAGE_SCOPE_ALL])
+
+
+@receiver(signal=post_save, sender=Game)
+@receiver(signal=pre_delete, sender=Game)
+def mark_saved_game_changed(sender, instance, **kwargs):
+    # before the delete, while the game's consoles are still linked
+    mark_games_changed([instance.pk])
+
+
+@receiver(signal=post_save, sender=Console)
+@receiver(signal=pre_delete, sender=Console)
+def mark_saved_console_changed(sender, instance, **kwargs):
+    mark_consoles_changed([instance.pk])
+
+
+@receiver(signal=m2m_changed, sender=Game.to_consoles.through)
+def mark_linked_pages_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # pre_clear - the cleared links are gone after the clear
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    if reverse:
+        mark_pages_changed(linked_game_pks([instance.pk]) | set(pk_set or ()), [instance.pk])
+    else:
+        mark_pages_changed([instance.pk], linked_console_pks([instance.pk]) | set(pk_set or ()))
+
+
+@receiver(signal=post_save, sender=GameComment)
+@receiver(signal=post_delete, sender=GameComment)
+@receiver(signal=post_save, sender=GameReview)
+@receiver(signal=post_delete, sender=GameReview)
+@receiver(signal=post_save, sender=Screenshot)
+@receiver(signal=post_delete, sender=Screenshot)
+def mark_game_detail_changed(sender, instance, **kwargs):
+    mark_pages_changed(game_pks=[instance.to_game_id])
+
+
+@receiver(signal=screenshots_uploaded, sender=Screenshot)
+def mark_uploaded_screenshots_game_changed(sender, game, screenshots, **kwargs):
+    mark_pages_changed(game_pks=[game.pk])
+
+
+@receiver(signal=post_save, sender=ConsoleComment)
+@receiver(signal=post_delete, sender=ConsoleComment)
+def mark_console_detail_changed(sender, instance, **kwargs):
+    mark_pages_changed(console_pks=[instance.to_console_id])
+
+
+@receiver(signal=post_save, sender=Game)
+@receiver(signal=post_save, sender=Console)
+@receiver(signal=post_save, sender=Supplier)
+@receiver(signal=post_save, sender=Screenshot)
+@receiver(signal=post_save, sender=settings.AUTH_USER_MODEL)
+def queue_uploaded_image_renditions(sender, instance, update_fields, **kwargs):
+    # the variants of the uploads are rendered by the process_image_jobs worker, not in the request
+    for image in image_files(instance, update_fields):
+        enqueue_image_job(image, instance)
+
+
+@receiver(signal=screenshots_uploaded, sender=Screenshot)
+def queue_uploaded_screenshots_renditions(sender, game, screenshots, **kwargs):
+    enqueue_new_image_jobs([(screenshot.picture, screenshot) for screenshot in screenshots])
+
+
+@receiver(signal=image_job_done, sender=ImageJob)
+def mark_rendered_image_pages_changed(sender, job, **kwargs):
+    # the pages and cards showing the image link the upload until its renditions are ready
+    if job.model_label == Game._meta.label_lower:
+        bump_card_versions(CARD_VERSION_GAME, [job.object_pk])
+        mark_games_changed([job.object_pk])
+    elif job.model_label == Console._meta.label_lower:
+        bump_card_versions(CARD_VERSION_CONSOLE, [job.object_pk])
+        mark_consoles_changed([job.object_pk])
+    elif job.model_label == Screenshot._meta.label_lower:
+        mark_pages_changed(game_pks=Screenshot.objects.filter(pk=job.object_pk).values_list('to_game_id', flat=True))
+    elif job.model_label:
+        # profile pictures and supplier logos are on the cards of all pages
+        if job.model_label == GamesArchiveUser._meta.label_lower:
+            bump_card_versions(CARD_VERSION_USER, [job.object_pk])
+        bump_page_versions([PAGE_SCOPE_ALL])
+
+
+def release_files_on_commit(files):
+    # after the commit - a rolled back change still links the files
+    for image_file in files:
+        transaction.on_commit(lambda image_file=image_file: release_stored_file(image_file.storage, image_file.name))
+
+
+@receiver(signal=pre_save, sender=Game)
+@receiver(signal=pre_save, sender=Console)
+@receiver(signal=pre_save, sender=Supplier)
+@receiver(signal=pre_save, sender=Screenshot)
+@receiver(signal=pre_save, sender=settings.AUTH_USER_MODEL)
+def remember_replaced_image_files(sender, instance, update_fields, raw, **kwargs):
+    """
+    The stored files of the instance's images that the save replaces or clears - a new upload or a linked file takes
+    a reference even when it has the name of the replaced file (the same content), so the replaced one is dropped.
+    """
+    images = image_files(instance, update_fields)
+    if instance._state.adding or raw or not images:
+        return
+    stored = sender._base_manager.filter(pk=instance.pk).values(*[image.field.name for image in images]).first() or {}
+    linked = instance.__dict__.pop('_linked_files', set())
+    replaced = []
+    for image in images:
+        stored_name = stored.get(image.field.name)
+        if stored_name and (stored_name != image.name or not image._committed or image.field.name in linked):
+            replaced.append(image.field.attr_class(instance, image.field, stored_name))
+    instance.__dict__['_replaced_image_files'] = replaced
+
+
+@receiver(signal=post_save, sender=Game)
+@receiver(signal=post_save, sender=Console)
+@receiver(signal=post_save, sender=Supplier)
+@receiver(signal=post_save, sender=Screenshot)
+@receiver(signal=post_save, sender=settings.AUTH_USER_MODEL)
+def release_replaced_image_files(sender, instance, **kwargs):
+    instance.__dict__.pop('_linked_files', None)
+    release_files_on_commit(instance.__dict__.pop('_replaced_image_files', []))
+
+
+@receiver(signal=post_delete, sender=Game)
+@receiver(signal=post_delete, sender=Console)
+@receiver(signal=post_delete, sender=Supplier)
+@receiver(signal=post_delete, sender=Screenshot)
+@receiver(signal=post_delete, sender=settings.AUTH_USER_MODEL)
+def release_deleted_image_files(sender, instance, **kwargs):
+    release_files_on_commit([image for image in image_files(instance) if image.name])
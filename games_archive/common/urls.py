@@ -3,10 +3,15 @@ from . import views
 
 urlpatterns = [
     path('', views.HomeView.as_view(), name='home'),
+    path('leaderboards/', views.LeaderboardView.as_view(), name='leaderboard'),
+    path('leaderboards/consoles/<int:console_pk>/', views.ConsoleLeaderboardView.as_view(), name='console_leaderboard'),
+    path('leaderboards/genres/<path:genre>/', views.GenreLeaderboardView.as_view(), name='genre_leaderboard'),
     path('games/<int:game_pk>/rate/', views.add_game_rating, name='rate_game'),
     path('games/<int:game_pk>/user-rating/', views.get_user_rating_to_game, name='get_user_rating_to_game'),
+    path('games/user-ratings/', views.get_user_ratings_to_games, name='get_user_ratings_to_games'),
     path('consoles/<int:console_pk>/rate/', views.add_console_rating, name='rate_console'),
     path('consoles/<int:console_pk>/user-rating/', views.get_user_rating_to_console, name='get_user_rating_to_console'),
+    path('consoles/user-ratings/', views.get_user_ratings_to_consoles, name='get_user_ratings_to_consoles'),
     path('games/<int:game_pk>/comment/', views.add_game_comment, name='comment_game'),
     path('console/<int:console_pk>/comment/', views.add_console_comment, name='comment_console'),
 ]
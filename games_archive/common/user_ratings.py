@@ -0,0 +1,25 @@
+def get_user_ratings(rating_model, user, object_pks):
+    """{game / console pk: rating} of the user's ratings to the given objects, with one query."""
+    if not user.is_authenticated or not object_pks:
+        return {}
+
+    rated_object_field = f'{rating_model.RATED_OBJECT_FIELD}_id'
+    return dict(
+        rating_model.objects.filter(from_user=user, **{f'{rated_object_field}__in': object_pks})
+        .values_list(rated_object_field, 'rating')
+    )
+
+
+def attach_user_ratings(rating_model, user, objects):
+    """
+    Set user_rating on a page of games or consoles, so the rating widgets render the current user's rating without
+    requesting it. 0 means not rated yet. Returns the objects as a list.
+    """
+    objects = list(objects)
+    if not user.is_authenticated:
+        return objects
+
+    ratings = get_user_ratings(rating_model, user, [obj.pk for obj in objects])
+    for obj in objects:
+        obj.user_rating = ratings.get(obj.pk) or 0
+    return objects
@@ -7,21 +7,83 @@ from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.shortcuts import get_object_or_404, redirect
 
+from .card_cache import attach_card_versions, attach_console_card_versions
+from .conditional import ConditionalGetMixin, conditional_response, make_etag, table_validators
+from .page_cache import AnonymousPageCacheMixin, PAGE_SCOPE_GAMES, PAGE_SCOPE_CONSOLES
+from .leaderboards import get_leaderboard, get_leaderboard_genres, get_leaderboard_size
 from .models import GameRating, Game
-from .models import ConsoleRating
+from .models import ConsoleRating, GameLeaderboardEntry
 from games_archive.consoles.models import Console
 from .forms import GameCommentForm, ConsoleCommentForm
+from .signals import RATING_AGGREGATE_FIELDS
+from .user_ratings import get_user_ratings
 
+# most ids accepted by the bulk user rating endpoints
+MAX_BULK_RATING_IDS = 100
 
-class HomeView(TemplateView):
+
+class HomeView(AnonymousPageCacheMixin, ConditionalGetMixin, TemplateView):
     template_name = 'home.html'
+    page_cache_scopes = (PAGE_SCOPE_GAMES, PAGE_SCOPE_CONSOLES)
+
+    def get_validators(self):
+        return table_validators([Game, Console], self.get_page_cache_scopes())
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['latest_games'] = attach_card_versions(Game.objects.order_by('-id')[: 4])
+        context['latest_consoles'] = attach_console_card_versions(Console.objects.order_by('-id')[: 4])
+        context['top_games'] = attach_card_versions(entry.to_game for entry in get_leaderboard(limit=4))
+        return context
+
+
+class LeaderboardView(TemplateView):
+    template_name = 'leaderboard.html'
+
+    def get_entries(self):
+        return get_leaderboard()
+
+    def get_title(self):
+        return f'Top {get_leaderboard_size()} games'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # the boards are precomputed, see games_archive.common.leaderboards
+        context['title'] = self.get_title()
+        context['entries'] = self.get_entries()
+        context['genres'] = get_leaderboard_genres()
+        context['consoles'] = Console.objects.filter(
+            gameleaderboardentry__board=GameLeaderboardEntry.BOARD_CONSOLE
+        ).distinct().order_by('name')
+        return context
+
+
+class ConsoleLeaderboardView(LeaderboardView):
+    def get_context_data(self, **kwargs):
+        self.console = get_object_or_404(Console, pk=self.kwargs['console_pk'])
+        context = super().get_context_data(**kwargs)
+        context['console'] = self.console
+        return context
+
+    def get_entries(self):
+        return get_leaderboard(console=self.console)
+
+    def get_title(self):
+        return f'Top {self.console.name} games'
+
 
+class GenreLeaderboardView(LeaderboardView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['latest_games'] = Game.objects.order_by('-id')[: 4]
-        context['latest_consoles'] = Console.objects.order_by('-id')[: 4]
+        context['genre'] = self.kwargs['genre']
         return context
 
+    def get_entries(self):
+        return get_leaderboard(genre=self.kwargs['genre'])
+
+    def get_title(self):
+        return f'Top {self.kwargs["genre"]} games'
+
 
 @require_http_methods(["POST"])
 @login_required
@@ -39,6 +101,8 @@ def add_game_rating(request, game_pk):
             to_game=game,
             defaults={'rating': rating_value}
         )
+        # the aggregates are updated in the database by the rating signals
+        game.refresh_from_db(fields=RATING_AGGREGATE_FIELDS)
 
         message = 'Rating created successfully' if created else 'Rating successfully updated'
         return JsonResponse({
@@ -63,13 +127,38 @@ def get_user_rating_to_game(request, game_pk):
             to_game=game
         ).first()
 
-        return JsonResponse({
-            'rating': rating.rating if rating else None
-        })
+        # 304 when the user's rating did not change since the widget fetched it
+        return conditional_response(
+            request,
+            lambda request: JsonResponse({'rating': rating.rating if rating else None}),
+            make_etag(request, [rating.pk, rating.updated_at] if rating else [None]),
+            rating.updated_at if rating else None,
+        )
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
 
+def parse_bulk_rating_ids(request):
+    # ?ids=1,2,3
+    ids = [pk.strip() for pk in request.GET.get('ids', '').split(',') if pk.strip()]
+    if len(ids) > MAX_BULK_RATING_IDS:
+        raise ValueError('Too many ids')
+    return [int(pk) for pk in ids]
+
+
+@login_required
+def get_user_ratings_to_games(request):
+    try:
+        game_pks = parse_bulk_rating_ids(request)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid request'}, status=400)
+
+    ratings = get_user_ratings(GameRating, request.user, game_pks)
+    return JsonResponse({
+        'ratings': {str(pk): ratings.get(pk) for pk in game_pks}
+    })
+
+
 @require_http_methods(["POST"])
 @login_required
 def add_console_rating(request, console_pk):
@@ -86,6 +175,8 @@ def add_console_rating(request, console_pk):
             to_console=console,
             defaults={'rating': rating_value}
         )
+        # the aggregates are updated in the database by the rating signals
+        console.refresh_from_db(fields=RATING_AGGREGATE_FIELDS)
 
         message = 'Rating created successfully' if created else 'Rating updated successfully'
         return JsonResponse({
@@ -110,13 +201,30 @@ def get_user_rating_to_console(request, console_pk):
             to_console=console
         ).first()
 
-        return JsonResponse({
-            'rating': rating.rating if rating else None
-        })
+        # 304 when the user's rating did not change since the widget fetched it
+        return conditional_response(
+            request,
+            lambda request: JsonResponse({'rating': rating.rating if rating else None}),
+            make_etag(request, [rating.pk, rating.updated_at] if rating else [None]),
+            rating.updated_at if rating else None,
+        )
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
 
+@login_required
+def get_user_ratings_to_consoles(request):
+    try:
+        console_pks = parse_bulk_rating_ids(request)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid request'}, status=400)
+
+    ratings = get_user_ratings(ConsoleRating, request.user, console_pks)
+    return JsonResponse({
+        'ratings': {str(pk): ratings.get(pk) for pk in console_pks}
+    })
+
+
 @login_required
 def add_game_comment(request, game_pk):
     # if request.method == 'POST':
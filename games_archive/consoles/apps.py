@@ -1,6 +1,11 @@
 from django.apps import AppConfig
+from django.db.models.signals import pre_migrate
 
 
 class ConsolesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'games_archive.consoles'
+
+    def ready(self):
+        from games_archive.consoles.signals import create_trigram_extension
+        pre_migrate.connect(create_trigram_extension, sender=self)
@@ -23,3 +23,5 @@ class ConsoleSearchForm(forms.Form):
             'placeholder': 'Search consoles...'
         })
     )
+    # keeps the opt-in ?mode=fuzzy across searches
+    mode = forms.CharField(required=False, widget=forms.HiddenInput())
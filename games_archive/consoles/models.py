@@ -1,18 +1,23 @@
+from django.contrib.postgres.indexes import GinIndex
 from django.core import validators
-from django.core.files.storage import default_storage
 from django.db import models
-from django.db.models import functions, Avg
+from django.db.models import functions
 from django.templatetags.static import static
 
 from games_archive.accounts.models import GamesArchiveUser
 from games_archive.custom_validators import validate_file_size, validate_name_is_longer_than_2_characters, \
     validate_release_year
+from games_archive.consoles.suppliers import get_supplier_logo
+from games_archive.custom_storages import instance_file_exists
 from games_archive.custom_widgets import get_star_rating_html, get_default_superuser
+from games_archive.renditions import rendition_url
 
 
 class Console(models.Model):
 
     DEFAULT_IMAGE = static('/images/added/no-image2.jpg')
+    # field resolved to a Supplier for manufacturer_logo
+    SUPPLIER_NAME_FIELD = 'manufacturer'
 
     name = models.CharField(
         validators=[
@@ -61,10 +66,18 @@ class Console(models.Model):
         default=get_default_superuser
     )
 
+    # denormalized rating aggregates, kept in sync by games_archive.common.signals
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_avg = models.FloatField(default=0, editable=False)
+
+    # a conditional GET validator of the pages showing the object, with the page cache versions that
+    # games_archive.common.signals bumps when its ratings, comments or linked objects change
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
     @property
     def rating(self):
-        avg_rating = self.consolerating_set.aggregate(average=Avg('rating'))['average']
-        return avg_rating or 0
+        return self.rating_avg or 0
 
     @property
     def stars_rating_html(self):
@@ -72,19 +85,31 @@ class Console(models.Model):
 
     @property
     def manufacturer_logo(self):
-        supplier = Supplier.objects.filter(name__icontains=self.manufacturer).first()
-        if supplier and supplier.logo and supplier.logo.name and default_storage.exists(supplier.logo.name):
-            return supplier.logo
+        return get_supplier_logo(self)
+
+    @property
+    def default_image_file(self):
+        if self.cover_image and self.cover_image.name and instance_file_exists(self, self.cover_image.name):
+            return self.cover_image
+        elif self.logo and self.logo.name and instance_file_exists(self, self.logo.name):
+            return self.logo
         return None
 
     @property
     def default_image(self):
-        if self.cover_image and self.cover_image.name and default_storage.exists(self.cover_image.name):
-            return self.cover_image.url
-        elif self.logo and self.logo.name and default_storage.exists(self.logo.name):
-            return self.logo.url
-        else:
-            return self.DEFAULT_IMAGE
+        image = self.default_image_file
+        return image.url if image else self.DEFAULT_IMAGE
+
+    @property
+    def default_thumbnail(self):
+        # a small variant of the cover or logo for the thumbnails, see games_archive.renditions
+        image = self.default_image_file
+        return rendition_url(image, 'thumb') if image else self.DEFAULT_IMAGE
+
+    @property
+    def default_card_image(self):
+        image = self.default_image_file
+        return rendition_url(image, 'medium') if image else self.DEFAULT_IMAGE
 
     def __str__(self):
         return f'Console {self.name} - pk {self.pk} - {self.pk} from user {self.to_user.pk}'
@@ -98,6 +123,11 @@ class Console(models.Model):
                 violation_error_message=f"Console with this name already exists!"
             )
         ]
+        indexes = [
+            # trigram indexes for the typo tolerant ?mode=fuzzy search
+            GinIndex(fields=['name'], name='console_name_trgm', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['manufacturer'], name='console_manufacturer_trgm', opclasses=['gin_trgm_ops']),
+        ]
 
 
 class Supplier(models.Model):
@@ -0,0 +1,42 @@
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connections, router
+from django.db.models import Q
+from django.db.models.functions import Greatest
+
+# value of the ?mode= parameter that switches the list searches to typo tolerant matching
+SEARCH_MODE_FUZZY = 'fuzzy'
+
+
+def uses_postgresql(model):
+    return connections[router.db_for_read(model)].vendor == 'postgresql'
+
+
+def trigram_search(queryset, search_query, fields):
+    """
+    Typo tolerant search served by the gin_trgm_ops indexes of the given fields.
+    Matches on word similarity (e.g. 'Nintedo' -> 'Nintendo', 'zelda ocarina' -> 'The Legend of Zelda: Ocarina
+    of Time') and orders the results by the best similarity across the fields.
+    """
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f'{field}__trigram_word_similar': search_query})
+
+    similarities = [TrigramWordSimilarity(search_query, field) for field in fields]
+    similarity = Greatest(*similarities) if len(similarities) > 1 else similarities[0]
+
+    return queryset.filter(condition).annotate(search_rank=similarity).order_by('-search_rank', '-pk')
+
+
+def icontains_search_consoles(queryset, search_query):
+    # Apply all filters at once
+    return queryset.filter(
+        Q(name__icontains=search_query) |
+        # Q(description__icontains=search_query) |
+        Q(manufacturer__icontains=search_query)
+    ).distinct().order_by('-id')  # Add explicit ordering to ensure consistent pagination
+
+
+def search_consoles(queryset, search_query, mode=None):
+    if mode == SEARCH_MODE_FUZZY and uses_postgresql(queryset.model):
+        return trigram_search(queryset, search_query, ['name', 'manufacturer'])
+    return icontains_search_consoles(queryset, search_query)
@@ -0,0 +1,20 @@
+from django.db import connections
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from games_archive.consoles.models import Supplier
+from games_archive.consoles.suppliers import supplier_logo_resolver
+
+
+def create_trigram_extension(sender, using, **kwargs):
+    # the gin_trgm_ops indexes of games and consoles need pg_trgm before their migrations run
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+
+@receiver(signal=post_save, sender=Supplier)
+@receiver(signal=post_delete, sender=Supplier)
+def invalidate_supplier_logo_resolver(sender, **kwargs):
+    supplier_logo_resolver.invalidate()
@@ -0,0 +1,189 @@
+import hashlib
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+
+from games_archive.custom_storages import file_exists
+
+
+def normalize_supplier_name(name):
+    return ' '.join((name or '').casefold().split())
+
+
+class SubstringAutomaton:
+    """
+    Aho-Corasick automaton over the normalized supplier names.
+    find_longest(text) returns the longest pattern that occurs in the text in a single pass over it.
+    """
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        # longest pattern ending at the state, either directly or through the fail links
+        self.output = [None]
+
+        for pattern in patterns:
+            self._add(pattern)
+        self._build_fail_links()
+
+    def _add(self, pattern):
+        if not pattern:
+            return
+        state = 0
+        for char in pattern:
+            if char not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(None)
+                self.goto[state][char] = len(self.goto) - 1
+            state = self.goto[state][char]
+        self.output[state] = pattern
+
+    def _build_fail_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+
+                inherited = self.output[self.fail[next_state]]
+                if inherited and (not self.output[next_state] or len(inherited) > len(self.output[next_state])):
+                    self.output[next_state] = inherited
+
+    def find_longest(self, text):
+        state = 0
+        longest = None
+        for char in text:
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            match = self.output[state]
+            if match and (longest is None or len(match) > len(longest)):
+                longest = match
+        return longest
+
+
+class SupplierLogoResolver:
+    """
+    In-memory index resolving developer / manufacturer strings to Supplier rows.
+
+    Lookups try, in order: the exact normalized name, a supplier whose name contains the string (what the old
+    name__icontains query did) and the longest supplier name contained in the string (e.g. 'Nintendo EAD' ->
+    'Nintendo'). The index is rebuilt with one query when Supplier rows change - in this process through the
+    signals, in the other processes through a version stamp in the default cache. The default cache is per process
+    unless CACHE_BACKEND names a shared one, so an index older than SUPPLIER_INDEX_MAX_AGE seconds is rebuilt as well.
+    """
+
+    VERSION_CACHE_KEY = 'supplier-logo-resolver-version'
+
+    def __init__(self):
+        self.check_interval = getattr(settings, 'SUPPLIER_INDEX_CHECK_INTERVAL', 5)
+        self.max_age = getattr(settings, 'SUPPLIER_INDEX_MAX_AGE', 60)
+        # distinct names resolved per index, least recently used ones are dropped
+        self.resolved_size = getattr(settings, 'SUPPLIER_INDEX_RESOLVED_SIZE', 4096)
+        self._lock = threading.Lock()
+        self._built_version = None
+        self._built_at = 0
+        self._checked_at = 0
+        self._invalidated = True
+        self._by_name = {}
+        self._names = []
+        self._automaton = SubstringAutomaton([])
+        self._fingerprint = ''
+        self._resolve = lru_cache(maxsize=self.resolved_size)(self._find_supplier)
+
+    def invalidate(self):
+        self._invalidated = True
+        try:
+            cache.incr(self.VERSION_CACHE_KEY)
+        except ValueError:
+            cache.set(self.VERSION_CACHE_KEY, 1, None)
+
+    def shared_version(self):
+        return cache.get(self.VERSION_CACHE_KEY, 0)
+
+    def current_version(self):
+        # of the suppliers in the index, the same in all processes with the same index - a part of the cache keys
+        self.ensure_fresh()
+        return self._fingerprint
+
+    def _build(self, version):
+        from games_archive.consoles.models import Supplier
+
+        by_name = {}
+        # lowest pk first, like the .first() of the old query
+        for supplier in Supplier.objects.order_by('pk'):
+            by_name.setdefault(normalize_supplier_name(supplier.name), supplier)
+
+        self._by_name = by_name
+        self._names = list(by_name)
+        self._automaton = SubstringAutomaton(self._names)
+        self._fingerprint = hashlib.md5(repr(sorted(
+            (supplier.pk, name, supplier.logo.name) for name, supplier in by_name.items()
+        )).encode()).hexdigest()
+        self._resolve = lru_cache(maxsize=self.resolved_size)(self._find_supplier)
+        self._built_version = version
+        self._built_at = time.monotonic()
+        self._invalidated = False
+
+    def ensure_fresh(self):
+        now = time.monotonic()
+        if not self._invalidated and now - self._checked_at < self.check_interval:
+            return
+
+        with self._lock:
+            version = self.shared_version()
+            if self._invalidated or version != self._built_version or now - self._built_at >= self.max_age:
+                self._build(version)
+            self._checked_at = now
+
+    def _find_supplier(self, normalized):
+        supplier = self._by_name.get(normalized)
+        if supplier is None:
+            supplier_name = next((candidate for candidate in self._names if normalized in candidate), None)
+            supplier_name = supplier_name or self._automaton.find_longest(normalized)
+            supplier = self._by_name.get(supplier_name) if supplier_name else None
+        return supplier
+
+    def get_supplier(self, name):
+        normalized = normalize_supplier_name(name)
+        if not normalized:
+            return None
+
+        self.ensure_fresh()
+        return self._resolve(normalized)
+
+    def get_logo(self, name):
+        supplier = self.get_supplier(name)
+        if supplier and supplier.logo and file_exists(supplier.logo.name):
+            return supplier.logo
+        return None
+
+
+supplier_logo_resolver = SupplierLogoResolver()
+
+
+def get_supplier_logo(obj):
+    # memoized per instance and supplier name, templates read the logo several times per card
+    name = getattr(obj, obj.SUPPLIER_NAME_FIELD)
+    memo = obj.__dict__.get('_supplier_logo_memo')
+    if memo is None or memo[0] != name:
+        memo = obj.__dict__['_supplier_logo_memo'] = (name, supplier_logo_resolver.get_logo(name))
+    return memo[1]
+
+
+def resolve_logos(objects):
+    """Resolve the supplier logos of a page of games or consoles at once, returns the objects as a list."""
+    objects = list(objects)
+    supplier_logo_resolver.ensure_fresh()
+    for obj in objects:
+        get_supplier_logo(obj)
+    return objects
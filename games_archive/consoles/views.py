@@ -1,18 +1,31 @@
-from django.db.models import Q
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.urls import reverse_lazy
 
 from .models import Console
 from .forms import ConsoleForm, ConsoleSearchForm
+from .search import search_consoles, SEARCH_MODE_FUZZY
+from .suppliers import resolve_logos
 from ..common.forms import ConsoleCommentForm
+from ..common.models import ConsoleRating
+from ..common.leaderboards import get_leaderboard
+from ..common.card_cache import attach_console_card_versions
+from ..common.conditional import ConditionalGetMixin, table_validators, object_validators
+from ..common.page_cache import AnonymousPageCacheMixin, PAGE_SCOPE_CONSOLES, console_page_scope
+from ..common.pagination import KeysetPaginationMixin
+from ..common.ranking import rank_by_rating
+from ..common.user_ratings import attach_user_ratings
 
 
-class ConsoleListView(ListView):
+class ConsoleListView(AnonymousPageCacheMixin, ConditionalGetMixin, KeysetPaginationMixin, ListView):
     model = Console
     template_name = 'console_list.html'
     context_object_name = 'consoles'
     paginate_by = 10
+    page_cache_scopes = (PAGE_SCOPE_CONSOLES,)
+
+    def get_validators(self):
+        return table_validators([Console], self.get_page_cache_scopes())
 
     def get_queryset(self):
         # Get base queryset
@@ -20,14 +33,11 @@ class ConsoleListView(ListView):
 
         # Store search query as instance variable
         self.search_query = self.request.GET.get('search', '').strip()
+        self.search_mode = self.request.GET.get('mode', '').strip()
 
         if self.search_query:
-            # Apply all filters at once
-            queryset = queryset.filter(
-                Q(name__icontains=self.search_query) |
-                # Q(description__icontains=self.search_query) |
-                Q(manufacturer__icontains=self.search_query)
-            ).distinct().order_by('-id')  # Add explicit ordering to ensure consistent pagination
+            # trigram search with ?mode=fuzzy on PostgreSQL, icontains filters otherwise
+            queryset = search_consoles(queryset, self.search_query, self.search_mode)
 
         return queryset
 
@@ -58,19 +68,38 @@ class ConsoleListView(ListView):
             # Store the form in the game object
             console.comment_form = form
 
+        # one supplier index lookup for all manufacturer logos on the page
+        resolve_logos(context['consoles'])
+        # the current user's ratings of the whole page with one query, instead of a request per rating widget
+        attach_user_ratings(ConsoleRating, self.request.user, context['consoles'])
+        # version stamps of the cached card fragments
+        attach_console_card_versions(context['consoles'])
+
         context['search_form'] = ConsoleSearchForm(self.request.GET)
         context['search_query'] = self.search_query
+        context['search_mode'] = self.search_mode
+        context['fuzzy_search_mode'] = SEARCH_MODE_FUZZY
         return context
 
 
-class ConsoleDetailView(DetailView):
+class ConsoleDetailView(AnonymousPageCacheMixin, ConditionalGetMixin, DetailView):
     model = Console
     template_name = 'console_detail.html'
     context_object_name = 'console'
+    POPULAR_GAMES_COUNT = 6
+    LEADERBOARD_COUNT = 10
+
+    def get_validators(self):
+        return object_validators(Console, self.kwargs['pk'], self.get_page_cache_scopes())
+
+    def get_page_cache_scopes(self):
+        return [console_page_scope(self.kwargs['pk'])]
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['comments'] = self.object.consolecomment_set.all()
+        resolve_logos([self.object])
+        attach_user_ratings(ConsoleRating, self.request.user, [self.object])
 
         # Check if there's an invalid form for this game
         if (self.request.session.get('invalid_comment_form') and
@@ -85,14 +114,9 @@ class ConsoleDetailView(DetailView):
 
         context['console_comment_form'] = form
 
-        popular_games = sorted(
-            self.object.game_set.all(),
-            key=lambda game: game.rating,
-            reverse=True
-        )
-        if len(popular_games) > 6:
-            popular_games = popular_games[:6]
-        context['popular_games'] = popular_games
+        # top 6 by the configured ranking formula, ordered and limited in the database
+        context['popular_games'] = rank_by_rating(self.object.game_set.all())[:self.POPULAR_GAMES_COUNT]
+        context['leaderboard'] = get_leaderboard(console=self.object, limit=self.LEADERBOARD_COUNT)
 
         return context
 
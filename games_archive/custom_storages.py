@@ -0,0 +1,299 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+
+from django.conf import settings
+from django.core.cache import caches
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import transaction
+from django.db.models import F, Case, When, Value
+from django.utils import timezone
+
+
+class FileExistenceCache:
+    """
+    Remembers the result of storage.exists() calls.
+
+    The first tier is a bounded per-process LRU whose entries expire after a timeout, so files added or removed by
+    other processes are picked up eventually. The optional second tier is a shared Django cache (set its alias in
+    FILE_EXISTENCE_SHARED_CACHE), which all gunicorn workers see and which is updated on every save / delete.
+    """
+
+    KEY_PREFIX = 'file-exists'
+
+    def __init__(self, max_size=None, timeout=None, shared_cache_alias=None):
+        # an explicit 0 disables the cache, it is not the default
+        self.max_size = max_size if max_size is not None else getattr(settings, 'FILE_EXISTENCE_CACHE_SIZE', 4096)
+        self.timeout = timeout if timeout is not None else getattr(settings, 'FILE_EXISTENCE_CACHE_TIMEOUT', 60)
+        self.shared_cache_alias = shared_cache_alias or getattr(settings, 'FILE_EXISTENCE_SHARED_CACHE', None)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def shared_cache(self):
+        return caches[self.shared_cache_alias] if self.shared_cache_alias else None
+
+    def make_key(self, storage, name):
+        return f'{self.KEY_PREFIX}:{storage.location}:{name}'
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                exists, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    return exists
+                del self._entries[key]
+
+        if self.shared_cache is not None:
+            exists = self.shared_cache.get(key)
+            if exists is not None:
+                self._set_local(key, exists)
+            return exists
+        return None
+
+    def set(self, key, exists):
+        self._set_local(key, exists)
+        if self.shared_cache is not None:
+            self.shared_cache.set(key, exists, self.timeout)
+
+    def _set_local(self, key, exists):
+        with self._lock:
+            self._entries[key] = (exists, time.monotonic() + self.timeout)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+file_existence_cache = FileExistenceCache()
+
+
+class CachedExistenceFileSystemStorage(FileSystemStorage):
+    """FileSystemStorage that keeps the file existence cache up to date when files are saved or deleted."""
+
+    def _save(self, name, content):
+        name = super()._save(name, content)
+        file_existence_cache.set(file_existence_cache.make_key(self, name), True)
+        return name
+
+    def delete(self, name):
+        super().delete(name)
+        if name:
+            file_existence_cache.set(file_existence_cache.make_key(self, name), False)
+
+    def cached_exists(self, name):
+        # exists() itself stays uncached - get_available_name() needs the real answer to avoid overwrites
+        key = file_existence_cache.make_key(self, name)
+        exists = file_existence_cache.get(key)
+        if exists is None:
+            exists = self.exists(name)
+            file_existence_cache.set(key, exists)
+        return exists
+
+
+def get_content_addressed_upload_dirs():
+    # the upload_to prefixes of the model fields stored by content
+    return getattr(settings, 'CONTENT_ADDRESSED_UPLOAD_DIRS', [])
+
+
+class ContentAddressedFileSystemStorage(CachedExistenceFileSystemStorage):
+    """
+    Stores the uploads once per content, under content/<2 hex>/<2 hex>/<SHA-256><extension> - the name follows from
+    the bytes, so an identical upload gets the stored file and a URL never changes what it serves (nginx serves
+    content/ with far-future cache headers). Each save takes a reference in the StoredFile table, under the lock of its
+    row - so a delete() of the last reference can not remove the file a save just found - delete() drops one and
+    removes the file with the last - the objects call it for the files they replace, clear or are deleted with,
+    see release_stored_file() and games_archive.common.signals. The names outside CONTENT_ADDRESSED_UPLOAD_DIRS - e.g. the renditions, kept
+    under fixed names - and the files stored before are handled like by the file system storage.
+    """
+
+    CONTENT_DIR = 'content'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # the references taken inside batched_references() of the thread, see record_references()
+        self._batches = threading.local()
+
+    def is_content_name(self, name):
+        return name.startswith(f'{self.CONTENT_DIR}/')
+
+    def content_name(self, name, content):
+        digest = hashlib.sha256()
+        # chunks() starts at the beginning of the file
+        for chunk in content.chunks():
+            digest.update(chunk)
+        sha256 = digest.hexdigest()
+        extension = os.path.splitext(name)[1].lower()
+        return f'{self.CONTENT_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}{extension}', sha256
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not any(name.startswith(upload_dir) for upload_dir in get_content_addressed_upload_dirs()):
+            return super().save(name, content, max_length)
+
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name, sha256 = self.content_name(name, content)
+        if getattr(self._batches, 'pending', None) is not None:
+            # the rows of a batch are locked together on its exit, see write_batch()
+            self.store(name, content)
+            self.record_references({name: (sha256, content.size, 1, content)})
+            return name
+
+        with transaction.atomic():
+            self.lock_stored_files({name: (sha256, content.size, 1, content)})
+            self.store(name, content)
+            self.write_references({name: (sha256, content.size, 1, content)})
+        return name
+
+    def store(self, name, content):
+        if not self.exists(name):
+            stored_name = self._save(name, content)
+            if stored_name != name:
+                # the same bytes were written meanwhile outside of a lock, see write_batch()
+                super().delete(stored_name)
+        else:
+            # the stored file is new again for collect_orphaned_media
+            os.utime(self.path(name))
+
+    def add_references(self, name, count=1):
+        # another object links the stored file, e.g. an identical upload found by its hash
+        if self.is_content_name(name):
+            self.record_references({name: (None, None, count, None)})
+
+    @contextmanager
+    def batched_references(self):
+        """The references taken by the saves inside are written together on exit, with three queries."""
+        if getattr(self._batches, 'pending', None) is not None:
+            yield
+            return
+        self._batches.pending = {}
+        try:
+            yield
+            pending, self._batches.pending = self._batches.pending, None
+            self.write_batch(pending)
+        finally:
+            self._batches.pending = None
+
+    def write_batch(self, references):
+        # the files were stored before their rows were locked - a delete() of the last reference in between removed
+        # the file, it is written again under the lock
+        with transaction.atomic():
+            self.lock_stored_files(references)
+            for name, (sha256, size, count, content) in references.items():
+                if content is not None and not os.path.exists(self.path(name)):
+                    self.store(name, content)
+            self.write_references(references)
+
+    def record_references(self, references):
+        pending = getattr(self._batches, 'pending', None)
+        if pending is None:
+            self.write_references(references)
+            return
+        for name, (sha256, size, count, content) in references.items():
+            known_sha256, known_size, known_count, known_content = pending.get(name, (None, None, 0, None))
+            pending[name] = (
+                sha256 or known_sha256, size if size is not None else known_size, known_count + count,
+                content if content is not None else known_content,
+            )
+
+    @staticmethod
+    def lock_stored_files(references):
+        # the StoredFile rows, created if new, are locked until the end of the transaction - a delete() waits for the
+        # references taken under the lock
+        from games_archive.common.models import StoredFile
+
+        StoredFile.objects.bulk_create([
+            StoredFile(name=name, sha256=sha256, size=size, references=0)
+            for name, (sha256, size, count, content) in references.items() if sha256
+        ], ignore_conflicts=True)
+        list(StoredFile.objects.select_for_update().filter(name__in=references).values_list('pk', flat=True))
+
+    @staticmethod
+    def write_references(references):
+        from games_archive.common.models import StoredFile
+
+        if not references:
+            return
+        StoredFile.objects.filter(name__in=references).update(references=F('references') + Case(
+            *[When(name=name, then=Value(count)) for name, (sha256, size, count, content) in references.items()],
+            default=Value(0),
+        ), updated_at=timezone.now())
+
+    def delete(self, name):
+        from games_archive.common.models import StoredFile
+
+        if not name or not self.is_content_name(name):
+            return super().delete(name)
+        with transaction.atomic():
+            stored = StoredFile.objects.select_for_update().filter(name=name).first()
+            if stored is not None and stored.references > 1:
+                StoredFile.objects.filter(pk=stored.pk).update(references=F('references') - 1)
+                return
+            if stored is not None:
+                stored.delete()
+            super().delete(name)
+
+
+def batched_references(storage):
+    # the saves of a batch of uploads take their references with a constant number of queries
+    return storage.batched_references() if hasattr(storage, 'batched_references') else nullcontext()
+
+
+def release_stored_file(storage, name):
+    """
+    An object no longer links the file - drops its reference, the content addressed file is removed with the last one.
+    The other files may be shared by the objects linked by backfill_image_hashes, collect_orphaned_media removes them.
+    """
+    is_content_name = getattr(storage, 'is_content_name', None)
+    if name and is_content_name is not None and is_content_name(name):
+        storage.delete(name)
+
+
+def file_exists(name, storage=None):
+    storage = storage or default_storage
+    if not name:
+        return False
+    if hasattr(storage, 'cached_exists'):
+        return storage.cached_exists(name)
+    return storage.exists(name)
+
+
+def instance_file_exists(instance, name):
+    # memoized per model instance, so a template asking the same property several times stats the file once
+    memo = instance.__dict__.setdefault('_file_exists_memo', {})
+    if name not in memo:
+        memo[name] = file_exists(name)
+    return memo[name]
+
+
+class HashedStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    collectstatic stores every file also under a content hashed name (e.g. rating-widget.3f2a1b4c5d6e.js), which
+    {% static %} links to, so browsers and nginx can cache the static files for good.
+    """
+
+    # hash the file contents only - the theme CSS references images that are not in the repo, rewriting its url()s
+    # would fail collectstatic, and the relative urls still resolve to the unhashed copies
+    patterns = ()
+    manifest_strict = False
+
+    def stored_name(self, name):
+        # some templates use names with a leading slash, which the plain storage accepted
+        name = name.lstrip('/')
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # not collected yet (local runs, tests) - link the plain name
+            return name
@@ -0,0 +1,88 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections, DEFAULT_DB_ALIAS
+
+# set for the read only requests, everything else (POSTs, management commands, shells) reads from the primary
+_use_replicas = ContextVar('use_replicas', default=False)
+
+# read from the primary even in a read only request, e.g. the sessions right after a login
+PRIMARY_ONLY_APPS = {'sessions'}
+
+# set on the responses to writes, the next requests of the browser read their own writes from the primary
+PIN_PRIMARY_COOKIE = 'pin_primary'
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def get_replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def get_sticky_seconds():
+    return getattr(settings, 'REPLICA_STICKY_SECONDS', 15)
+
+
+@contextmanager
+def use_replicas():
+    token = _use_replicas.set(True)
+    try:
+        yield
+    finally:
+        _use_replicas.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Sends the reads of read only requests to a random replica of DATABASE_REPLICAS and everything else to default.
+    A read in a transaction on default stays on default, it has to see the transaction's own writes.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = get_replicas()
+        if (not replicas or not _use_replicas.get() or model._meta.app_label in PRIMARY_ONLY_APPS
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the replicas have the same data as default
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # the replicas get the schema by the replication
+        if db in get_replicas():
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets the read only requests read from the replicas, unless the browser wrote something in the last
+    REPLICA_STICKY_SECONDS (e.g. posted a rating, comment or screenshot) - then it reads its writes from the primary
+    until the replicas caught up.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not get_replicas():
+            return self.get_response(request)
+
+        if request.method in SAFE_METHODS and PIN_PRIMARY_COOKIE not in request.COOKIES:
+            with use_replicas():
+                return self.get_response(request)
+
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(PIN_PRIMARY_COOKIE, '1', max_age=get_sticky_seconds(), httponly=True, samesite='Lax')
+        return response
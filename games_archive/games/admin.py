@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from games_archive.games.models import Game, GameReview, Screenshot
+from games_archive.games.models import Game, GameReview, Screenshot, ScreenshotUpload
 
 
 # Register your models here.
@@ -19,6 +19,13 @@ class ScreenshotsAdmin(admin.ModelAdmin):
     search_help_text = 'Search by pk, user pk, username, game pk, game title'
 
 
+@admin.register(ScreenshotUpload)
+class ScreenshotUploadAdmin(admin.ModelAdmin):
+    list_display = ['pk', 'file_name', 'to_game', 'from_user', 'size', 'received', 'updated_at']
+    search_fields = ['session', 'token', 'to_game__title', 'from_user__username']
+    search_help_text = 'Search by session, token, game title, username'
+
+
 @admin.register(GameReview)
 class GameReviewAdmin(admin.ModelAdmin):
     list_display = ['pk', 'to_game', 'from_user', 'created_on']
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class GamesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'games_archive.games'
+
+    def ready(self):
+        # connect the search vector receivers
+        import games_archive.games.signals
@@ -43,5 +43,7 @@ class GameSearchForm(forms.Form):
             'placeholder': 'Search games...'
         })
     )
+    # keeps the opt-in ?mode=fuzzy across searches
+    mode = forms.CharField(required=False, widget=forms.HiddenInput())
 
 
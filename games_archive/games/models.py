@@ -1,20 +1,31 @@
+import uuid
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core import validators
-from django.core.files.storage import default_storage
-from django.db import models
-from django.db.models import functions, Avg
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import functions
+from django.dispatch import Signal
 from django.template.defaultfilters import slugify
 from django.templatetags.static import static
 
 from games_archive.accounts.models import GamesArchiveUser
-from games_archive.consoles.models import Console, Supplier
+from games_archive.consoles.models import Console
 from games_archive.custom_validators import validate_name_is_longer_than_2_characters, validate_release_year, \
     validate_file_size
+from games_archive.consoles.suppliers import get_supplier_logo
+from games_archive.custom_storages import instance_file_exists, batched_references
 from games_archive.custom_widgets import get_star_rating_html, get_default_superuser
+from games_archive.image_hashes import hash_image, hash_new_image, find_near_duplicate, reference_stored_file
+from games_archive.renditions import rendition_url, is_rendered
 
 
 class Game(models.Model):
 
     DEFAULT_IMAGE = static('/images/added/no-image2.jpg')
+    # field resolved to a Supplier for developer_logo
+    SUPPLIER_NAME_FIELD = 'developer'
 
     title = models.CharField(
         validators=[
@@ -46,6 +57,9 @@ class Game(models.Model):
         blank=True,
         null=True,
     )
+    # content SHA-256 and dHash of the cover, see games_archive.image_hashes - an identical cover is stored once
+    cover_sha256 = models.CharField(max_length=64, blank=True, db_index=True, editable=False)
+    cover_dhash = models.CharField(max_length=16, blank=True, db_index=True, editable=False)
     to_consoles = models.ManyToManyField(Console, blank=True,)
     to_user = models.ForeignKey(
         GamesArchiveUser,
@@ -53,10 +67,21 @@ class Game(models.Model):
         default=get_default_superuser
     )
 
+    # denormalized rating aggregates, kept in sync by games_archive.common.signals
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_avg = models.FloatField(default=0, editable=False)
+
+    # a conditional GET validator of the pages showing the object, with the page cache versions that
+    # games_archive.common.signals bumps when its ratings, comments or linked objects change
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    # full text search document, kept in sync by games_archive.games.signals (PostgreSQL only)
+    search_vector = SearchVectorField(blank=True, null=True, editable=False)
+
     @property
     def rating(self):
-        avg_rating = self.gamerating_set.aggregate(average=Avg('rating'))['average']
-        return avg_rating or 0
+        return self.rating_avg or 0
 
     @property
     def stars_rating_html(self):
@@ -64,17 +89,33 @@ class Game(models.Model):
 
     @property
     def developer_logo(self):
-        supplier = Supplier.objects.filter(name__icontains=self.developer).first()
-        if supplier and supplier.logo and supplier.logo.name and default_storage.exists(supplier.logo.name):
-            return supplier.logo
+        return get_supplier_logo(self)
+
+    @property
+    def default_image_file(self):
+        if self.cover_image.name and instance_file_exists(self, self.cover_image.name):
+            return self.cover_image
         return None
 
     @property
     def default_image(self):
-        if self.cover_image.name and default_storage.exists(self.cover_image.name):
-            return self.cover_image.url
-        else:
-            return self.DEFAULT_IMAGE
+        image = self.default_image_file
+        return image.url if image else self.DEFAULT_IMAGE
+
+    @property
+    def default_thumbnail(self):
+        # a small variant of the cover for the thumbnails, see games_archive.renditions
+        image = self.default_image_file
+        return rendition_url(image, 'thumb') if image else self.DEFAULT_IMAGE
+
+    @property
+    def default_card_image(self):
+        image = self.default_image_file
+        return rendition_url(image, 'medium') if image else self.DEFAULT_IMAGE
+
+    def save(self, *args, **kwargs):
+        hash_new_image(self, 'cover_image', 'cover_sha256', 'cover_dhash')
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f'{self.title} - pk {self.pk} - form user {self.to_user.pk}'
@@ -88,9 +129,83 @@ class Game(models.Model):
                 violation_error_message=f"Game with this title already exists!"
             )
         ]
+        indexes = [
+            GinIndex(fields=['search_vector'], name='game_search_vector_gin'),
+            # trigram indexes for the typo tolerant ?mode=fuzzy search
+            GinIndex(fields=['title'], name='game_title_trgm', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['developer'], name='game_developer_trgm', opclasses=['gin_trgm_ops']),
+        ]
+
+
+# sent by Screenshot.objects.bulk_upload() instead of a post_save per screenshot, with game= and screenshots=
+screenshots_uploaded = Signal()
+
+
+class ScreenshotManager(models.Manager):
+    def find_duplicates(self, game, pictures, exclude_pk=None):
+        """
+        Indexes of the uploaded pictures showing the same image as a screenshot of the game or an earlier picture of
+        the list - identical or nearly (see games_archive.image_hashes). One query.
+        """
+        dhashes = list(
+            self.filter(to_game=game).exclude(pk=exclude_pk).exclude(picture_dhash='')
+            .values_list('picture_dhash', flat=True)
+        )
+        duplicates = []
+        for index, picture in enumerate(pictures):
+            dhash = hash_image(picture)[1]
+            if not dhash:
+                continue
+            if find_near_duplicate(dhash, dhashes):
+                duplicates.append(index)
+            else:
+                dhashes.append(dhash)
+        return duplicates
+
+    def bulk_upload(self, game, user, pictures, batch_size=None):
+        """
+        Creates a screenshot of the game for each uploaded picture in one transaction, with batched INSERTs - a few
+        queries per batch instead of a few per picture. The pictures are validated like the model fields, a picture
+        the game has a screenshot of already is refused. A file stored already for another screenshot is linked, not
+        stored again. The post_save receivers do not run, the receivers of screenshots_uploaded handle the whole batch.
+        """
+        screenshots = []
+        for picture in pictures:
+            screenshot = self.model(to_game=game, from_user=user, picture=picture)
+            # the related objects are given, checking them would be a query per picture
+            screenshot.clean_fields(exclude=['to_game', 'from_user', 'slug'])
+            screenshot.picture_sha256, screenshot.picture_dhash = hash_image(picture)
+            screenshot.slug = screenshot.build_slug()
+            screenshots.append(screenshot)
+
+        duplicates = self.find_duplicates(game, pictures)
+        if duplicates:
+            raise ValidationError({'picture': [
+                f'{pictures[index].name}: {Screenshot.DUPLICATE_ERROR}' for index in duplicates
+            ]})
+
+        stored = dict(
+            self.filter(picture_sha256__in={screenshot.picture_sha256 for screenshot in screenshots})
+            .values_list('picture_sha256', 'picture')
+        )
+        storage = self.model._meta.get_field('picture').storage
+        with transaction.atomic(using=self.db), batched_references(storage):
+            for screenshot in screenshots:
+                if screenshot.picture_sha256 in stored:
+                    reference_stored_file(storage, stored[screenshot.picture_sha256])
+                    screenshot.picture = stored[screenshot.picture_sha256]
+            # the pictures are stored by the INSERTs, like by save()
+            screenshots = self.bulk_create(screenshots, batch_size=batch_size)
+            screenshots_uploaded.send(sender=self.model, game=game, screenshots=screenshots)
+        return screenshots
 
 
 class Screenshot(models.Model):
+    # random part of the slug, the slug is known before the INSERT (the pk is not)
+    SLUG_TOKEN_LENGTH = 12
+
+    DUPLICATE_ERROR = 'This screenshot of the game was uploaded already.'
+
     to_game = models.ForeignKey(Game, on_delete=models.CASCADE)
     from_user = models.ForeignKey(GamesArchiveUser, on_delete=models.CASCADE)
     picture = models.ImageField(
@@ -100,17 +215,73 @@ class Screenshot(models.Model):
         upload_to='game_screenshots/',
     )
     slug = models.SlugField(unique=True, editable=False)
+    # content SHA-256 and dHash of the picture, see games_archive.image_hashes - an identical picture is stored once,
+    # a game does not take the same picture twice
+    picture_sha256 = models.CharField(max_length=64, blank=True, db_index=True, editable=False)
+    picture_dhash = models.CharField(max_length=16, blank=True, db_index=True, editable=False)
+
+    objects = ScreenshotManager()
+
+    @property
+    def picture_is_rendered(self):
+        # the gallery swaps in the renditions of the new screenshots once the worker rendered them
+        return is_rendered(self.picture)
+
+    @classmethod
+    def make_slug(cls, game_title, username):
+        token = uuid.uuid4().hex[:cls.SLUG_TOKEN_LENGTH]
+        max_length = cls._meta.get_field('slug').max_length
+        prefix = slugify(f'{game_title}-{username}')[:max_length - len(token) - 1].strip('-')
+        return f'{prefix}-{token}' if prefix else token
+
+    def build_slug(self):
+        # the names of the related objects only when they are loaded, otherwise their pks - no queries for them
+        game = self.to_game.title if Screenshot.to_game.is_cached(self) else f'game-{self.to_game_id}'
+        user = self.from_user.username if Screenshot.from_user.is_cached(self) else f'user-{self.from_user_id}'
+        return self.make_slug(game, user)
+
+    def clean(self):
+        super().clean()
+        if self.to_game_id and self.picture and not self.picture._committed:
+            if Screenshot.objects.find_duplicates(self.to_game_id, [self.picture.file], exclude_pk=self.pk):
+                raise ValidationError({'picture': self.DUPLICATE_ERROR})
 
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
+        # one INSERT, the slug does not wait for the pk
         if not self.slug:
-            self.slug = slugify(f"{self.to_game.title}-{self.from_user.username}-{self.pk}")
+            self.slug = self.build_slug()
+        hash_new_image(self, 'picture', 'picture_sha256', 'picture_dhash')
         super().save(*args, **kwargs)
 
     def __str__(self):
         return self.slug
 
 
+class ScreenshotUpload(models.Model):
+    """
+    A picture uploaded in parts, see games_archive.games.uploads. The parts are appended to its temporary file until
+    all of its bytes are received, the screenshots of a session are created when the session is finished.
+    """
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    # the pictures selected together, finished together
+    session = models.UUIDField(db_index=True)
+    to_game = models.ForeignKey(Game, on_delete=models.CASCADE)
+    from_user = models.ForeignKey(GamesArchiveUser, on_delete=models.CASCADE)
+    file_name = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    size = models.PositiveBigIntegerField()
+    received = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def is_complete(self):
+        return self.received == self.size
+
+    def __str__(self):
+        return f'{self.file_name} ({self.received} of {self.size} bytes)'
+
+
 class GameReview(models.Model):
     from_user = models.ForeignKey(GamesArchiveUser, on_delete=models.CASCADE)
     to_game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='reviews')
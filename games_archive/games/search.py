@@ -0,0 +1,86 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector, SearchQuery, SearchRank
+from django.db.models import Q, F, OuterRef, Subquery, Value, TextField
+from django.db.models.functions import Concat, Coalesce
+
+from games_archive.accounts.models import GamesArchiveUser
+from games_archive.consoles.models import Console
+from games_archive.consoles.search import SEARCH_MODE_FUZZY, uses_postgresql, trigram_search
+
+# text search configuration used both for the stored vectors and for the queries
+SEARCH_CONFIG = 'english'
+
+
+def is_full_text_search_supported(model):
+    # tsvector / GIN are PostgreSQL only - other databases (e.g. SQLite in tests) use the icontains search
+    return uses_postgresql(model)
+
+
+def get_game_search_vector():
+    """Weighted vector over the game's own fields, its console names and the uploader names."""
+    console_names = (
+        Console.objects.filter(game=OuterRef('pk'))
+        .order_by()
+        .values('game')
+        .annotate(names=StringAgg('name', delimiter=' '))
+        .values('names')
+    )
+    uploader_names = (
+        GamesArchiveUser.objects.filter(pk=OuterRef('to_user_id'))
+        .annotate(names=Concat(
+            'username', Value(' '),
+            Coalesce('first_name', Value('')), Value(' '),
+            Coalesce('last_name', Value('')),
+            output_field=TextField(),
+        ))
+        .values('names')
+    )
+
+    return (
+        SearchVector('title', weight='A', config=SEARCH_CONFIG) +
+        SearchVector('developer', Subquery(console_names, output_field=TextField()), weight='B', config=SEARCH_CONFIG) +
+        SearchVector(Subquery(uploader_names, output_field=TextField()), weight='C', config=SEARCH_CONFIG) +
+        SearchVector('description', weight='D', config=SEARCH_CONFIG)
+    )
+
+
+def update_game_search_vectors(games):
+    """Recompute the stored search vectors of a Game queryset with a single UPDATE."""
+    if not is_full_text_search_supported(games.model):
+        return 0
+    return games.order_by().update(search_vector=get_game_search_vector())
+
+
+def icontains_search_games(queryset, search_query):
+    # Get console IDs that match the search query
+    console_ids = Console.objects.filter(
+        name__icontains=search_query
+    ).values_list('id', flat=True)
+
+    # Apply all filters at once
+    return queryset.filter(
+        Q(title__icontains=search_query) |
+        Q(description__icontains=search_query) |
+        Q(developer__icontains=search_query) |
+        Q(to_consoles__in=console_ids) |
+        Q(to_user__first_name__icontains=search_query) |
+        Q(to_user__last_name__icontains=search_query) |
+        Q(to_user__username__icontains=search_query)
+    ).distinct().order_by('-pk')  # Add explicit ordering to ensure consistent pagination
+
+
+def full_text_search_games(queryset, search_query):
+    query = SearchQuery(search_query, search_type='websearch', config=SEARCH_CONFIG)
+
+    # the GIN index on search_vector serves the match, no joins and no DISTINCT are needed
+    return queryset.filter(search_vector=query).annotate(
+        search_rank=SearchRank(F('search_vector'), query),
+    ).order_by('-search_rank', '-pk')
+
+
+def search_games(queryset, search_query, mode=None):
+    if not is_full_text_search_supported(queryset.model):
+        return icontains_search_games(queryset, search_query)
+    if mode == SEARCH_MODE_FUZZY:
+        return trigram_search(queryset, search_query, ['title', 'developer'])
+    return full_text_search_games(queryset, search_query)
@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from games_archive.consoles.models import Console
+from games_archive.games.models import Game
+from games_archive.games.search import update_game_search_vectors
+
+# user fields that are part of the games search document
+SEARCHABLE_USER_FIELDS = {'username', 'first_name', 'last_name'}
+
+
+@receiver(signal=post_save, sender=Game)
+def update_saved_game_search_vector(sender, instance, **kwargs):
+    update_game_search_vectors(Game.objects.filter(pk=instance.pk))
+
+
+@receiver(signal=m2m_changed, sender=Game.to_consoles.through)
+def update_game_consoles_search_vector(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        games = Game.objects.filter(pk=instance.pk)
+    elif pk_set:
+        games = Game.objects.filter(pk__in=pk_set)
+    else:
+        # console.game_set.clear() does not report the affected games
+        games = Game.objects.filter(pk__in=getattr(instance, '_search_game_pks', []))
+
+    update_game_search_vectors(games)
+
+
+@receiver(signal=m2m_changed, sender=Game.to_consoles.through)
+def remember_cleared_console_games(sender, instance, action, reverse, **kwargs):
+    if action == 'pre_clear' and reverse:
+        instance._search_game_pks = list(instance.game_set.values_list('pk', flat=True))
+
+
+@receiver(signal=post_save, sender=Console)
+def update_console_games_search_vectors(sender, instance, created, update_fields, **kwargs):
+    if created or (update_fields and 'name' not in update_fields):
+        return
+    update_game_search_vectors(Game.objects.filter(to_consoles=instance))
+
+
+@receiver(signal=pre_delete, sender=Console)
+def remember_deleted_console_games(sender, instance, **kwargs):
+    instance._search_game_pks = list(instance.game_set.values_list('pk', flat=True))
+
+
+@receiver(signal=post_delete, sender=Console)
+def update_deleted_console_games_search_vectors(sender, instance, **kwargs):
+    update_game_search_vectors(Game.objects.filter(pk__in=getattr(instance, '_search_game_pks', [])))
+
+
+@receiver(signal=post_save, sender=settings.AUTH_USER_MODEL)
+def update_user_games_search_vectors(sender, instance, created, update_fields, **kwargs):
+    # e.g. the last_login update on every login does not touch the search document
+    if created or (update_fields and not SEARCHABLE_USER_FIELDS.intersection(update_fields)):
+        return
+    update_game_search_vectors(Game.objects.filter(to_user=instance))
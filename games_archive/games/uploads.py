@@ -0,0 +1,178 @@
+import os
+import uuid
+from contextlib import suppress
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
+from django.http import UnreadablePostError
+from django.utils import timezone
+from django.utils.datastructures import MultiValueDict
+
+from games_archive.custom_validators import validate_file_size
+from games_archive.games.forms import ScreenshotForm
+from games_archive.games.models import Screenshot, ScreenshotUpload
+
+# bytes copied from the request to the part file at a time
+COPY_BUFFER_SIZE = 64 * 1024
+
+PART_FILE_SUFFIX = '.part'
+
+
+def get_chunk_size():
+    # the largest part accepted in one request
+    return getattr(settings, 'SCREENSHOT_UPLOAD_CHUNK_SIZE', 1024 * 1024)
+
+
+def get_temp_dir():
+    return getattr(settings, 'SCREENSHOT_UPLOAD_TEMP_DIR', os.path.join(settings.BASE_DIR, 'upload-parts'))
+
+
+def get_expiry():
+    # seconds an upload without new parts is kept for a resume
+    return getattr(settings, 'SCREENSHOT_UPLOAD_EXPIRY', 24 * 3600)
+
+
+class UploadOffsetError(Exception):
+    """A part that does not continue the received bytes - the client resumes after upload.received bytes."""
+
+    def __init__(self, upload):
+        super().__init__(f'{upload.file_name} continues after byte {upload.received}')
+        self.upload = upload
+
+
+class AssembledUpload(UploadedFile):
+    """
+    The received parts of an upload, in their temporary file. Like a TemporaryUploadedFile, a file system storage
+    moves the file into the media instead of copying it.
+    """
+
+    def __init__(self, upload):
+        self.path = part_path(upload)
+        super().__init__(open(self.path, 'rb'), upload.file_name, upload.content_type or None, upload.size)
+
+    def temporary_file_path(self):
+        return self.path
+
+    def close(self):
+        # the file is gone once the storage moved it
+        with suppress(FileNotFoundError):
+            return self.file.close()
+
+
+def part_path(upload):
+    return os.path.join(get_temp_dir(), f'{upload.token.hex}{PART_FILE_SUFFIX}')
+
+
+def start_upload(game, user, file_name, size, content_type='', session=None):
+    """Registers a picture of `size` bytes to be uploaded in parts, in the given session or a new one."""
+    upload = ScreenshotUpload(
+        session=session or uuid.uuid4(),
+        to_game=game,
+        from_user=user,
+        file_name=os.path.basename(file_name)[:255],
+        content_type=content_type[:100],
+        size=size,
+    )
+    if size <= 0:
+        raise ValidationError('The submitted file is empty.')
+    # refused before any of its bytes are sent
+    validate_file_size(upload)
+    upload.save()
+    return upload
+
+
+def read_block(stream, size):
+    try:
+        return stream.read(size)
+    except UnreadablePostError:
+        # the client went away, the part is cut short
+        return b''
+
+
+def write_part(upload, offset, stream, length):
+    """
+    Writes the part - `length` bytes read from the stream - to the upload's file at `offset`, copied in small buffers,
+    so the part is never held in memory. A part not starting at the received bytes raises UploadOffsetError. A part
+    cut short keeps the bytes that arrived, the client resumes after them. Returns the updated upload.
+    """
+    with transaction.atomic():
+        # a retried part of the same upload waits for the first one
+        upload = ScreenshotUpload.objects.select_for_update().get(pk=upload.pk)
+        if offset != upload.received:
+            raise UploadOffsetError(upload)
+        if offset + length > upload.size:
+            raise ValidationError('The part ends after the end of the file.')
+
+        os.makedirs(get_temp_dir(), exist_ok=True)
+        with open(os.open(part_path(upload), os.O_RDWR | os.O_CREAT, 0o600), 'r+b') as part:
+            part.seek(offset)
+            remaining = length
+            while remaining:
+                data = read_block(stream, min(COPY_BUFFER_SIZE, remaining))
+                if not data:
+                    break
+                part.write(data)
+                remaining -= len(data)
+            # the rest of a part that was cut short before
+            part.truncate()
+
+        upload.received = offset + length - remaining
+        upload.save(update_fields=['received', 'updated_at'])
+    return upload
+
+
+def discard_uploads(uploads):
+    for upload in uploads:
+        with suppress(FileNotFoundError):
+            os.remove(part_path(upload))
+    ScreenshotUpload.objects.filter(pk__in=[upload.pk for upload in uploads]).delete()
+
+
+def finish_uploads(game, user, uploads):
+    """
+    Creates the screenshots of complete uploads with Screenshot.objects.bulk_upload(), each assembled file validated
+    like a picture posted to the screenshot form - a picture the game has a screenshot of already is invalid too. The
+    uploads are removed, the invalid ones too. Returns the screenshots and the errors of the invalid uploads by their
+    token.
+    """
+    files = [AssembledUpload(upload) for upload in uploads]
+    valid, errors = [], {}
+    try:
+        for upload, picture in zip(uploads, files):
+            form = ScreenshotForm(files=MultiValueDict({'picture': [picture]}))
+            if form.is_valid():
+                valid.append((upload, form.cleaned_data['picture']))
+            else:
+                errors[str(upload.token)] = list(form.errors['picture'])
+
+        duplicates = Screenshot.objects.find_duplicates(game, [picture for upload, picture in valid])
+        for index in duplicates:
+            errors[str(valid[index][0].token)] = [Screenshot.DUPLICATE_ERROR]
+        pictures = [picture for index, (upload, picture) in enumerate(valid) if index not in duplicates]
+        screenshots = Screenshot.objects.bulk_upload(game, user, pictures) if pictures else []
+    finally:
+        for picture in files:
+            picture.close()
+        discard_uploads(uploads)
+    return screenshots, errors
+
+
+def purge_expired_uploads():
+    """Removes the uploads without new parts for SCREENSHOT_UPLOAD_EXPIRY seconds, and part files left without one."""
+    cutoff = timezone.now() - timedelta(seconds=get_expiry())
+    expired = list(ScreenshotUpload.objects.filter(updated_at__lt=cutoff))
+    discard_uploads(expired)
+
+    temp_dir = get_temp_dir()
+    if not os.path.isdir(temp_dir):
+        return len(expired)
+    tokens = {token.hex for token in ScreenshotUpload.objects.values_list('token', flat=True)}
+    for entry in os.scandir(temp_dir):
+        token = entry.name.removesuffix(PART_FILE_SUFFIX)
+        if token not in tokens and entry.stat().st_mtime < cutoff.timestamp():
+            with suppress(FileNotFoundError):
+                os.remove(entry.path)
+    return len(expired)
@@ -9,9 +9,16 @@ urlpatterns = [
         path('edit/', views.GameUpdateView.as_view(), name='game_update'),
         path('delete/', views.GameDeleteView.as_view(), name='game_delete'),
         path('add_screenshot/', views.add_game_screenshot, name='add_screenshot'),
+        path('screenshots/status/', views.get_screenshots_status, name='screenshots_status'),
+        path('screenshots/uploads/', views.start_screenshot_upload, name='start_screenshot_upload'),
+        path('screenshots/uploads/<uuid:session>/', views.get_screenshot_upload_session,
+             name='screenshot_upload_session'),
+        path('screenshots/uploads/<uuid:session>/finish/', views.finish_screenshot_upload_session,
+             name='finish_screenshot_upload'),
         path('add_review/', views.AddOrUpdateReviewView.as_view(), name='add_review'),
         path('delete_review/', views.DeleteReviewView.as_view(), name='delete_review'),
     ])),
+    path('screenshot/upload/<uuid:token>/', views.screenshot_upload_part, name='screenshot_upload_part'),
     path('screenshot/<int:pk>/delete/', views.DeleteScreenshotView.as_view(), name='delete_screenshot'),
 ]
 
@@ -1,51 +1,58 @@
 
+import uuid
+
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
+from django.core.exceptions import ValidationError
 from django.http import JsonResponse
 from django.views import View
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.urls import reverse_lazy
+from django.urls import reverse_lazy, reverse
 from django.shortcuts import get_object_or_404, render, redirect
+from django.utils.datastructures import MultiValueDict
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
 
-from .models import Game, Screenshot, GameReview
+from .models import Game, Screenshot, GameReview, ScreenshotUpload
 from .forms import GameForm, ScreenshotForm, GameReviewForm, GameSearchForm
+from .search import search_games
+from .uploads import start_upload, write_part, finish_uploads, get_chunk_size, UploadOffsetError
+from ..consoles.search import SEARCH_MODE_FUZZY
+from ..consoles.suppliers import resolve_logos
+from ..common.card_cache import attach_card_versions
 from ..common.forms import GameCommentForm
-from ..consoles.models import Console
+from ..common.image_jobs import image_job_statuses
+from ..common.models import GameRating, ImageJob
+from ..common.conditional import ConditionalGetMixin, table_validators, object_validators
+from ..common.page_cache import AnonymousPageCacheMixin, PAGE_SCOPE_GAMES, game_page_scope
+from ..common.pagination import KeysetPaginationMixin
+from ..common.user_ratings import attach_user_ratings
+from ..renditions import rendition_url
 
 
-class GameListView(ListView):
+class GameListView(AnonymousPageCacheMixin, ConditionalGetMixin, KeysetPaginationMixin, ListView):
     model = Game
     template_name = 'game_list.html'
     context_object_name = 'games'
     paginate_by = 10
+    page_cache_scopes = (PAGE_SCOPE_GAMES,)
+
+    def get_validators(self):
+        return table_validators([Game], self.get_page_cache_scopes())
 
     def get_queryset(self):
-        # Get base queryset
-        queryset = super().get_queryset()
+        # Get base queryset, with the uploaders the game cards show
+        queryset = super().get_queryset().select_related('to_user')
 
         # Store search query as instance variable
         self.search_query = self.request.GET.get('search', '').strip()
+        self.search_mode = self.request.GET.get('mode', '').strip()
 
         if self.search_query:
-            # Get console IDs that match the search query
-            console_ids = Console.objects.filter(
-                name__icontains=self.search_query
-            ).values_list('id', flat=True)
-
-            # Apply all filters at once
-            queryset = queryset.filter(
-                Q(title__icontains=self.search_query) |
-                Q(description__icontains=self.search_query) |
-                Q(developer__icontains=self.search_query) |
-                Q(to_consoles__in=console_ids) |
-                Q(to_user__first_name__icontains=self.search_query) |
-                Q(to_user__last_name__icontains=self.search_query) |
-                Q(to_user__username__icontains=self.search_query)
-            ).distinct().order_by('-pk')  # Add explicit ordering to ensure consistent pagination
+            # full text (or trigram with ?mode=fuzzy) search on PostgreSQL, icontains filters on other databases
+            queryset = search_games(queryset, self.search_query, self.search_mode)
 
         return queryset
 
@@ -76,21 +83,39 @@ class GameListView(ListView):
             # Store the form in the game object
             game.comment_form = form
 
+        # one supplier index lookup for all developer logos on the page
+        resolve_logos(context['games'])
+        # the current user's ratings of the whole page with one query, instead of a request per rating widget
+        attach_user_ratings(GameRating, self.request.user, context['games'])
+        # version stamps of the cached card fragments
+        attach_card_versions(context['games'])
+
         context['search_form'] = GameSearchForm(self.request.GET)
         context['search_query'] = self.search_query
+        context['search_mode'] = self.search_mode
+        context['fuzzy_search_mode'] = SEARCH_MODE_FUZZY
         return context
 
 
-class GameDetailView(DetailView):
+class GameDetailView(AnonymousPageCacheMixin, ConditionalGetMixin, DetailView):
     model = Game
     template_name = 'game_detail.html'
     context_object_name = 'game'
 
+    def get_validators(self):
+        return object_validators(Game, self.kwargs['pk'], self.get_page_cache_scopes())
+
+    def get_page_cache_scopes(self):
+        return [game_page_scope(self.kwargs['pk'])]
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['screenshots'] = self.object.screenshot_set.all()
         context['review'] = self.object.reviews.all().first()
         context['comments'] = self.object.gamecomment_set.all()
+        resolve_logos([self.object])
+        attach_user_ratings(GameRating, self.request.user, [self.object])
+        context['consoles'] = resolve_logos(self.object.to_consoles.all())
 
         # Check if there's an invalid form for this game
         if (self.request.session.get('invalid_comment_form') and
@@ -201,31 +226,181 @@ class DeleteReviewView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
         return reverse_lazy('game_detail', kwargs={'pk': self.kwargs['pk']})
 
 
+def add_uploaded_message(request, screenshots):
+    if len(screenshots) == 1:
+        messages.success(request, 'Screenshot uploaded successfully!')
+    else:
+        messages.success(request, f'{len(screenshots)} screenshots uploaded successfully!')
+
+
 @login_required
 def add_game_screenshot(request, pk):
     game = get_object_or_404(Game, pk=pk)
 
     if request.method == 'POST':
-        form = ScreenshotForm(request.POST, request.FILES)
-        if form.is_valid():
-            screenshot = form.save(commit=False)
-            screenshot.to_game = game
-            screenshot.from_user = request.user
-            screenshot.save()
-            messages.success(request, 'Screenshot uploaded successfully!')
-            return redirect(f'{request.META.get("HTTP_REFERER")}#screenshot-{screenshot.pk}')
+        # one form per file, the input may send several
+        pictures = request.FILES.getlist('picture') or [None]
+        forms = [
+            ScreenshotForm(request.POST, MultiValueDict({'picture': [picture]} if picture else {}))
+            for picture in pictures
+        ]
+        if all([form.is_valid() for form in forms]):
+            try:
+                screenshots = Screenshot.objects.bulk_upload(
+                    game, request.user, [form.cleaned_data['picture'] for form in forms]
+                )
+            except ValidationError as error:
+                # a picture of the game uploaded already
+                for field, errors in error.message_dict.items():
+                    for message in errors:
+                        messages.error(request, f'{field}: {message}')
+            else:
+                add_uploaded_message(request, screenshots)
+                return redirect(f'{request.META.get("HTTP_REFERER")}#screenshot-{screenshots[0].pk}')
         else:
             # Add form errors to messages
-            for field, errors in form.errors.items():
-                for error in errors:
-                    if error == 'This field is required.':
-                        messages.error(request, "No file selected")
-                    else:
-                        messages.error(request, f'{field}: {error}')
+            for form in forms:
+                for field, errors in form.errors.items():
+                    for error in errors:
+                        if error == 'This field is required.':
+                            messages.error(request, "No file selected")
+                        else:
+                            messages.error(request, f'{field}: {error}')
 
     return redirect(f'{request.META.get("HTTP_REFERER")}#add_screenshot')
 
 
+def upload_state(upload):
+    return {
+        'token': str(upload.token),
+        'session': str(upload.session),
+        'name': upload.file_name,
+        'size': upload.size,
+        'received': upload.received,
+        'url': reverse('screenshot_upload_part', args=[upload.token]),
+        'chunk_size': get_chunk_size(),
+    }
+
+
+@login_required
+@require_http_methods(["POST"])
+def start_screenshot_upload(request, pk):
+    """
+    Starts the upload of a picture in parts (see games_archive.games.uploads) from its `name` and `size`, in the
+    `session` of the pictures selected together or a new one. The parts are PUT to the url of the response.
+    """
+    game = get_object_or_404(Game, pk=pk)
+    name = request.POST.get('name', '')
+    try:
+        size = int(request.POST.get('size', ''))
+        session = uuid.UUID(request.POST['session']) if request.POST.get('session') else None
+    except ValueError:
+        return JsonResponse({'error': 'Invalid request'}, status=400)
+    if not name:
+        return JsonResponse({'error': 'Invalid request'}, status=400)
+
+    try:
+        upload = start_upload(game, request.user, name, size, request.POST.get('content_type', ''), session)
+    except ValidationError as error:
+        return JsonResponse({'error': ' '.join(error.messages)}, status=400)
+    return JsonResponse(upload_state(upload), status=201)
+
+
+@login_required
+@require_http_methods(["GET", "PUT"])
+def screenshot_upload_part(request, token):
+    """
+    GET returns the bytes received so far, to resume an interrupted upload. PUT stores the request body as the part
+    starting at the `offset` query parameter - a part starting elsewhere is refused with the received bytes (409).
+    """
+    upload = get_object_or_404(ScreenshotUpload, token=token, from_user=request.user)
+    if request.method == 'GET':
+        return JsonResponse(upload_state(upload))
+
+    try:
+        offset = int(request.GET.get('offset', ''))
+        length = int(request.META.get('CONTENT_LENGTH') or '')
+    except ValueError:
+        return JsonResponse({'error': 'Invalid request'}, status=400)
+    if offset < 0 or length < 0:
+        return JsonResponse({'error': 'Invalid request'}, status=400)
+    if length > get_chunk_size():
+        return JsonResponse({'error': f'The parts are at most {get_chunk_size()} bytes'}, status=413)
+
+    try:
+        # the body is streamed to the part file, never read as a whole
+        upload = write_part(upload, offset, request, length)
+    except UploadOffsetError as error:
+        return JsonResponse(upload_state(error.upload), status=409)
+    except ValidationError as error:
+        return JsonResponse({'error': ' '.join(error.messages)}, status=400)
+    return JsonResponse(upload_state(upload))
+
+
+def get_session_uploads(request, pk, session):
+    return list(
+        ScreenshotUpload.objects.filter(session=session, to_game_id=pk, from_user=request.user).order_by('pk')
+    )
+
+
+@login_required
+@require_http_methods(["GET"])
+def get_screenshot_upload_session(request, pk, session):
+    # the uploads of a session, to resume them after the page was reloaded
+    uploads = get_session_uploads(request, pk, session)
+    return JsonResponse({'session': str(session), 'uploads': [upload_state(upload) for upload in uploads]})
+
+
+@login_required
+@require_http_methods(["POST"])
+def finish_screenshot_upload_session(request, pk, session):
+    """
+    Creates the screenshots of the session's uploads, all of their parts must be received. The invalid pictures are
+    reported by their upload token, the valid ones are added anyway.
+    """
+    game = get_object_or_404(Game, pk=pk)
+    uploads = get_session_uploads(request, pk, session)
+    if not uploads:
+        return JsonResponse({'error': 'Upload session not found'}, status=404)
+    incomplete = [upload for upload in uploads if not upload.is_complete]
+    if incomplete:
+        return JsonResponse({
+            'error': 'Not all of the files are uploaded',
+            'uploads': [upload_state(upload) for upload in incomplete],
+        }, status=409)
+
+    screenshots, errors = finish_uploads(game, request.user, uploads)
+    if screenshots:
+        add_uploaded_message(request, screenshots)
+    return JsonResponse({
+        'screenshots': [
+            {'pk': screenshot.pk, 'url': rendition_url(screenshot.picture, 'medium')} for screenshot in screenshots
+        ],
+        'errors': errors,
+        'redirect_url': f'#screenshot-{screenshots[0].pk}' if screenshots else '#add_screenshot',
+    }, status=201 if screenshots else 400)
+
+
+def get_screenshots_status(request, pk):
+    """
+    Rendition status of the game's screenshots - the gallery polls it (assets/js/screenshot-renditions.js) and swaps
+    in the rendition of a new screenshot once the image job worker rendered it.
+    """
+    game = get_object_or_404(Game, pk=pk)
+    screenshots = list(game.screenshot_set.all())
+    pending = [screenshot for screenshot in screenshots if not screenshot.picture_is_rendered]
+    statuses = image_job_statuses([screenshot.picture.name for screenshot in pending])
+    return JsonResponse({
+        'screenshots': {
+            str(screenshot.pk): {
+                'status': statuses.get(screenshot.picture.name, ImageJob.STATUS_DONE),
+                'url': rendition_url(screenshot.picture, 'medium'),
+            }
+            for screenshot in screenshots
+        }
+    })
+
+
 class DeleteScreenshotView(LoginRequiredMixin, UserPassesTestMixin, View):
     def test_func(self):
         screenshot = get_object_or_404(Screenshot, pk=self.kwargs['pk'])
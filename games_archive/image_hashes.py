@@ -0,0 +1,108 @@
+import hashlib
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+# dHash - the grayscale image shrunk to 9x8 pixels, a bit per pixel set when it is brighter than its right neighbour.
+# Resized, recompressed or slightly retouched copies of a picture hash to the same or nearly the same 64 bits
+DHASH_SIZE = 8
+
+
+def get_duplicate_max_distance():
+    # differing bits of two dHashes still taken for the same picture
+    return getattr(settings, 'IMAGE_DUPLICATE_MAX_DISTANCE', 6)
+
+
+def file_sha256(file):
+    digest = hashlib.sha256()
+    # chunks() starts at the beginning of the file
+    for chunk in file.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def image_dhash(file):
+    """The dHash of an image file as 16 hex digits, '' when the file is not a readable image."""
+    try:
+        file.seek(0)
+        with Image.open(file) as image:
+            # a JPEG is decoded at a fraction of its size, the hash needs 9x8 pixels
+            image.draft('L', (DHASH_SIZE * 8, DHASH_SIZE * 8))
+            image = ImageOps.exif_transpose(image).convert('L')
+            pixels = list(image.resize((DHASH_SIZE + 1, DHASH_SIZE), Image.Resampling.LANCZOS).getdata())
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError):
+        return ''
+    finally:
+        file.seek(0)
+
+    bits = 0
+    for row in range(DHASH_SIZE):
+        for column in range(DHASH_SIZE):
+            left = pixels[row * (DHASH_SIZE + 1) + column]
+            bits = bits << 1 | (left > pixels[row * (DHASH_SIZE + 1) + column + 1])
+    return f'{bits:016x}'
+
+
+def hash_image(file):
+    """(content SHA-256, dHash) of an image file, remembered on the file object - it is hashed once per request."""
+    hashes = getattr(file, 'image_hashes', None)
+    if hashes is None:
+        hashes = file.image_hashes = (file_sha256(file), image_dhash(file))
+    return hashes
+
+
+def hash_stored_image(name, storage=None):
+    """The hashes of a stored image as (name, SHA-256, dHash), (name, '', '') when it can not be read."""
+    storage = storage or default_storage
+    try:
+        with storage.open(name) as file:
+            return (name, *hash_image(file))
+    except OSError:
+        return name, '', ''
+
+
+def hamming_distance(dhash, other):
+    return (int(dhash, 16) ^ int(other, 16)).bit_count()
+
+
+def find_near_duplicate(dhash, dhashes):
+    """The first of the dHashes within IMAGE_DUPLICATE_MAX_DISTANCE bits of dhash, None when there is none."""
+    max_distance = get_duplicate_max_distance()
+    for other in dhashes:
+        if other and hamming_distance(dhash, other) <= max_distance:
+            return other
+    return None
+
+
+def reference_stored_file(storage, name, count=1):
+    # a content addressed storage counts the objects sharing a file, see games_archive.custom_storages
+    add_references = getattr(storage, 'add_references', None)
+    if add_references is not None:
+        add_references(name, count)
+
+
+def hash_new_image(instance, field_name, sha256_field, dhash_field):
+    """
+    Stores the hashes of a new upload of the instance's image field in its hash fields. When the same file is stored
+    for another object of the model already, the field links that file instead of storing a copy.
+    """
+    image = getattr(instance, field_name)
+    if not image or image._committed:
+        return
+    sha256, dhash = hash_image(image.file)
+    setattr(instance, sha256_field, sha256)
+    setattr(instance, dhash_field, dhash)
+
+    stored = (
+        type(instance)._default_manager
+        .filter(**{sha256_field: sha256})
+        .exclude(**{field_name: ''})
+        .values_list(field_name, flat=True)
+        .first()
+    )
+    if stored:
+        reference_stored_file(image.storage, stored)
+        setattr(instance, field_name, stored)
+        # a new reference like an upload, the replaced file's is dropped after the save (games_archive.common.signals)
+        instance.__dict__.setdefault('_linked_files', set()).add(field_name)
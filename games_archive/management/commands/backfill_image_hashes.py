@@ -0,0 +1,96 @@
+import multiprocessing
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Count
+
+from games_archive.common.card_cache import bump_card_versions, CARD_VERSION_GAME
+from games_archive.common.image_jobs import get_worker_processes, init_pool_process
+from games_archive.common.page_cache import bump_page_versions, PAGE_SCOPE_ALL
+from games_archive.custom_storages import release_stored_file
+from games_archive.games.models import Game, Screenshot
+from games_archive.image_hashes import hash_stored_image, reference_stored_file
+
+# model, image field, SHA-256 field, dHash field
+HASHED_IMAGES = [
+    (Screenshot, 'picture', 'picture_sha256', 'picture_dhash'),
+    (Game, 'cover_image', 'cover_sha256', 'cover_dhash'),
+]
+
+
+class Command(BaseCommand):
+    help = ('Computes the content SHA-256 and the dHash of the screenshots and game covers stored before they were '
+            'hashed on upload, reading the files in a pool of processes. --link points the objects with identical '
+            'files to one stored copy, the other copies are no longer referenced.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=None,
+                            help='Pool processes, IMAGE_WORKER_PROCESSES by default, 0 hashes in this process')
+        parser.add_argument('--batch-size', type=int, default=200, help='Files handed to the pool at once')
+        parser.add_argument('--link', action='store_true', help='Link the objects with identical files to one copy')
+
+    def handle(self, *args, **options):
+        processes = options['processes'] if options['processes'] is not None else get_worker_processes()
+        batch_size = options['batch_size']
+
+        pool = None
+        if processes:
+            # the pool processes are forked without the database connections, they do not use the database
+            connections.close_all()
+            pool = multiprocessing.Pool(processes, initializer=init_pool_process)
+
+        hashed = unreadable = 0
+        linked = {}
+        try:
+            for model, field, sha256_field, dhash_field in HASHED_IMAGES:
+                names = list(
+                    model.objects.filter(**{sha256_field: ''})
+                    .exclude(**{f'{field}__isnull': True}).exclude(**{field: ''})
+                    .order_by().values_list(field, flat=True).distinct()
+                )
+                for start in range(0, len(names), batch_size):
+                    batch = names[start:start + batch_size]
+                    results = pool.imap_unordered(hash_stored_image, batch) if pool is not None \
+                        else map(hash_stored_image, batch)
+                    for name, sha256, dhash in results:
+                        if not sha256:
+                            unreadable += 1
+                            continue
+                        model.objects.filter(**{field: name}).update(**{sha256_field: sha256, dhash_field: dhash})
+                        hashed += 1
+
+                if options['link']:
+                    linked[model] = self.link_identical_files(model, field, sha256_field)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        if options['link']:
+            # the cached pages and cards link the files of before
+            bump_card_versions(CARD_VERSION_GAME, linked[Game])
+            bump_page_versions([PAGE_SCOPE_ALL])
+            self.stdout.write(f'Linked {sum(map(len, linked.values()))} objects to an identical stored file')
+        self.stdout.write(self.style.SUCCESS(f'Hashed {hashed} files, {unreadable} could not be read'))
+
+    @staticmethod
+    def link_identical_files(model, field, sha256_field):
+        # the objects with the same content share the file of the oldest one
+        identical = (
+            model.objects.exclude(**{sha256_field: ''}).order_by().values(sha256_field)
+            .annotate(files=Count(field, distinct=True)).filter(files__gt=1)
+            .values_list(sha256_field, flat=True)
+        )
+        linked = []
+        for sha256 in list(identical):
+            copies = model.objects.filter(**{sha256_field: sha256})
+            kept = copies.order_by('pk').values_list(field, flat=True).first()
+            replaced = list(copies.exclude(**{field: kept}).values_list('pk', field))
+            pks = [pk for pk, name in replaced]
+            model.objects.filter(pk__in=pks).update(**{field: kept})
+            storage = model._meta.get_field(field).storage
+            reference_stored_file(storage, kept, len(pks))
+            for pk, name in replaced:
+                release_stored_file(storage, name)
+            linked.extend(pks)
+        return linked
@@ -0,0 +1,118 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.db.backends.signals import connection_created
+from django.db.utils import ConnectionHandler
+
+MODE_PER_REQUEST = 'per request'
+MODE_PERSISTENT = 'persistent'
+MODE_POOL = 'pool'
+
+# CONN_MAX_AGE of the persistent mode when the configured one closes the connections
+DEFAULT_PERSISTENT_MAX_AGE = 60
+
+
+def pool_supported(settings_dict):
+    # Django's connection pool needs psycopg 3 with psycopg_pool
+    if settings_dict['ENGINE'] != 'django.db.backends.postgresql':
+        return False
+    try:
+        import psycopg_pool  # noqa: F401
+        from django.db.backends.postgresql.psycopg_any import is_psycopg3
+    except ImportError:
+        return False
+    return is_psycopg3
+
+
+def mode_settings(settings_dict):
+    """The settings of the default database in each connection mode, from the configured ones."""
+    options = {key: value for key, value in settings_dict.get('OPTIONS', {}).items() if key != 'pool'}
+    max_age = settings_dict.get('CONN_MAX_AGE')
+    modes = {
+        MODE_PER_REQUEST: {**settings_dict, 'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False, 'OPTIONS': options},
+        MODE_PERSISTENT: {
+            **settings_dict,
+            'CONN_MAX_AGE': max_age if max_age != 0 else DEFAULT_PERSISTENT_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': options,
+        },
+    }
+    if pool_supported(settings_dict):
+        modes[MODE_POOL] = {
+            **settings_dict,
+            'CONN_MAX_AGE': 0,
+            'CONN_HEALTH_CHECKS': False,
+            # one worker serving one request at a time
+            'OPTIONS': {**options, 'pool': {'min_size': 1, 'max_size': 1}},
+        }
+    return modes
+
+
+def simulate_requests(connection, count, queries):
+    """
+    Runs count request cycles on the connection - close_if_unusable_or_obsolete() is what the request_started and
+    request_finished handlers of Django run - and returns the milliseconds of each request.
+    """
+    timings = []
+    for _ in range(count):
+        started = time.perf_counter()
+        connection.close_if_unusable_or_obsolete()
+        with connection.cursor() as cursor:
+            for _ in range(queries):
+                cursor.execute('SELECT 1')
+        connection.close_if_unusable_or_obsolete()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def benchmark_mode(settings_dict, count, queries):
+    """(connects, request timings) of one connection mode on connections of its own - the pool counts its checkouts."""
+    handler = ConnectionHandler({DEFAULT_DB_ALIAS: settings_dict})
+    connection = handler[DEFAULT_DB_ALIAS]
+    connects = []
+
+    def count_connect(sender, connection, **kwargs):
+        if connection is handler[DEFAULT_DB_ALIAS]:
+            connects.append(connection)
+
+    connection_created.connect(count_connect, weak=False)
+    try:
+        timings = simulate_requests(connection, count, queries)
+    finally:
+        connection_created.disconnect(count_connect)
+        connection.close()
+        if hasattr(connection, 'close_pool'):
+            connection.close_pool()
+    return len(connects), timings
+
+
+class Command(BaseCommand):
+    help = ('Measures the per-request database connection overhead - simulated requests with a new connection per '
+            'request, with persistent connections (CONN_MAX_AGE with health checks) and, with psycopg 3, with a '
+            'connection pool. Run it against the production database server to size DB_CONN_MAX_AGE / DB_POOL.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--queries', type=int, default=1, help='Queries per simulated request')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        modes = mode_settings(connections[options['database']].settings_dict)
+        if MODE_POOL not in modes:
+            self.stdout.write('Skipping the pool mode, it needs PostgreSQL with psycopg 3 and psycopg_pool')
+
+        self.stdout.write(f'{"mode":<12} {"requests":>8} {"connects":>8} {"mean ms":>8} {"p50 ms":>8} {"p95 ms":>8}')
+        means = {}
+        for mode, settings_dict in modes.items():
+            connects, timings = benchmark_mode(settings_dict, options['requests'], options['queries'])
+            means[mode] = statistics.mean(timings)
+            p95 = statistics.quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]
+            self.stdout.write(
+                f'{mode:<12} {len(timings):>8} {connects:>8} {means[mode]:>8.2f} {statistics.median(timings):>8.2f} '
+                f'{p95:>8.2f}'
+            )
+
+        overhead = means[MODE_PER_REQUEST] - means[MODE_PERSISTENT]
+        self.stdout.write(self.style.SUCCESS(f'Connecting per request costs {overhead:.2f} ms per request'))
@@ -0,0 +1,139 @@
+import os
+import shutil
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+
+from games_archive.common.models import StoredFile
+from games_archive.custom_storages import file_existence_cache
+from games_archive.renditions import RENDITIONS_DIR
+
+
+def iter_stored_files(root, path=''):
+    """(name, size, modification time) of the files under the directory, streamed - one directory entry at a time."""
+    with os.scandir(os.path.join(root, path)) as entries:
+        for entry in entries:
+            name = f'{path}/{entry.name}' if path else entry.name
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_stored_files(root, name)
+            elif entry.is_file(follow_symlinks=False):
+                stat = entry.stat(follow_symlinks=False)
+                yield name, stat.st_size, stat.st_mtime
+
+
+def iter_batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def file_fields():
+    # (model, field name) of every file and image field of the project
+    return [
+        (model, field.name)
+        for model in apps.get_models()
+        for field in model._meta.get_fields()
+        if isinstance(field, models.FileField)
+    ]
+
+
+def source_name(name):
+    # the variants of an image are stored under renditions/<image name>/, they belong to the image
+    if name.startswith(f'{RENDITIONS_DIR}/'):
+        return name[len(RENDITIONS_DIR) + 1:].rsplit('/', 1)[0]
+    return name
+
+
+def unreferenced_files(fields, files):
+    # the (name, size, modification time) entries no field references, a query per field
+    sources = {source_name(name) for name, size, mtime in files}
+    referenced = set()
+    for model, field_name in fields:
+        referenced.update(
+            model._base_manager.filter(**{f'{field_name}__in': sources}).values_list(field_name, flat=True)
+        )
+    return [stored_file for stored_file in files if source_name(stored_file[0]) not in referenced]
+
+
+class Command(BaseCommand):
+    help = ('Removes the media files no file or image field references any more - left behind by deleted games, '
+            'screenshots, consoles and users or by cleared images - with the renditions of the removed images. The '
+            'media are listed as a stream and checked in batches, a query per file field and batch, so the memory '
+            'stays bounded however many files there are.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only list the orphaned files')
+        parser.add_argument('--quarantine', default=None,
+                            help='Move the orphaned files to this directory instead of deleting them')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Files checked with one query per field')
+        parser.add_argument('--min-age', type=int, default=24 * 3600,
+                            help='Seconds a file must be unchanged and unreferenced to be collected - a new upload '
+                                 'or a new link to a stored file may not be committed yet')
+
+    def handle(self, *args, **options):
+        root = default_storage.location
+        fields = file_fields()
+        cutoff = time.time() - options['min_age']
+        scanned = orphaned = orphaned_bytes = 0
+
+        old_files = (
+            stored_file for stored_file in iter_stored_files(root) if stored_file[2] < cutoff
+        ) if os.path.isdir(root) else ()
+        for batch in iter_batches(old_files, options['batch_size']):
+            scanned += len(batch)
+            orphans = unreferenced_files(fields, batch)
+            if orphans and not options['dry_run']:
+                orphans = self.collect(orphans, fields, cutoff, options['quarantine'])
+            orphaned += len(orphans)
+            orphaned_bytes += sum(size for name, size, mtime in orphans)
+            if options['verbosity'] > 1 or options['dry_run']:
+                for name, size, mtime in orphans:
+                    self.stdout.write(name)
+
+        action = 'Found' if options['dry_run'] else ('Quarantined' if options['quarantine'] else 'Removed')
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} {orphaned} orphaned files ({orphaned_bytes // 1024} KB) of {scanned} scanned'
+        ))
+
+    @staticmethod
+    def collect(orphans, fields, cutoff, quarantine):
+        """
+        Removes the orphans, checked again under the locks of their StoredFile rows - an upload of the same content
+        reuses a stored file, it takes a reference (moving updated_at) and touches the file before its object is
+        committed. Returns the removed ones.
+        """
+        root = default_storage.location
+        with transaction.atomic():
+            referenced_lately = set(
+                StoredFile.objects.select_for_update()
+                .filter(name__in=[name for name, size, mtime in orphans])
+                .filter(updated_at__gte=datetime.fromtimestamp(cutoff, tz=dt_timezone.utc))
+                .values_list('name', flat=True)
+            )
+            collected = []
+            for name, size, mtime in unreferenced_files(fields, orphans):
+                path = os.path.join(root, name)
+                if name in referenced_lately or not os.path.isfile(path) or os.path.getmtime(path) >= cutoff:
+                    continue
+                collected.append((name, size, mtime))
+
+            # the reference counts of the content addressed files, nothing references them
+            StoredFile.objects.filter(name__in=[name for name, size, mtime in collected]).delete()
+            for name, size, mtime in collected:
+                if quarantine:
+                    target = os.path.join(quarantine, name)
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    shutil.move(os.path.join(root, name), target)
+                    file_existence_cache.set(file_existence_cache.make_key(default_storage, name), False)
+                else:
+                    default_storage.delete(name)
+        return collected
@@ -0,0 +1,248 @@
+import itertools
+import random
+import uuid
+from collections import Counter
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from games_archive.accounts.models import GamesArchiveUser
+from games_archive.common.card_cache import bump_card_versions, CARD_VERSION_GAME, CARD_VERSION_USER, \
+    CARD_VERSION_CONSOLE
+from games_archive.common.models import GameRating, ConsoleRating, GameComment, ConsoleComment
+from games_archive.common.page_cache import bump_page_versions, PAGE_SCOPE_ALL
+from games_archive.consoles.models import Console, Supplier
+from games_archive.consoles.suppliers import supplier_logo_resolver
+from games_archive.games.models import Game, Screenshot, GameReview
+
+FIRST_NAMES = ['Alex', 'Maria', 'Ivan', 'Elena', 'Peter', 'Anna', 'George', 'Nina', 'Martin', 'Lora', 'Victor', 'Diana']
+LAST_NAMES = ['Petrov', 'Smith', 'Ivanova', 'Miller', 'Georgiev', 'Brown', 'Dimitrova', 'Wilson', 'Kolev', 'Taylor']
+SUPPLIER_WORDS = ['Nin', 'Sega', 'Atari', 'Kon', 'Cap', 'Nam', 'Tai', 'Squ', 'Activ', 'Hud', 'Bandai', 'Elec', 'Micro',
+                  'Sun', 'Star', 'Data', 'Vision', 'Soft', 'Tronic', 'Dyne']
+SUPPLIER_SUFFIXES = ['', ' Games', ' Interactive', ' Entertainment', ' Corporation', ' Software']
+# studios are often named after the supplier, which exercises the supplier logo matching
+STUDIO_SUFFIXES = ['', '', ' EAD', ' R&D1', ' Studio', ' Japan', ' West']
+CONSOLE_WORDS = ['Master', 'Mega', 'Super', 'Turbo', 'Game', 'Neo', 'Color', 'Pocket', 'Jaguar', 'Lynx', 'Saturn',
+                 'Dreamcast', 'Station', 'Boy', 'Drive', 'System', 'Vision', 'Engine']
+GENRES = ['Platformer', 'Shooter', 'RPG', 'Racing', 'Puzzle', 'Fighting', 'Sports', 'Adventure', 'Strategy']
+TITLE_ADJECTIVES = ['Super', 'Mega', 'Final', 'Dark', 'Golden', 'Crystal', 'Galactic', 'Turbo', 'Shadow', 'Iron',
+                    'Lost', 'Mystic', 'Cyber', 'Pixel', 'Atomic', 'Hyper']
+TITLE_NOUNS = ['Quest', 'Fighter', 'Racer', 'Dungeon', 'Invaders', 'Legend', 'Knight', 'Dragon', 'Kong', 'Blaster',
+               'Warrior', 'Odyssey', 'Tetris', 'Runner', 'Commando', 'Saga']
+TEXT_WORDS = ['classic', 'arcade', 'cartridge', 'pixel', 'level', 'boss', 'score', 'joystick', 'retro', 'sprite',
+              'soundtrack', 'multiplayer', 'console', 'controller', 'cheat', 'save', 'world', 'hero', 'secret', 'power',
+              'the', 'a', 'with', 'and', 'of', 'in', 'great', 'hard', 'best', 'remember', 'played', 'childhood']
+
+# share of the 1..5 star ratings - real ratings lean towards the top
+RATING_VALUE_WEIGHTS = [5, 8, 17, 35, 35]
+
+
+def zipf_cum_weights(n, skew):
+    # rank r gets the weight 1 / r^skew, skew 0 is uniform
+    return list(itertools.accumulate(1 / rank ** skew for rank in range(1, n + 1)))
+
+
+def zipf_choices(rng, population, k, skew):
+    """k picks from the population where a few items (random ones, not the first pks) get most of the picks."""
+    if not population or k <= 0:
+        return []
+    ranked = list(population)
+    rng.shuffle(ranked)
+    return rng.choices(ranked, cum_weights=zipf_cum_weights(len(ranked), skew), k=k)
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = ('Bulk generates a synthetic catalog - users, suppliers, consoles, games with consoles, ratings, comments, '
+            'reviews and screenshot rows - for reproducing production sized query plans locally. '
+            'Popularity follows a Zipf distribution, set its exponent with --skew.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--suppliers', type=int, default=20)
+        parser.add_argument('--consoles', type=int, default=40)
+        parser.add_argument('--games', type=int, default=2000)
+        parser.add_argument('--consoles-per-game', type=int, default=3,
+                            help='Maximum number of consoles linked to a game')
+        parser.add_argument('--game-ratings', type=int, default=20000)
+        parser.add_argument('--console-ratings', type=int, default=2000)
+        parser.add_argument('--comments', type=int, default=5000,
+                            help='Number of game comments, a tenth of it is added as console comments')
+        parser.add_argument('--reviews', type=int, default=500)
+        parser.add_argument('--screenshots', type=int, default=2000)
+        parser.add_argument('--skew', type=float, default=1.1,
+                            help='Zipf exponent of the popularity of games, consoles, suppliers and users')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--password', default=None,
+                            help='Password of the generated users, they can not log in without it')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.skew = options['skew']
+        self.batch_size = options['batch_size']
+        # keeps the names unique across runs, also the runs with the same --seed
+        self.tag = uuid.uuid4().hex[:6]
+
+        with transaction.atomic():
+            users = self.create_users(options['users'], options['password'])
+            suppliers = self.create_suppliers(options['suppliers'])
+            consoles = self.create_consoles(options['consoles'], suppliers, users)
+            games = self.create_games(options['games'], suppliers, users)
+            self.link_consoles(games, consoles, options['consoles_per_game'])
+            self.create_ratings(GameRating, games, users, options['game_ratings'])
+            self.create_ratings(ConsoleRating, consoles, users, options['console_ratings'])
+            self.create_comments(GameComment, games, users, options['comments'])
+            self.create_comments(ConsoleComment, consoles, users, options['comments'] // 10)
+            self.create_reviews(games, users, options['reviews'])
+            self.create_screenshots(games, users, options['screenshots'])
+
+            # bulk_create skips the signals, rebuild what they would have kept up to date
+            call_command('rebuild_rating_aggregates', stdout=self.stdout)
+            call_command('rebuild_search_vectors', stdout=self.stdout)
+            call_command('rebuild_leaderboards', stdout=self.stdout)
+            transaction.on_commit(supplier_logo_resolver.invalidate)
+            bump_card_versions(CARD_VERSION_GAME, [game.pk for game in games])
+            bump_card_versions(CARD_VERSION_USER, [user.pk for user in users])
+            bump_card_versions(CARD_VERSION_CONSOLE, [console.pk for console in consoles])
+            bump_page_versions([PAGE_SCOPE_ALL])
+
+        self.stdout.write(self.style.SUCCESS(f'Generated catalog {self.tag}'))
+
+    def bulk_create(self, model, objects):
+        created = []
+        for batch in batched(objects, self.batch_size):
+            created.extend(model.objects.bulk_create(batch))
+        self.stdout.write(f'Created {len(created)} {model._meta.verbose_name_plural}')
+        return created
+
+    def words(self, max_length):
+        text = ' '.join(self.rng.choices(TEXT_WORDS, k=self.rng.randint(5, 60))).capitalize() + '.'
+        return text[:max_length]
+
+    def create_users(self, count, password):
+        password = make_password(password)
+        users = (
+            GamesArchiveUser(
+                username=f'user-{self.tag}-{i}',
+                email=f'user-{self.tag}-{i}@example.com',
+                first_name=self.rng.choice(FIRST_NAMES),
+                last_name=self.rng.choice(LAST_NAMES),
+                password=password,
+                age=self.rng.randint(12, 70),
+            )
+            for i in range(count)
+        )
+        return self.bulk_create(GamesArchiveUser, users)
+
+    def create_suppliers(self, count):
+        suppliers = (
+            Supplier(
+                name=f'{self.rng.choice(SUPPLIER_WORDS)}{self.rng.choice(SUPPLIER_WORDS).lower()}'
+                     f'{self.rng.choice(SUPPLIER_SUFFIXES)}',
+                logo=f'suppliers_logos/generated-{self.tag}-{i}.png',
+            )
+            for i in range(count)
+        )
+        return self.bulk_create(Supplier, suppliers)
+
+    def supplier_names(self, suppliers, count, suffixes):
+        picks = zipf_choices(self.rng, [supplier.name for supplier in suppliers], count, self.skew)
+        return [f'{name}{self.rng.choice(suffixes)}' for name in picks] or [None] * count
+
+    def create_consoles(self, count, suppliers, users):
+        manufacturers = self.supplier_names(suppliers, count, [''])
+        owners = zipf_choices(self.rng, users, count, self.skew)
+        consoles = (
+            Console(
+                name=f'{" ".join(self.rng.sample(CONSOLE_WORDS, 2))} {self.tag}-{i}',
+                manufacturer=manufacturers[i],
+                release_year=self.rng.randint(1972, 2005),
+                description=self.words(1000),
+                to_user=owners[i],
+            )
+            for i in range(count)
+        )
+        return self.bulk_create(Console, consoles)
+
+    def create_games(self, count, suppliers, users):
+        developers = self.supplier_names(suppliers, count, STUDIO_SUFFIXES)
+        owners = zipf_choices(self.rng, users, count, self.skew)
+        games = (
+            Game(
+                title=f'{self.rng.choice(TITLE_ADJECTIVES)} {self.rng.choice(TITLE_NOUNS)} {self.tag}-{i}',
+                developer=developers[i],
+                genre=self.rng.choice(GENRES),
+                release_year=self.rng.randint(1972, 2010),
+                description=self.words(1000),
+                to_user=owners[i],
+            )
+            for i in range(count)
+        )
+        return self.bulk_create(Game, games)
+
+    def link_consoles(self, games, consoles, max_per_game):
+        if not consoles or max_per_game <= 0:
+            return
+        through = Game.to_consoles.through
+        links = []
+        for game in games:
+            # popular consoles get most of the games
+            picked = set(zipf_choices(self.rng, consoles, self.rng.randint(1, max_per_game), self.skew))
+            links.extend(through(game_id=game.pk, console_id=console.pk) for console in picked)
+        self.bulk_create(through, links)
+
+    def create_ratings(self, rating_model, rated_objects, users, count):
+        # a few objects get most of the ratings, a user rates an object once
+        per_object = Counter(zipf_choices(self.rng, range(len(rated_objects)), count, self.skew))
+        ratings = (
+            rating_model(
+                from_user=user,
+                rating=self.rng.choices(range(1, 6), weights=RATING_VALUE_WEIGHTS)[0],
+                **{rating_model.RATED_OBJECT_FIELD: rated_objects[index]},
+            )
+            for index, ratings_count in per_object.items()
+            for user in self.rng.sample(users, min(ratings_count, len(users)))
+        )
+        self.bulk_create(rating_model, ratings)
+
+    def create_comments(self, comment_model, commented_objects, users, count):
+        target_field = 'to_game' if comment_model is GameComment else 'to_console'
+        targets = zipf_choices(self.rng, commented_objects, count, self.skew)
+        authors = zipf_choices(self.rng, users, count, self.skew)
+        comments = (
+            comment_model(comment=self.words(700), from_user=author, **{target_field: target})
+            for target, author in zip(targets, authors)
+        )
+        self.bulk_create(comment_model, comments)
+
+    def create_reviews(self, games, users, count):
+        targets = zipf_choices(self.rng, games, count, self.skew)
+        authors = zipf_choices(self.rng, users, count, self.skew)
+        reviews = (
+            GameReview(content=self.words(2500), from_user=author, to_game=target)
+            for target, author in zip(targets, authors)
+        )
+        self.bulk_create(GameReview, reviews)
+
+    def create_screenshots(self, games, users, count):
+        # rows only, the picture files are not created
+        targets = zipf_choices(self.rng, games, count, self.skew)
+        authors = zipf_choices(self.rng, users, count, self.skew)
+        screenshots = (
+            Screenshot(
+                to_game=target,
+                from_user=author,
+                picture=f'game_screenshots/generated-{self.tag}-{i}.jpg',
+                slug=Screenshot.make_slug(target.title, author.username),
+            )
+            for i, (target, author) in enumerate(zip(targets, authors))
+        )
+        self.bulk_create(Screenshot, screenshots)
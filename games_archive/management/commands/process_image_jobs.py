@@ -0,0 +1,59 @@
+import multiprocessing
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from games_archive.common.image_jobs import process_image_jobs, get_worker_processes, init_pool_process
+from games_archive.common.page_cache import default_cache_is_shared
+
+
+class Command(BaseCommand):
+    help = ('Renders the renditions of the queued image jobs in a pool of processes (the Pillow work is CPU bound), '
+            'by priority, retrying the failed jobs with a backoff. Run it with --loop as a worker next to the web '
+            'server.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=None,
+                            help='Pool processes, IMAGE_WORKER_PROCESSES by default, 0 renders in this process')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Jobs claimed at once, 4 per process by default')
+        parser.add_argument('--loop', action='store_true', help='Keep polling the queue')
+        parser.add_argument('--sleep', type=float, default=2, help='Seconds between the polls of an empty queue')
+
+    def handle(self, *args, **options):
+        if not default_cache_is_shared():
+            # the cards and pages showing a rendered image are refreshed through version stamps in the default cache
+            self.stderr.write(self.style.WARNING(
+                'The default cache is per process, the web server does not see the refreshed cards and pages - '
+                'set CACHE_BACKEND to a shared cache, e.g. redis'
+            ))
+        processes = options['processes'] if options['processes'] is not None else get_worker_processes()
+        batch_size = options['batch_size'] or max(processes, 1) * 4
+
+        pool = None
+        if processes:
+            # the pool processes are forked without the database connections, they do not use the database
+            connections.close_all()
+            pool = multiprocessing.Pool(processes, initializer=init_pool_process)
+
+        total_done = total_failed = 0
+        try:
+            while True:
+                done, failed = process_image_jobs(batch_size, pool)
+                total_done += done
+                total_failed += failed
+                if done or failed:
+                    self.stdout.write(f'Rendered {done} images, {failed} failed')
+
+                # a full batch means more jobs may be due right away
+                if done + failed < batch_size:
+                    if not options['loop']:
+                        break
+                    time.sleep(options['sleep'])
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        self.stdout.write(self.style.SUCCESS(f'Rendered {total_done} images, {total_failed} failed'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from games_archive.games.uploads import purge_expired_uploads
+
+
+class Command(BaseCommand):
+    help = ('Removes the screenshot uploads without new parts for SCREENSHOT_UPLOAD_EXPIRY seconds, with their part '
+            'files. Run it periodically, e.g. from cron.')
+
+    def handle(self, *args, **options):
+        purged = purge_expired_uploads()
+        self.stdout.write(self.style.SUCCESS(f'Purged {purged} expired uploads'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from games_archive.common.leaderboards import rebuild_leaderboards
+
+
+class Command(BaseCommand):
+    help = ('Rebuilds the overall, per console and per genre game leaderboards from the stored rating aggregates. '
+            'Run it after rebuild_rating_aggregates, bulk imports or a change of the ranking settings.')
+
+    def handle(self, *args, **options):
+        ranked = rebuild_leaderboards()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the leaderboards of {ranked} rated games'))
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import OuterRef, Subquery, Sum, Count, FloatField, IntegerField, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+from games_archive.common.models import GameRating, ConsoleRating
+
+
+class Command(BaseCommand):
+    help = ('Rebuilds the stored rating_sum / rating_count / rating_avg of all games and consoles from the ratings. '
+            'Run it after bulk imports or raw updates that bypass the rating signals.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            for rating_model in (GameRating, ConsoleRating):
+                updated = self.rebuild(rating_model)
+                rated_model = rating_model._meta.get_field(rating_model.RATED_OBJECT_FIELD).related_model
+                self.stdout.write(self.style.SUCCESS(
+                    f'Rebuilt rating aggregates of {updated} {rated_model._meta.verbose_name_plural}'
+                ))
+
+    @staticmethod
+    def rebuild(rating_model):
+        rated_model = rating_model._meta.get_field(rating_model.RATED_OBJECT_FIELD).related_model
+        ratings = (rating_model.objects
+                   .filter(**{rating_model.RATED_OBJECT_FIELD: OuterRef('pk'), 'rating__isnull': False})
+                   .order_by()
+                   .values(rating_model.RATED_OBJECT_FIELD))
+
+        rating_sum = Coalesce(
+            Subquery(ratings.annotate(total=Sum('rating')).values('total')[:1], output_field=IntegerField()),
+            Value(0),
+        )
+        rating_count = Coalesce(
+            Subquery(ratings.annotate(total=Count('pk')).values('total')[:1], output_field=IntegerField()),
+            Value(0),
+        )
+
+        # one set-based UPDATE per table, no matter how many rows
+        return rated_model.objects.update(
+            rating_sum=rating_sum,
+            rating_count=rating_count,
+            rating_avg=Coalesce(
+                Cast(rating_sum, FloatField()) / NullIf(rating_count, 0),
+                Value(0.0),
+                output_field=FloatField(),
+            ),
+        )
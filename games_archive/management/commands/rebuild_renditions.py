@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+
+from games_archive.accounts.models import GamesArchiveUser
+from games_archive.common.image_jobs import enqueue_image_job
+from games_archive.common.models import ImageJob
+from games_archive.consoles.models import Console, Supplier
+from games_archive.games.models import Game, Screenshot
+from games_archive.renditions import create_renditions, ensure_renditions, image_files, get_rendition_format, \
+    get_rendition_sizes
+
+# the models with uploaded images
+IMAGE_MODELS = [Game, Console, Supplier, Screenshot, GamesArchiveUser]
+
+
+class Command(BaseCommand):
+    help = ('Renders the missing image renditions (the small JPEG / WebP variants the templates link) of all uploaded '
+            'images and reports the bytes they save. --force renders all of them again, e.g. after changing '
+            'IMAGE_RENDITION_QUALITY. --queue leaves the missing ones to the process_image_jobs worker.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true')
+        parser.add_argument('--queue', action='store_true',
+                            help='Queue jobs for the missing renditions, behind the jobs of the new uploads')
+
+    def handle(self, *args, **options):
+        image_format = get_rendition_format()
+        source_bytes = 0
+        rendition_bytes = dict.fromkeys(get_rendition_sizes(), 0)
+        rendered = failed = queued = 0
+        seen = set()
+
+        for model in IMAGE_MODELS:
+            for instance in model.objects.iterator():
+                for image in image_files(instance):
+                    if not image.name or image.name in seen:
+                        continue
+                    seen.add(image.name)
+
+                    if options['queue']:
+                        queued += enqueue_image_job(image, instance, ImageJob.PRIORITY_BACKFILL) is not None
+                        continue
+                    if options['force']:
+                        manifest = create_renditions(image.name, image.storage) or {}
+                    else:
+                        manifest = ensure_renditions(image)
+                    if not manifest:
+                        failed += 1
+                        continue
+
+                    rendered += 1
+                    source_bytes += image.storage.size(image.name)
+                    for size, variants in manifest['renditions'].items():
+                        if size in rendition_bytes:
+                            rendition_bytes[size] += variants[image_format]['bytes']
+
+        if options['queue']:
+            self.stdout.write(self.style.SUCCESS(f'Queued the renditions of {queued} images'))
+            return
+
+        self.stdout.write(f'Uploaded images: {source_bytes // 1024} KB')
+        for size, size_bytes in rendition_bytes.items():
+            self.stdout.write(f'{size} {image_format} renditions: {size_bytes // 1024} KB')
+        self.stdout.write(self.style.SUCCESS(f'Renditions of {rendered} images, {failed} could not be read'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from games_archive.games.models import Game
+from games_archive.games.search import is_full_text_search_supported, update_game_search_vectors
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the stored full text search vectors of all games (PostgreSQL only)'
+
+    def handle(self, *args, **options):
+        if not is_full_text_search_supported(Game):
+            self.stdout.write(self.style.WARNING('Full text search is not supported by the database, nothing to do.'))
+            return
+
+        updated = update_game_search_vectors(Game.objects.all())
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt search vectors of {updated} games'))
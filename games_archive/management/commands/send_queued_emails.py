@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from games_archive.accounts.outbox import send_queued_emails, get_batch_size
+
+
+class Command(BaseCommand):
+    help = ('Sends the emails of the outbox in batches, each over one connection of the email backend. A failed email '
+            'is retried with an exponential backoff. Run it with --loop as a worker next to the web server.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Emails sent over one connection, EMAIL_OUTBOX_BATCH_SIZE by default')
+        parser.add_argument('--loop', action='store_true', help='Keep polling the outbox')
+        parser.add_argument('--sleep', type=float, default=5, help='Seconds between the polls of an empty outbox')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size'] or get_batch_size()
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = send_queued_emails(batch_size)
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                self.stdout.write(f'Sent {sent} emails, {failed} failed')
+
+            # a full batch means more emails may be due right away
+            if sent + failed < batch_size:
+                if not options['loop']:
+                    break
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f'Sent {total_sent} emails, {total_failed} failed'))
@@ -0,0 +1,184 @@
+import hashlib
+import json
+from io import BytesIO
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import models
+
+# the variants of an uploaded image are stored under renditions/<image name>/, with a manifest.json listing them -
+# the uploads are queued for them, see games_archive.common.image_jobs
+RENDITIONS_DIR = 'renditions'
+MANIFEST_FILE_NAME = 'manifest.json'
+
+# Pillow format and file extension of each variant format
+RENDITION_FORMATS = {
+    'webp': ('WEBP', 'webp'),
+    'jpeg': ('JPEG', 'jpg'),
+}
+
+# seconds before an image that could not be rendered (missing, not an image) is tried again
+RENDITION_FAILURE_TIMEOUT = 3600
+
+# seconds the pages remember that an image has no manifest yet, instead of opening the file on every render - the
+# worker clears it when the renditions are stored
+MANIFEST_MISSING_TIMEOUT = 30
+
+
+def get_rendition_sizes():
+    # name of the variant: the longest side in pixels
+    return getattr(settings, 'IMAGE_RENDITION_SIZES', {'thumb': 160, 'small': 320, 'medium': 800})
+
+
+def get_rendition_format():
+    return getattr(settings, 'IMAGE_RENDITION_FORMAT', 'webp')
+
+
+def get_rendition_quality():
+    return getattr(settings, 'IMAGE_RENDITION_QUALITY', 80)
+
+
+def rendition_dir(name):
+    return f'{RENDITIONS_DIR}/{name}'
+
+
+def manifest_name(name):
+    return f'{rendition_dir(name)}/{MANIFEST_FILE_NAME}'
+
+
+def manifest_cache_key(name):
+    # the image names may have characters memcached does not accept in keys
+    return f'rendition-manifest:{hashlib.md5(name.encode()).hexdigest()}'
+
+
+def manifest_missing_cache_key(name):
+    return f'rendition-manifest-missing:{hashlib.md5(name.encode()).hexdigest()}'
+
+
+def convert_for_format(image, pil_format):
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    if pil_format == 'JPEG' and has_alpha:
+        # no transparency in JPEG, the transparent parts become white
+        image = image.convert('RGBA')
+        flattened = Image.new('RGB', image.size, 'white')
+        flattened.paste(image, mask=image.getchannel('A'))
+        return flattened
+    return image.convert('RGBA' if has_alpha and pil_format != 'JPEG' else 'RGB')
+
+
+def encode(image, pil_format, quality):
+    buffer = BytesIO()
+    if pil_format == 'JPEG':
+        image.save(buffer, pil_format, quality=quality, optimize=True, progressive=True)
+    else:
+        image.save(buffer, pil_format, quality=quality)
+    return buffer.getvalue()
+
+
+def save_replacing(storage, name, content):
+    # the manifest keeps its name, the storage would store a second one under a new name
+    if storage.exists(name):
+        storage.delete(name)
+    return storage.save(name, ContentFile(content))
+
+
+def create_renditions(name, storage=None):
+    """
+    Renders the variants of IMAGE_RENDITION_SIZES in every format of RENDITION_FORMATS from the stored image (never
+    upscaled) and saves them with their manifest. Returns the manifest, or None when the image can not be read.
+    """
+    storage = storage or default_storage
+    try:
+        with storage.open(name) as source:
+            image = Image.open(source)
+            image.load()
+            # the phone pictures are often stored sideways, with their orientation in EXIF
+            image = ImageOps.exif_transpose(image)
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError):
+        return None
+
+    quality = get_rendition_quality()
+    manifest = {'source': name, 'width': image.width, 'height': image.height, 'renditions': {}}
+    for size_name, longest_side in get_rendition_sizes().items():
+        variant = image.copy()
+        variant.thumbnail((longest_side, longest_side), Image.Resampling.LANCZOS)
+        manifest['renditions'][size_name] = {}
+        for format_name, (pil_format, extension) in RENDITION_FORMATS.items():
+            content = encode(convert_for_format(variant, pil_format), pil_format, quality)
+            stored_name = save_replacing(storage, f'{rendition_dir(name)}/{size_name}.{extension}', content)
+            manifest['renditions'][size_name][format_name] = {
+                'name': stored_name,
+                'width': variant.width,
+                'height': variant.height,
+                'bytes': len(content),
+            }
+
+    save_replacing(storage, manifest_name(name), json.dumps(manifest).encode())
+    cache.set(manifest_cache_key(name), manifest, None)
+    cache.delete(manifest_missing_cache_key(name))
+    return manifest
+
+
+def get_manifest(name, storage=None, create=True):
+    """The manifest of the image's renditions - from the cache, the storage or rendered now. {} when it failed."""
+    storage = storage or default_storage
+    key, missing_key = manifest_cache_key(name), manifest_missing_cache_key(name)
+    cached = cache.get_many([key, missing_key])
+    if cached.get(key) is not None:
+        return cached[key]
+    if not create and cached.get(missing_key):
+        return {}
+
+    try:
+        with storage.open(manifest_name(name)) as manifest_file:
+            manifest = json.load(manifest_file)
+    except (OSError, ValueError):
+        manifest = create_renditions(name, storage) if create else None
+
+    if manifest is None:
+        if create:
+            cache.set(key, {}, RENDITION_FAILURE_TIMEOUT)
+        else:
+            cache.set(missing_key, True, MANIFEST_MISSING_TIMEOUT)
+        return {}
+    cache.set(key, manifest, None)
+    return manifest
+
+
+def image_files(instance, field_names=None):
+    # the ImageField files of a model instance, only of field_names when given
+    return [
+        getattr(instance, field.name) for field in instance._meta.fields
+        if isinstance(field, models.ImageField) and (field_names is None or field.name in field_names)
+    ]
+
+
+def ensure_renditions(image):
+    """Renders the variants of an ImageField file unless its manifest lists all of IMAGE_RENDITION_SIZES."""
+    if not image or not image.name:
+        return {}
+    manifest = get_manifest(image.name, image.storage)
+    if manifest and set(get_rendition_sizes()) - set(manifest['renditions']):
+        manifest = create_renditions(image.name, image.storage) or {}
+    return manifest
+
+
+def is_rendered(image):
+    return bool(image and image.name and get_manifest(image.name, image.storage, create=False))
+
+
+def rendition_url(image, size, image_format=None):
+    """
+    URL of the variant of an ImageField file. The variants are rendered by the image job worker - until they are
+    ready, or when the image can not be rendered, it is the URL of the upload.
+    """
+    if not image or not image.name:
+        return ''
+    manifest = get_manifest(image.name, image.storage, create=False)
+    variant = manifest.get('renditions', {}).get(size, {}).get(image_format or get_rendition_format())
+    if variant is None:
+        return image.url
+    return image.storage.url(variant['name'])
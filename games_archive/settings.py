@@ -30,6 +30,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     'games_archive.games',
     'games_archive.consoles',
@@ -41,6 +42,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'games_archive.db_routers.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -63,6 +65,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'games_archive.common.context_processors.card_cache',
             ],
         },
     },
@@ -74,6 +77,18 @@ WSGI_APPLICATION = 'games_archive.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# seconds a connection is reused by the next requests of the worker, 0 closes it after every request and None
+# never closes it. The health check tests a reused connection once per request before the first query.
+DB_CONN_MAX_AGE = os.environ.get('DB_CONN_MAX_AGE', '60')
+DB_CONN_HEALTH_CHECKS = bool(int(os.environ.get('DB_CONN_HEALTH_CHECKS', 1)))
+
+# DB_POOL=1 uses a psycopg 3 connection pool per worker process instead of the persistent connections, it needs
+# psycopg[pool] instead of psycopg2. Every gunicorn worker has its own pool, so size it per worker: a sync worker
+# serves one request at a time and needs DB_POOL_MAX_SIZE=1-2, a gthread worker about its --threads. Keep
+# workers * DB_POOL_MAX_SIZE (plus the management commands) below the max_connections of PostgreSQL.
+# Compare the modes with `manage.py benchmark_db_connections`.
+DB_POOL = bool(int(os.environ.get('DB_POOL', 0)))
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -82,6 +97,61 @@ DATABASES = {
         "PASSWORD": os.environ.get('POSTGRES_PASSWORD', None),
         "HOST": os.environ.get('DB_HOST', None),
         "PORT": os.environ.get('DB_PORT', "5432"),
+        # a pool hands out its connections per request, it can not be combined with the persistent connections
+        "CONN_MAX_AGE": 0 if DB_POOL else (None if DB_CONN_MAX_AGE == 'None' else int(DB_CONN_MAX_AGE)),
+        "CONN_HEALTH_CHECKS": DB_CONN_HEALTH_CHECKS and not DB_POOL,
+    }
+}
+
+if DB_POOL:
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.environ.get('DB_POOL_MIN_SIZE', 1)),
+            "max_size": int(os.environ.get('DB_POOL_MAX_SIZE', 4)),
+            # seconds a request waits for a free connection before it fails
+            "timeout": float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        },
+    }
+
+# read replicas of the default database, e.g. "replica-1.internal replica-2.internal", with its name and credentials.
+# The read only requests read from them, see games_archive.db_routers
+DB_REPLICA_HOSTS = [host for host in os.environ.get('DB_REPLICA_HOSTS', '').split(' ') if host]
+DATABASE_REPLICAS = []
+for index, host in enumerate(DB_REPLICA_HOSTS, start=1):
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        "HOST": host,
+        "PORT": os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        # the tests read the test database of default through the replicas
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f'replica_{index}')
+
+DATABASE_ROUTERS = ['games_archive.db_routers.ReplicaRouter']
+# seconds a browser reads from the primary after it wrote something, longer than the usual replication lag
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 15))
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/ref/settings/#caches
+
+# CACHE_BACKEND is one of these names or a dotted path of a cache backend class. locmem is per-process, use a shared
+# backend with more than one worker process. memcached needs pymemcache, redis needs redis-py.
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'memcached': 'django.core.cache.backends.memcached.PyMemcacheCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS.get(
+            os.environ.get('CACHE_BACKEND', 'locmem'), os.environ.get('CACHE_BACKEND', 'locmem')
+        ),
+        # e.g. /var/tmp/games_archive_cache, 127.0.0.1:11211 or redis://127.0.0.1:6379/1
+        "LOCATION": os.environ.get('CACHE_LOCATION', ''),
+        "TIMEOUT": int(os.environ.get('CACHE_TIMEOUT', 300)),
+        "KEY_PREFIX": os.environ.get('CACHE_KEY_PREFIX', ''),
     }
 }
 
@@ -137,6 +207,73 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media/')
 # URL to access media files
 MEDIA_URL = '/media/'
 
+STORAGES = {
+    "default": {
+        # stores the uploads once per content and caches the exists() checks of the image properties, see
+        # games_archive.custom_storages
+        "BACKEND": "games_archive.custom_storages.ContentAddressedFileSystemStorage",
+    },
+    "staticfiles": {
+        # content hashed file names after collectstatic, see games_archive.custom_storages
+        "BACKEND": "games_archive.custom_storages.HashedStaticFilesStorage",
+    },
+}
+
+# the upload_to prefixes of the uploads stored by content, under media/content/
+CONTENT_ADDRESSED_UPLOAD_DIRS = ['game_covers/', 'game_screenshots/', 'console_covers/', 'profile-pictures/',
+                                 'suppliers_logos/']
+
+FILE_EXISTENCE_CACHE_SIZE = int(os.environ.get('FILE_EXISTENCE_CACHE_SIZE', 4096))
+FILE_EXISTENCE_CACHE_TIMEOUT = int(os.environ.get('FILE_EXISTENCE_CACHE_TIMEOUT', 60))
+# alias of a shared cache from CACHES (e.g. memcached / redis) used as a second tier, None for per-process only
+FILE_EXISTENCE_SHARED_CACHE = os.environ.get('FILE_EXISTENCE_SHARED_CACHE', None)
+
+# variants of the uploaded images the templates link instead of the full size upload, see games_archive.renditions -
+# name: longest side in pixels, and the format they link (webp or jpeg, both are rendered)
+IMAGE_RENDITION_SIZES = {'thumb': 160, 'small': 320, 'medium': 800}
+IMAGE_RENDITION_FORMAT = os.environ.get('IMAGE_RENDITION_FORMAT', 'webp')
+IMAGE_RENDITION_QUALITY = int(os.environ.get('IMAGE_RENDITION_QUALITY', 80))
+
+# the process_image_jobs worker renders the renditions in a pool of IMAGE_WORKER_PROCESSES processes, a failed job is
+# retried after IMAGE_JOB_RETRY_DELAY seconds (doubled on each attempt), a job running longer than IMAGE_JOB_TIMEOUT
+# seconds belongs to a dead worker and is picked again, see games_archive.common.image_jobs
+IMAGE_WORKER_PROCESSES = int(os.environ.get('IMAGE_WORKER_PROCESSES', 2))
+IMAGE_JOB_MAX_ATTEMPTS = int(os.environ.get('IMAGE_JOB_MAX_ATTEMPTS', 3))
+IMAGE_JOB_RETRY_DELAY = int(os.environ.get('IMAGE_JOB_RETRY_DELAY', 30))
+IMAGE_JOB_TIMEOUT = int(os.environ.get('IMAGE_JOB_TIMEOUT', 600))
+
+# the screenshots uploaded in parts (see games_archive.games.uploads) are assembled in SCREENSHOT_UPLOAD_TEMP_DIR - on
+# the file system of MEDIA_ROOT the finished files are moved, not copied. The parts are at most
+# SCREENSHOT_UPLOAD_CHUNK_SIZE bytes, an upload without new parts for SCREENSHOT_UPLOAD_EXPIRY seconds is purged
+SCREENSHOT_UPLOAD_TEMP_DIR = os.environ.get('SCREENSHOT_UPLOAD_TEMP_DIR', os.path.join(BASE_DIR, 'upload-parts/'))
+SCREENSHOT_UPLOAD_CHUNK_SIZE = int(os.environ.get('SCREENSHOT_UPLOAD_CHUNK_SIZE', 1024 * 1024))
+SCREENSHOT_UPLOAD_EXPIRY = int(os.environ.get('SCREENSHOT_UPLOAD_EXPIRY', 24 * 3600))
+
+# differing bits of the dHashes of two pictures still taken for the same picture - a game does not take a screenshot
+# that close to one of its screenshots, see games_archive.image_hashes
+IMAGE_DUPLICATE_MAX_DISTANCE = int(os.environ.get('IMAGE_DUPLICATE_MAX_DISTANCE', 6))
+
+# ranking of the popular games lists: 'bayesian' (average pulled towards the prior by few votes) or 'average'
+RATING_RANKING_FORMULA = os.environ.get('RATING_RANKING_FORMULA', 'bayesian')
+RATING_RANKING_PRIOR_MEAN = float(os.environ.get('RATING_RANKING_PRIOR_MEAN', 3))
+RATING_RANKING_PRIOR_WEIGHT = float(os.environ.get('RATING_RANKING_PRIOR_WEIGHT', 5))
+
+# games per leaderboard and the ratings a game needs to be ranked, see games_archive.common.leaderboards
+LEADERBOARD_SIZE = int(os.environ.get('LEADERBOARD_SIZE', 100))
+LEADERBOARD_MIN_RATINGS = int(os.environ.get('LEADERBOARD_MIN_RATINGS', 1))
+
+# seconds the rendered game card fragments are cached, see games_archive.common.card_cache
+CARD_CACHE_TIMEOUT = int(os.environ.get('CARD_CACHE_TIMEOUT', 3600))
+
+# seconds the anonymous pages of the read views are cached, 0 turns it off, see games_archive.common.page_cache
+PAGE_CACHE_TIMEOUT = int(os.environ.get('PAGE_CACHE_TIMEOUT', 60))
+
+# part of the ETags of the pages, so a new release does not get 304s for pages of the old templates
+RELEASE_VERSION = os.environ.get('RELEASE_VERSION', '')
+# the ETags of the catalog pages are made of version stamps in the default cache - they are sent only when the cache
+# is shared by all processes (e.g. CACHE_BACKEND=redis), unless CONDITIONAL_GET is set to 1 or 0
+CONDITIONAL_GET = {'1': True, '0': False}.get(os.environ.get('CONDITIONAL_GET', ''))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -150,3 +287,10 @@ EMAIL_USE_SSL = bool(int(os.environ.get('EMAIL_USE_SSL', 0)))
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', '')
+
+# the emails wait in the outbox table until the send_queued_emails worker sends them, a failed one is retried after
+# EMAIL_OUTBOX_RETRY_DELAY seconds, doubled on each attempt up to EMAIL_OUTBOX_MAX_RETRY_DELAY
+EMAIL_OUTBOX_BATCH_SIZE = int(os.environ.get('EMAIL_OUTBOX_BATCH_SIZE', 50))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('EMAIL_OUTBOX_MAX_ATTEMPTS', 6))
+EMAIL_OUTBOX_RETRY_DELAY = int(os.environ.get('EMAIL_OUTBOX_RETRY_DELAY', 60))
+EMAIL_OUTBOX_MAX_RETRY_DELAY = int(os.environ.get('EMAIL_OUTBOX_MAX_RETRY_DELAY', 3600))
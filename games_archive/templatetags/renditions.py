@@ -0,0 +1,11 @@
+from django import template
+
+from games_archive import renditions
+
+register = template.Library()
+
+
+@register.simple_tag
+def rendition_url(image, size, image_format=None):
+    # {% rendition_url console.logo 'small' %} - the URL of a variant of an uploaded image, see games_archive.renditions
+    return renditions.rendition_url(image, size, image_format)
@@ -110,7 +110,9 @@ function handleImageUpload(input) {
         const originalName = input.name;
         const originalRequired = input.hasAttribute('required');
         const originalAccept = input.accept;
+        const originalMultiple = input.multiple;
         const originalId = input.id;
+        const files = Array.from(input.files);
 
         reader.onload = function(e) {
             wrapper.innerHTML = `
@@ -128,6 +130,7 @@ function handleImageUpload(input) {
                        onchange="handleImageUpload(this)"
                        accept="${originalAccept}"
                        ${originalRequired ? 'required' : ''}
+                       ${originalMultiple ? 'multiple' : ''}
                        style="display: none;">
                 <input type="checkbox"
                        name="${originalName}-clear"
@@ -139,9 +142,9 @@ function handleImageUpload(input) {
             // Re-attach the file to the new input
             const newInput = document.getElementById(originalId);
 
-            // Create a new FileList-like object
+            // Create a new FileList-like object, with all of the selected files - the first one is previewed
             const dataTransfer = new DataTransfer();
-            dataTransfer.items.add(file);
+            files.forEach(selected => dataTransfer.items.add(selected));
             newInput.files = dataTransfer.files;
         };
 
@@ -157,6 +160,7 @@ function clearImage(inputId) {
     const originalName = originalInput.name;
     const originalRequired = originalInput.hasAttribute('required');
     const originalAccept = originalInput.accept;
+    const originalMultiple = originalInput.multiple;
 
     wrapper.innerHTML = `
         <div class="upload-container">
@@ -169,6 +173,7 @@ function clearImage(inputId) {
                onchange="handleImageUpload(this)"
                accept="${originalAccept}"
                ${originalRequired ? 'required' : ''}
+               ${originalMultiple ? 'multiple' : ''}
                style="display: none;">
         <input type="checkbox"
                name="${originalName}-clear"
@@ -0,0 +1,111 @@
+
+// Star rating widgets - partials/game_rating_stars.html and partials/console_rating_stars.html
+// One copy of the code for the whole page: the clicks are handled by a single delegated listener and every widget
+// carries its urls and the current user's rating in data attributes.
+
+(function () {
+    function updateStars(starRating, rating) {
+        starRating.querySelectorAll('.star').forEach(star => {
+            star.classList.toggle('active', parseInt(star.dataset.rating) <= rating);
+        });
+    }
+
+    function showMessage(starRating, message, type) {
+        const ratingMessage = starRating.parentElement.querySelector('.rating-message');
+        if (!ratingMessage) {
+            return;
+        }
+        ratingMessage.textContent = message;
+        ratingMessage.className = `rating-message show ${type}`;
+        setTimeout(() => {
+            ratingMessage.classList.remove('show');
+        }, 3000);
+    }
+
+    function getCookie(name) {
+        let cookieValue = null;
+        if (document.cookie && document.cookie !== '') {
+            const cookies = document.cookie.split(';');
+            for (let i = 0; i < cookies.length; i++) {
+                const cookie = cookies[i].trim();
+                if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                    cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                    break;
+                }
+            }
+        }
+        return cookieValue;
+    }
+
+    // Fetch the user ratings of the widgets rendered without one, a single request per endpoint
+    async function fetchUserRatings(url, starRatings) {
+        const ids = [...new Set(starRatings.map(starRating => starRating.dataset.objectId))];
+        try {
+            const response = await fetch(`${url}?ids=${ids.join(',')}`);
+            if (response.ok) {
+                const data = await response.json();
+                starRatings.forEach(starRating => {
+                    const rating = data.ratings[starRating.dataset.objectId];
+                    if (rating) {
+                        updateStars(starRating, rating);
+                    }
+                });
+            }
+        } catch (error) {
+            console.error('Error fetching user ratings:', error);
+        }
+    }
+
+    function initRatingWidgets(root) {
+        const pending = {};
+
+        root.querySelectorAll('.star-rating[data-rate-url]').forEach(starRating => {
+            // the views embed the user's rating, 0 means not rated yet
+            if (starRating.dataset.userRating !== undefined) {
+                updateStars(starRating, parseInt(starRating.dataset.userRating));
+            } else {
+                const url = starRating.dataset.userRatingsUrl;
+                (pending[url] = pending[url] || []).push(starRating);
+            }
+        });
+
+        Object.entries(pending).forEach(([url, starRatings]) => fetchUserRatings(url, starRatings));
+    }
+
+    // Handle star click
+    document.addEventListener('click', async function (event) {
+        const star = event.target.closest('.star-rating[data-rate-url] .star');
+        if (!star) {
+            return;
+        }
+
+        const starRating = star.closest('.star-rating');
+        const rating = star.dataset.rating;
+
+        try {
+            const response = await fetch(starRating.dataset.rateUrl, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-CSRFToken': getCookie('csrftoken')
+                },
+                body: JSON.stringify({rating: rating})
+            });
+
+            if (response.ok) {
+                const data = await response.json();
+                starRating.dataset.userRating = rating;
+                updateStars(starRating, rating);
+                showMessage(starRating, data.message, 'success');
+            } else {
+                showMessage(starRating, 'Error saving rating', 'error');
+            }
+        } catch (error) {
+            showMessage(starRating, 'Error saving rating', 'error');
+        }
+    });
+
+    document.addEventListener('DOMContentLoaded', function () {
+        initRatingWidgets(document);
+    });
+})();
@@ -0,0 +1,41 @@
+
+// Screenshot gallery of game_detail.html - a new screenshot is shown at its upload size until the image job worker
+// rendered its renditions, then the rendition is swapped in. The status comes from the gallery's data-status-url.
+
+(function () {
+    const POLL_INTERVAL = 2000;
+    const MAX_POLLS = 30;
+    const WAITING_STATUSES = ['queued', 'running'];
+
+    async function pollRenditions(gallery, polls) {
+        const pending = gallery.querySelectorAll('img[data-rendition-pending]');
+        if (!pending.length || polls >= MAX_POLLS) {
+            return;
+        }
+        try {
+            const response = await fetch(gallery.dataset.statusUrl);
+            if (response.ok) {
+                const data = await response.json();
+                pending.forEach(image => {
+                    const screenshot = data.screenshots[image.dataset.screenshotPk];
+                    if (!screenshot || !WAITING_STATUSES.includes(screenshot.status)) {
+                        // done - or failed / without a job, then the upload stays
+                        if (screenshot && screenshot.status === 'done') {
+                            image.src = screenshot.url;
+                        }
+                        image.removeAttribute('data-rendition-pending');
+                    }
+                });
+            }
+        } catch (error) {
+            console.error('Error fetching the screenshot renditions:', error);
+        }
+        setTimeout(() => pollRenditions(gallery, polls + 1), POLL_INTERVAL);
+    }
+
+    document.addEventListener('DOMContentLoaded', () => {
+        document.querySelectorAll('[data-status-url]').forEach(gallery => {
+            setTimeout(() => pollRenditions(gallery, 0), POLL_INTERVAL);
+        });
+    });
+})();
@@ -0,0 +1,169 @@
+// Screenshot form of game_detail.html - the selected pictures are sent in parts to the form's data-upload-url (see
+// games_archive.games.uploads), so neither the browser nor the server holds a whole batch in one request. A part cut
+// off by the network is sent again from the bytes the server received. Without fetch the form is posted as before.
+
+(function () {
+    const MAX_RETRIES = 5;
+    const RETRY_DELAY = 1000;
+
+    function getCookie(name) {
+        let cookieValue = null;
+        if (document.cookie && document.cookie !== '') {
+            const cookies = document.cookie.split(';');
+            for (let i = 0; i < cookies.length; i++) {
+                const cookie = cookies[i].trim();
+                if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                    cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                    break;
+                }
+            }
+        }
+        return cookieValue;
+    }
+
+    function sleep(milliseconds) {
+        return new Promise(resolve => setTimeout(resolve, milliseconds));
+    }
+
+    async function send(url, options) {
+        const response = await fetch(url, {
+            ...options,
+            credentials: 'same-origin',
+            headers: {'X-CSRFToken': getCookie('csrftoken'), ...(options.headers || {})},
+        });
+        const data = await response.json().catch(() => ({}));
+        return {response, data};
+    }
+
+    function showErrors(form, errors) {
+        let container = form.parentElement.querySelector('.upload-messages');
+        if (!container) {
+            container = document.createElement('div');
+            container.className = 'messages error upload-messages';
+            form.after(container);
+        }
+        container.innerHTML = '';
+        errors.forEach(error => {
+            const message = document.createElement('div');
+            message.className = 'message error';
+            message.textContent = error;
+            container.appendChild(message);
+        });
+    }
+
+    async function startUpload(form, file, session) {
+        const body = new FormData();
+        body.append('name', file.name);
+        body.append('size', file.size);
+        body.append('content_type', file.type);
+        if (session) {
+            body.append('session', session);
+        }
+        const {response, data} = await send(form.dataset.uploadUrl, {method: 'POST', body});
+        if (!response.ok) {
+            throw new Error(`${file.name}: ${data.error || response.statusText}`);
+        }
+        return data;
+    }
+
+    async function sendParts(file, upload, onProgress) {
+        let received = upload.received;
+        let retries = 0;
+        while (received < file.size) {
+            let result = null;
+            try {
+                result = await send(`${upload.url}?offset=${received}`, {
+                    method: 'PUT',
+                    body: file.slice(received, received + upload.chunk_size),
+                    headers: {'Content-Type': 'application/octet-stream'},
+                });
+            } catch (error) {
+                // the network failed, retried below
+            }
+
+            // 409 - the server has a different number of bytes, the upload continues after them
+            if (result && (result.response.ok || result.response.status === 409)) {
+                received = result.data.received;
+                retries = 0;
+                onProgress(received);
+                continue;
+            }
+            if (result && result.response.status < 500) {
+                throw new Error(`${file.name}: ${result.data.error || result.response.statusText}`);
+            }
+            if (++retries > MAX_RETRIES) {
+                throw new Error(`${file.name}: the upload was interrupted, please try again`);
+            }
+            await sleep(RETRY_DELAY * retries);
+            try {
+                // a part cut short keeps the bytes that arrived
+                received = (await send(upload.url, {method: 'GET'})).data.received ?? received;
+            } catch (error) {
+                // still offline, the next attempt tells
+            }
+        }
+    }
+
+    async function uploadPictures(form, files) {
+        const button = form.querySelector('button[type="submit"]');
+        const buttonText = button.textContent;
+        const total = files.reduce((sum, file) => sum + file.size, 0);
+        const done = new Array(files.length).fill(0);
+        const showProgress = () => {
+            const sent = done.reduce((sum, bytes) => sum + bytes, 0);
+            button.textContent = `Uploading ${Math.floor(sent * 100 / Math.max(total, 1))}%`;
+        };
+
+        button.disabled = true;
+        showProgress();
+        try {
+            let session = null;
+            for (let i = 0; i < files.length; i++) {
+                const upload = await startUpload(form, files[i], session);
+                session = upload.session;
+                await sendParts(files[i], upload, received => {
+                    done[i] = received;
+                    showProgress();
+                });
+            }
+
+            const {response, data} = await send(`${form.dataset.uploadUrl}${session}/finish/`, {method: 'POST'});
+            if (data.errors && Object.keys(data.errors).length) {
+                showErrors(form, Object.values(data.errors).flat());
+            }
+            if (response.ok) {
+                // the gallery and the message of the upload are rendered by the page
+                window.location.hash = data.redirect_url;
+                window.location.reload();
+            } else if (!data.errors) {
+                showErrors(form, [data.error || response.statusText]);
+            }
+        } catch (error) {
+            showErrors(form, [error.message]);
+        } finally {
+            button.disabled = false;
+            button.textContent = buttonText;
+        }
+    }
+
+    document.addEventListener('DOMContentLoaded', () => {
+        if (!window.fetch || !window.FormData) {
+            return;
+        }
+        document.querySelectorAll('form[data-upload-url]').forEach(form => {
+            const input = form.querySelector('input[type="file"]');
+            if (input) {
+                input.multiple = true;
+            }
+            form.addEventListener('submit', event => {
+                const files = Array.from(form.querySelector('input[type="file"]')?.files || []);
+                if (!files.length) {
+                    // the form reports the missing file
+                    return;
+                }
+                event.preventDefault();
+                uploadPictures(form, files);
+            });
+        });
+    });
+})();
@@ -0,0 +1,107 @@
+from datetime import timedelta
+from io import StringIO
+from smtplib import SMTPException
+from unittest import mock
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from games_archive.accounts.models import GamesArchiveUser, OutgoingEmail
+from games_archive.accounts.outbox import send_queued_emails, enqueue_email
+
+
+@override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=3, EMAIL_OUTBOX_RETRY_DELAY=60, EMAIL_OUTBOX_MAX_RETRY_DELAY=90)
+class EmailOutboxTests(TestCase):
+
+    def enqueue(self, count):
+        return [enqueue_email(f'Subject {i}', 'Body', f'user{i}@example.com') for i in range(count)]
+
+    def test_registration_queues_the_greeting_without_sending_it(self):
+        self.client.post(reverse('register'), {
+            'username': 'testuser',
+            'email': 'test@example.com',
+            'password1': 'TestPass123!',
+            'password2': 'TestPass123!',
+        })
+
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.to, 'test@example.com')
+        self.assertEqual(email.status, OutgoingEmail.STATUS_PENDING)
+
+        self.assertEqual(send_queued_emails(), (1, 0))
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, 'Registration greetings')
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutgoingEmail.STATUS_SENT)
+        self.assertIsNotNone(email.sent_at)
+
+    def test_sent_email_is_not_sent_again(self):
+        GamesArchiveUser.objects.create_user(username='testuser', email='test@example.com')
+
+        send_queued_emails()
+        self.assertEqual(send_queued_emails(), (0, 0))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_batch_is_sent_over_one_connection(self):
+        self.enqueue(3)
+
+        with mock.patch.object(EmailBackend, 'open', autospec=True, return_value=True) as open_connection:
+            self.assertEqual(send_queued_emails(batch_size=2), (2, 0))
+
+        self.assertEqual(open_connection.call_count, 1)
+        self.assertEqual(OutgoingEmail.objects.filter(status=OutgoingEmail.STATUS_PENDING).count(), 1)
+
+    def test_failed_email_is_retried_with_backoff_then_given_up(self):
+        email, = self.enqueue(1)
+
+        with mock.patch.object(EmailBackend, 'send_messages', side_effect=SMTPException('timed out')):
+            self.assertEqual(send_queued_emails(), (0, 1))
+            email.refresh_from_db()
+            self.assertEqual(email.status, OutgoingEmail.STATUS_PENDING)
+            self.assertEqual(email.attempts, 1)
+            self.assertIn('timed out', email.last_error)
+            self.assertAlmostEqual(email.next_attempt_at, timezone.now() + timedelta(seconds=60),
+                                   delta=timedelta(seconds=5))
+
+            # not due before the backoff
+            self.assertEqual(send_queued_emails(), (0, 0))
+
+            OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+            send_queued_emails()
+            email.refresh_from_db()
+            # doubled, but capped at EMAIL_OUTBOX_MAX_RETRY_DELAY
+            self.assertAlmostEqual(email.next_attempt_at, timezone.now() + timedelta(seconds=90),
+                                   delta=timedelta(seconds=5))
+
+            OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+            send_queued_emails()
+            email.refresh_from_db()
+            self.assertEqual(email.status, OutgoingEmail.STATUS_FAILED)
+            self.assertEqual(email.attempts, 3)
+
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_unreachable_server_fails_the_whole_batch(self):
+        self.enqueue(2)
+
+        with mock.patch.object(EmailBackend, 'open', side_effect=ConnectionRefusedError('refused')):
+            self.assertEqual(send_queued_emails(), (0, 2))
+
+        self.assertFalse(OutgoingEmail.objects.filter(attempts=0).exists())
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_command_drains_the_outbox_in_batches(self):
+        self.enqueue(5)
+        out = StringIO()
+
+        call_command('send_queued_emails', '--batch-size', '2', stdout=out)
+
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertIn('Sent 5 emails, 0 failed', out.getvalue())
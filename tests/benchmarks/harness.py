@@ -0,0 +1,70 @@
+import time
+from dataclasses import dataclass
+from unittest.mock import patch
+
+from django.db import connection
+from django.template.response import SimpleTemplateResponse
+from django.test.utils import CaptureQueriesContext
+
+
+@dataclass
+class ViewMeasurement:
+    name: str
+    status_code: int
+    queries: int
+    sql_ms: float
+    render_ms: float
+    total_ms: float
+    response_bytes: int
+
+    def __str__(self):
+        return (f'{self.name:<28} {self.status_code:>4} {self.queries:>8} {self.sql_ms:>9.1f} {self.render_ms:>10.1f} '
+                f'{self.total_ms:>9.1f} {self.response_bytes:>9}')
+
+
+REPORT_HEADER = f'{"view":<28} {"code":>4} {"queries":>8} {"sql ms":>9} {"render ms":>10} {"total ms":>9} {"bytes":>9}'
+
+
+@dataclass
+class ViewBudget:
+    """Upper limits of a view - None means not checked. Time budgets are loose, they only catch gross regressions."""
+    queries: int = None
+    total_ms: float = None
+    response_bytes: int = None
+
+    def violations(self, measurement):
+        return [
+            f'{measurement.name}: {field} {getattr(measurement, field)} over the budget of {limit}'
+            for field, limit in vars(self).items()
+            if limit is not None and getattr(measurement, field) > limit
+        ]
+
+
+def measure(client, name, method, url, **kwargs):
+    """Runs one request through the test client and measures its queries, SQL time, template render time and size."""
+    render_seconds = []
+    original_render = SimpleTemplateResponse.render
+
+    def timed_render(response):
+        # the lazy querysets of the templates run here too, so their SQL time is a part of the render time
+        started = time.perf_counter()
+        try:
+            return original_render(response)
+        finally:
+            render_seconds.append(time.perf_counter() - started)
+
+    with patch.object(SimpleTemplateResponse, 'render', timed_render), \
+            CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        response = getattr(client, method)(url, **kwargs)
+        total_seconds = time.perf_counter() - started
+
+    return ViewMeasurement(
+        name=name,
+        status_code=response.status_code,
+        queries=len(queries),
+        sql_ms=sum(float(query['time']) for query in queries) * 1000,
+        render_ms=sum(render_seconds) * 1000,
+        total_ms=total_seconds * 1000,
+        response_bytes=len(response.content),
+    )
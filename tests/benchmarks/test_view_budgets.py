@@ -0,0 +1,134 @@
+import json
+import os
+import sys
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Count
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from games_archive.accounts.models import GamesArchiveUser
+from games_archive.common.card_cache import bump_card_versions, CARD_VERSION_GAME, CARD_VERSION_USER, \
+    CARD_VERSION_CONSOLE
+from games_archive.common.page_cache import bump_page_versions, PAGE_SCOPE_ALL
+from games_archive.consoles.models import Console
+from games_archive.games.models import Game
+from tests.benchmarks.harness import ViewBudget, measure, REPORT_HEADER
+
+# set VIEW_BENCHMARK_REPORT=1 to print the measurements of all views
+PRINT_REPORT = bool(int(os.environ.get('VIEW_BENCHMARK_REPORT', 0)))
+# scales the time budgets, e.g. for slow CI machines
+TIME_BUDGET_FACTOR = float(os.environ.get('VIEW_BENCHMARK_TIME_FACTOR', 1))
+
+# the query budgets are the measured counts (the most of SQLite and PostgreSQL, cold or warm) plus one
+VIEW_BUDGETS = {
+    'home': ViewBudget(queries=6, total_ms=1000, response_bytes=160_000),
+    'game_list': ViewBudget(queries=6, total_ms=2000, response_bytes=100_000),
+    'game_list_search': ViewBudget(queries=6, total_ms=2000, response_bytes=100_000),
+    'game_detail': ViewBudget(queries=16, total_ms=2000, response_bytes=60_000),
+    'console_detail': ViewBudget(queries=14, total_ms=2000, response_bytes=60_000),
+    'profile_details': ViewBudget(queries=15, total_ms=2000, response_bytes=60_000),
+    'leaderboard': ViewBudget(queries=6, total_ms=2000, response_bytes=150_000),
+    'get_user_rating_to_game': ViewBudget(queries=5, total_ms=500, response_bytes=1_000),
+    'get_user_ratings_to_games': ViewBudget(queries=4, total_ms=500, response_bytes=2_000),
+    'rate_game': ViewBudget(queries=9, total_ms=500, response_bytes=2_000),
+}
+
+
+class ViewBudgetTests(TestCase):
+    """
+    Drives the main views through the test client on a generated catalog and fails when one of them goes over its
+    budget in VIEW_BUDGETS - query counts catch N+1 regressions, the sizes and the loose times catch gross ones.
+    """
+    measurements = []
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'generate_catalog', stdout=StringIO(), seed=10, users=40, suppliers=10, consoles=15, games=120,
+            game_ratings=1500, console_ratings=150, comments=400, reviews=40, screenshots=100,
+        )
+        cls.user = GamesArchiveUser.objects.annotate(games_count=Count('game')).order_by('-games_count').first()
+        cls.user.set_password('testpass123')
+        cls.user.save()
+
+        cls.game = Game.objects.annotate(ratings_count=Count('gamerating')).order_by('-ratings_count').first()
+        cls.console = Console.objects.annotate(games_count=Count('game')).order_by('-games_count').first()
+        cls.page_game_pks = list(Game.objects.values_list('pk', flat=True)[:10])
+
+    @classmethod
+    def tearDownClass(cls):
+        if PRINT_REPORT and cls.measurements:
+            sys.stderr.write('\n' + '\n'.join([REPORT_HEADER, *map(str, cls.measurements)]) + '\n')
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = Client()
+        self.client.login(username=self.user.username, password='testpass123')
+
+    @staticmethod
+    def expire_fragments():
+        # new stamps, like after the changes that bump them - the cards and pages are rendered again
+        bump_card_versions(CARD_VERSION_GAME, Game.objects.values_list('pk', flat=True))
+        bump_card_versions(CARD_VERSION_USER, GamesArchiveUser.objects.values_list('pk', flat=True))
+        bump_card_versions(CARD_VERSION_CONSOLE, Console.objects.values_list('pk', flat=True))
+        bump_page_versions([PAGE_SCOPE_ALL])
+
+    def assert_within_budget(self, name, method, url, **kwargs):
+        # the first request fills the per-process caches (sessions, supplier index), then the view is measured with
+        # cold card fragments - an N+1 of the cards shows there - and with warm ones
+        getattr(self.client, method)(url, **kwargs)
+        self.expire_fragments()
+        measurements = [
+            measure(self.client, f'{name} (cold)', method, url, **kwargs),
+            measure(self.client, name, method, url, **kwargs),
+        ]
+        self.measurements.extend(measurements)
+
+        budget = VIEW_BUDGETS[name]
+        if budget.total_ms is not None:
+            budget = ViewBudget(budget.queries, budget.total_ms * TIME_BUDGET_FACTOR, budget.response_bytes)
+
+        for measurement in measurements:
+            self.assertLess(measurement.status_code, 400, measurement)
+            self.assertFalse(budget.violations(measurement))
+        return measurements
+
+    def test_home_view(self):
+        self.assert_within_budget('home', 'get', reverse('home'))
+
+    def test_game_list_view(self):
+        self.assert_within_budget('game_list', 'get', reverse('game_list'))
+
+    def test_game_list_view_search(self):
+        self.assert_within_budget('game_list_search', 'get', reverse('game_list') + '?search=quest')
+
+    def test_game_detail_view(self):
+        self.assert_within_budget('game_detail', 'get', reverse('game_detail', kwargs={'pk': self.game.pk}))
+
+    def test_console_detail_view(self):
+        self.assert_within_budget('console_detail', 'get', reverse('console_detail', kwargs={'pk': self.console.pk}))
+
+    def test_user_detail_view(self):
+        self.assert_within_budget('profile_details', 'get', reverse('profile details', kwargs={'pk': self.user.pk}))
+
+    def test_leaderboard_view(self):
+        self.assert_within_budget('leaderboard', 'get', reverse('leaderboard'))
+
+    def test_user_rating_endpoint(self):
+        self.assert_within_budget(
+            'get_user_rating_to_game', 'get', reverse('get_user_rating_to_game', kwargs={'game_pk': self.game.pk})
+        )
+
+    def test_bulk_user_ratings_endpoint(self):
+        ids = ','.join(map(str, self.page_game_pks))
+        self.assert_within_budget(
+            'get_user_ratings_to_games', 'get', reverse('get_user_ratings_to_games') + f'?ids={ids}'
+        )
+
+    def test_rate_endpoint(self):
+        self.assert_within_budget(
+            'rate_game', 'post', reverse('rate_game', kwargs={'game_pk': self.game.pk}),
+            data=json.dumps({'rating': 4}), content_type='application/json',
+        )
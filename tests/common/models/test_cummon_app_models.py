@@ -301,3 +301,67 @@ class GameRatingTests(TestCase):
                 to_game=self.game,
                 from_user=self.user
             )
+
+
+class RatingAggregatesTests(TestCase):
+    def setUp(self):
+        self.user = GamesArchiveUser.objects.create_user(username='testuser', email='test@example.com')
+        self.user2 = GamesArchiveUser.objects.create_user(username='testuser2', email='test2@example.com')
+
+        self.game = Game.objects.create(title='Test Game', to_user=self.user)
+        self.console = Console.objects.create(name='Test Console', to_user=self.user)
+
+    def assert_aggregates(self, obj, rating_sum, rating_count, rating_avg):
+        obj.refresh_from_db()
+        self.assertEqual(obj.rating_sum, rating_sum)
+        self.assertEqual(obj.rating_count, rating_count)
+        self.assertAlmostEqual(obj.rating_avg, rating_avg)
+
+    def test_create_game_ratings_updates_aggregates(self):
+        GameRating.objects.create(rating=4, to_game=self.game, from_user=self.user)
+        GameRating.objects.create(rating=5, to_game=self.game, from_user=self.user2)
+
+        self.assert_aggregates(self.game, 9, 2, 4.5)
+
+    def test_update_game_rating_applies_only_the_difference(self):
+        rating = GameRating.objects.create(rating=4, to_game=self.game, from_user=self.user)
+        rating.save()
+
+        rating = GameRating.objects.get(pk=rating.pk)
+        rating.rating = 2
+        rating.save()
+
+        self.assert_aggregates(self.game, 2, 1, 2)
+
+    def test_update_or_create_game_rating_updates_aggregates(self):
+        GameRating.objects.update_or_create(from_user=self.user, to_game=self.game, defaults={'rating': 3})
+        GameRating.objects.update_or_create(from_user=self.user, to_game=self.game, defaults={'rating': 5})
+
+        self.assert_aggregates(self.game, 5, 1, 5)
+
+    def test_delete_game_rating_updates_aggregates(self):
+        rating = GameRating.objects.create(rating=4, to_game=self.game, from_user=self.user)
+        GameRating.objects.create(rating=1, to_game=self.game, from_user=self.user2)
+
+        rating.delete()
+        self.assert_aggregates(self.game, 1, 1, 1)
+
+        # cascade deletes of the user's ratings are applied too
+        self.user2.delete()
+        self.assert_aggregates(self.game, 0, 0, 0)
+
+    def test_rating_without_value_is_not_counted(self):
+        rating = GameRating.objects.create(rating=None, to_game=self.game, from_user=self.user)
+        self.assert_aggregates(self.game, 0, 0, 0)
+
+        rating.rating = 3
+        rating.save()
+        self.assert_aggregates(self.game, 3, 1, 3)
+
+    def test_console_ratings_update_aggregates(self):
+        ConsoleRating.objects.create(rating=2, to_console=self.console, from_user=self.user)
+        rating = ConsoleRating.objects.create(rating=5, to_console=self.console, from_user=self.user2)
+        self.assert_aggregates(self.console, 7, 2, 3.5)
+
+        rating.delete()
+        self.assert_aggregates(self.console, 2, 1, 2)
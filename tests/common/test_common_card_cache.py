@@ -0,0 +1,99 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from games_archive.accounts.models import GamesArchiveUser
+from games_archive.common.models import GameRating
+from games_archive.consoles.models import Console
+from games_archive.games.models import Game
+
+
+class GameCardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.users = [
+            GamesArchiveUser.objects.create_user(
+                username=f'testuser{i}', email=f'test{i}@example.com', password='testpass123', first_name=f'Name{i}'
+            )
+            for i in range(3)
+        ]
+        self.games = [Game.objects.create(title=f'Test Game {i}', to_user=self.users[i]) for i in range(3)]
+
+    def get_game_list(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('game_list'))
+        return response, [query['sql'] for query in queries]
+
+    def test_cached_cards_skip_the_uploader_queries(self):
+        _, first_queries = self.get_game_list()
+        response, second_queries = self.get_game_list()
+
+        user_table = GamesArchiveUser._meta.db_table
+        self.assertLess(len(second_queries), len(first_queries))
+        self.assertFalse([sql for sql in second_queries if user_table in sql])
+        self.assertContains(response, 'Name1')
+
+    def test_game_and_uploader_changes_bump_the_card_version(self):
+        self.get_game_list()
+
+        self.games[0].title = 'Renamed Game'
+        self.games[0].save()
+        self.users[1].first_name = 'Renamed'
+        self.users[1].last_name = 'User'
+        self.users[1].save()
+
+        response, _ = self.get_game_list()
+        self.assertContains(response, 'Renamed Game')
+        self.assertContains(response, 'Renamed User')
+
+    def test_user_specific_parts_are_not_cached(self):
+        GameRating.objects.create(from_user=self.users[0], to_game=self.games[0], rating=4)
+
+        self.client.login(username='testuser0', password='testpass123')
+        self.assertContains(self.client.get(reverse('game_list')), 'data-user-rating="4"')
+
+        self.client.login(username='testuser1', password='testpass123')
+        response = self.client.get(reverse('game_list'))
+        self.assertNotContains(response, 'data-user-rating="4"')
+        self.assertContains(response, f'id="comment-{self.games[0].pk}"')
+
+    def test_rating_changes_bump_the_game_card_version(self):
+        response, _ = self.get_game_list()
+        version = next(game for game in response.context['games'] if game == self.games[0]).card_version
+
+        GameRating.objects.create(from_user=self.users[1], to_game=self.games[0], rating=5)
+
+        response, _ = self.get_game_list()
+        self.assertNotEqual(
+            next(game for game in response.context['games'] if game == self.games[0]).card_version, version
+        )
+
+
+class ConsoleCardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = GamesArchiveUser.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+        self.consoles = [Console.objects.create(name=f'Test Console {i}', to_user=self.user) for i in range(3)]
+        # the pages of the logged in users are rendered, not read from the page cache
+        self.client.login(username='testuser', password='testpass123')
+
+    def card_versions(self):
+        response = self.client.get(reverse('console_list'))
+        return {console.pk: console.card_version for console in response.context['consoles']}
+
+    def test_console_cards_are_cached_until_the_console_changes(self):
+        versions = self.card_versions()
+        self.assertEqual(self.card_versions(), versions)
+
+        self.consoles[0].name = 'Renamed Console'
+        self.consoles[0].save()
+
+        changed = self.card_versions()
+        self.assertNotEqual(changed[self.consoles[0].pk], versions[self.consoles[0].pk])
+        self.assertEqual(changed[self.consoles[1].pk], versions[self.consoles[1].pk])
+        self.assertContains(self.client.get(reverse('console_list')), 'Renamed Console')
+        self.assertContains(self.client.get(reverse('home')), 'Renamed C')
@@ -0,0 +1,133 @@
+import json
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from games_archive.accounts.models import GamesArchiveUser
+from games_archive.common.models import GameComment, GameRating
+from games_archive.consoles.models import Console
+from games_archive.games.models import Game
+
+
+# the test process is the only one bumping the stamps of its locmem cache
+@override_settings(PAGE_CACHE_TIMEOUT=60, CONDITIONAL_GET=True)
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = GamesArchiveUser.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+        self.other_user = GamesArchiveUser.objects.create_user(
+            username='otheruser', email='other@example.com', password='testpass123'
+        )
+        self.console = Console.objects.create(name='Test Console', to_user=self.user)
+        self.game = Game.objects.create(title='Test Game', to_user=self.user)
+        self.game.to_consoles.add(self.console)
+        self.game_url = reverse('game_detail', kwargs={'pk': self.game.pk})
+
+    def revalidate(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_unchanged_pages_are_not_modified(self):
+        for url in [reverse('home'), reverse('game_list'), reverse('console_list'), self.game_url,
+                    reverse('console_detail', kwargs={'pk': self.console.pk})]:
+            response = self.client.get(url)
+            self.assertIn('no-cache', response['Cache-Control'])
+
+            revalidated = self.revalidate(url, response)
+            self.assertEqual(revalidated.status_code, 304)
+            self.assertEqual(revalidated.content, b'')
+
+    @override_settings(CONDITIONAL_GET=None)
+    def test_per_process_cache_sends_no_etags(self):
+        for url in [reverse('game_list'), self.game_url]:
+            response = self.client.get(url)
+            self.assertNotIn('ETag', response)
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='"any"').status_code, 200)
+
+    def test_not_modified_pages_are_not_rendered(self):
+        self.client.login(username='testuser', password='testpass123')
+        # the first page sets the CSRF cookie, which is a part of the logged in users' ETags
+        self.client.get(self.game_url)
+        response = self.client.get(self.game_url)
+
+        revalidated = self.revalidate(self.game_url, response)
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertFalse(revalidated.templates)
+
+    def test_user_changes_modify_the_detail_pages(self):
+        console_url = reverse('console_detail', kwargs={'pk': self.console.pk})
+        responses = {url: self.client.get(url) for url in [self.game_url, console_url]}
+
+        self.user.first_name = 'Renamed'
+        self.user.save()
+
+        for url, response in responses.items():
+            self.assertNotIn('Last-Modified', response)
+            self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_game_changes_do_not_write_the_console_rows(self):
+        console_url = reverse('console_detail', kwargs={'pk': self.console.pk})
+        response = self.client.get(console_url)
+
+        with CaptureQueriesContext(connection) as captured:
+            GameRating.objects.create(from_user=self.user, to_game=self.game, rating=3)
+
+        self.assertFalse([query for query in captured if 'UPDATE "consoles_console"' in query['sql']])
+        self.assertEqual(self.revalidate(console_url, response).status_code, 200)
+
+    def test_comments_ratings_and_console_changes_modify_the_game_page(self):
+        changes = [
+            lambda: GameComment.objects.create(from_user=self.user, to_game=self.game, comment='New comment'),
+            lambda: GameRating.objects.create(from_user=self.user, to_game=self.game, rating=3),
+            lambda: Console.objects.filter(pk=self.console.pk).first().save(),
+            lambda: self.game.to_consoles.clear(),
+        ]
+        for change in changes:
+            response = self.client.get(self.game_url)
+            change()
+            self.assertEqual(self.revalidate(self.game_url, response).status_code, 200)
+
+    def test_deletes_modify_the_list_pages(self):
+        other_game = Game.objects.create(title='Other Game', to_user=self.user)
+        response = self.client.get(reverse('game_list'))
+
+        other_game.delete()
+        self.assertEqual(self.revalidate(reverse('game_list'), response).status_code, 200)
+
+    def test_users_get_their_own_etags(self):
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(self.game_url)
+
+        self.client.login(username='otheruser', password='testpass123')
+        self.assertEqual(self.revalidate(self.game_url, response).status_code, 200)
+
+    def test_one_time_session_messages_are_rendered(self):
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(reverse('game_list'))
+
+        self.client.post(
+            reverse('comment_game', kwargs={'game_pk': self.game.pk}), {'comment': 'Great game'},
+            HTTP_REFERER='http://testserver' + reverse('game_list'),
+        )
+        revalidated = self.revalidate(reverse('game_list'), response)
+        self.assertEqual(revalidated.status_code, 200)
+        self.assertContains(revalidated, 'Comment submitted successfully!')
+
+    def test_user_rating_endpoint_is_not_modified_until_the_rating_changes(self):
+        self.client.login(username='testuser', password='testpass123')
+        url = reverse('get_user_rating_to_game', kwargs={'game_pk': self.game.pk})
+        response = self.client.get(url)
+        self.assertEqual(self.revalidate(url, response).status_code, 304)
+
+        self.client.post(
+            reverse('rate_game', kwargs={'game_pk': self.game.pk}),
+            data=json.dumps({'rating': 4}), content_type='application/json',
+        )
+        revalidated = self.revalidate(url, response)
+        self.assertEqual(revalidated.status_code, 200)
+        self.assertEqual(revalidated.json(), {'rating': 4})
+        self.assertIn('private', revalidated['Cache-Control'])
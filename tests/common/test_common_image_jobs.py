@@ -0,0 +1,168 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest.mock import patch
+
+from PIL import Image
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from games_archive.accounts.models import GamesArchiveUser
+from games_archive.common.image_jobs import enqueue_image_job, process_image_jobs, claim_image_jobs
+from games_archive.common.models import ImageJob
+from games_archive.common.page_cache import get_page_versions, game_page_scope
+from games_archive.custom_storages import file_existence_cache
+from games_archive.games.models import Game, Screenshot
+from games_archive.renditions import is_rendered
+
+
+def make_image(width=400, height=300):
+    buffer = BytesIO()
+    Image.effect_noise((width, height), 64).convert('RGB').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class TempMediaMixin:
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, IMAGE_JOB_MAX_ATTEMPTS=2,
+                                              IMAGE_JOB_RETRY_DELAY=30)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        cache.clear()
+        file_existence_cache.clear()
+        self.user = GamesArchiveUser.objects.create_user(username='testuser', email='user@user.com', password='pass')
+        self.game = Game.objects.create(title='Test Game', to_user=self.user)
+
+    def create_screenshot(self, content=None):
+        screenshot = Screenshot(to_game=self.game, from_user=self.user)
+        screenshot.picture.save('shot.png', ContentFile(content or make_image()), save=False)
+        screenshot.save()
+        return screenshot
+
+
+class ImageJobTests(TempMediaMixin, TestCase):
+
+    def test_upload_queues_a_job_instead_of_rendering(self):
+        self.client.login(username='testuser', password='pass')
+
+        self.client.post(
+            reverse('add_screenshot', args=[self.game.pk]),
+            {'picture': SimpleUploadedFile('shot.png', make_image(), content_type='image/png')},
+            HTTP_REFERER=reverse('game_detail', args=[self.game.pk]),
+        )
+
+        screenshot = Screenshot.objects.get()
+        job = ImageJob.objects.get()
+        self.assertEqual(job.image_name, screenshot.picture.name)
+        self.assertEqual(job.priority, ImageJob.PRIORITY_UPLOAD)
+        self.assertEqual(job.status, ImageJob.STATUS_QUEUED)
+        self.assertFalse(is_rendered(screenshot.picture))
+
+    def test_saving_again_does_not_queue_a_second_job(self):
+        screenshot = self.create_screenshot()
+        screenshot.save()
+
+        self.assertEqual(ImageJob.objects.count(), 1)
+
+    def test_worker_renders_the_image_and_refreshes_the_game_page(self):
+        screenshot = self.create_screenshot()
+        page_version = get_page_versions([game_page_scope(self.game.pk)])
+
+        self.assertEqual(process_image_jobs(10), (1, 0))
+
+        job = ImageJob.objects.get()
+        self.assertEqual(job.status, ImageJob.STATUS_DONE)
+        self.assertTrue(is_rendered(screenshot.picture))
+        self.assertNotEqual(get_page_versions([game_page_scope(self.game.pk)]), page_version)
+
+    def test_upload_jobs_go_before_the_backfill(self):
+        backfill = self.create_screenshot()
+        ImageJob.objects.all().delete()
+        enqueue_image_job(backfill.picture, backfill, ImageJob.PRIORITY_BACKFILL)
+        upload = self.create_screenshot()
+
+        claimed, = claim_image_jobs(1)
+
+        self.assertEqual(claimed.image_name, upload.picture.name)
+        self.assertEqual(claimed.status, ImageJob.STATUS_RUNNING)
+
+    def test_failed_job_is_retried_with_backoff_then_given_up(self):
+        self.create_screenshot()
+
+        with patch('games_archive.common.image_jobs.create_renditions', side_effect=OSError('storage down')):
+            self.assertEqual(process_image_jobs(10), (0, 1))
+            job = ImageJob.objects.get()
+            self.assertEqual(job.status, ImageJob.STATUS_QUEUED)
+            self.assertIn('storage down', job.last_error)
+            self.assertGreater(job.next_attempt_at, timezone.now() + timedelta(seconds=20))
+
+            # not due before the backoff
+            self.assertEqual(process_image_jobs(10), (0, 0))
+
+            ImageJob.objects.update(next_attempt_at=timezone.now())
+            process_image_jobs(10)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImageJob.STATUS_FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_unreadable_image_is_not_retried(self):
+        self.create_screenshot(b'not an image')
+
+        self.assertEqual(process_image_jobs(10), (0, 1))
+
+        self.assertEqual(ImageJob.objects.get().status, ImageJob.STATUS_FAILED)
+
+    def test_job_of_a_dead_worker_is_claimed_again(self):
+        self.create_screenshot()
+        claim_image_jobs(10)
+        self.assertEqual(claim_image_jobs(10), [])
+
+        ImageJob.objects.update(started_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(len(claim_image_jobs(10)), 1)
+
+    def test_status_endpoint_reports_the_renditions_once_ready(self):
+        screenshot = self.create_screenshot()
+        url = reverse('screenshots_status', args=[self.game.pk])
+
+        pending = self.client.get(url).json()['screenshots'][str(screenshot.pk)]
+        process_image_jobs(10)
+        done = self.client.get(url).json()['screenshots'][str(screenshot.pk)]
+
+        self.assertEqual(pending, {'status': ImageJob.STATUS_QUEUED, 'url': screenshot.picture.url})
+        self.assertEqual(done['status'], ImageJob.STATUS_DONE)
+        self.assertTrue(done['url'].endswith('/medium.webp'))
+
+    def test_gallery_marks_the_pending_screenshots(self):
+        self.create_screenshot()
+        detail_url = reverse('game_detail', args=[self.game.pk])
+
+        self.assertContains(self.client.get(detail_url), 'data-rendition-pending')
+        process_image_jobs(10)
+        self.assertNotContains(self.client.get(detail_url), 'data-rendition-pending')
+
+
+class ImageWorkerPoolTests(TempMediaMixin, TransactionTestCase):
+
+    def test_command_renders_the_jobs_in_a_process_pool(self):
+        screenshots = [self.create_screenshot() for _ in range(3)]
+        out = StringIO()
+
+        err = StringIO()
+
+        call_command('process_image_jobs', '--processes', '2', stdout=out, stderr=err)
+
+        self.assertIn('Rendered 3 images, 0 failed', out.getvalue())
+        # the tests run with the per process locmem cache
+        self.assertIn('CACHE_BACKEND', err.getvalue())
+        self.assertTrue(all(is_rendered(screenshot.picture) for screenshot in screenshots))
+        self.assertFalse(ImageJob.objects.exclude(status=ImageJob.STATUS_DONE).exists())
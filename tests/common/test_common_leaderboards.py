@@ -0,0 +1,152 @@
+import threading
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection, connections, IntegrityError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from games_archive.accounts.models import GamesArchiveUser
+from games_archive.common.leaderboards import get_leaderboard, get_leaderboard_genres, refresh_game_leaderboards
+from games_archive.common.models import GameRating, GameLeaderboardEntry
+from games_archive.consoles.models import Console
+from games_archive.games.models import Game
+
+
+@override_settings(RATING_RANKING_FORMULA='bayesian', RATING_RANKING_PRIOR_MEAN=3, RATING_RANKING_PRIOR_WEIGHT=5)
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        self.users = [
+            GamesArchiveUser.objects.create_user(username=f'testuser{i}', email=f'test{i}@example.com', password='pass')
+            for i in range(3)
+        ]
+        self.console = Console.objects.create(name='Test Console', to_user=self.users[0])
+        self.game = Game.objects.create(title='Test Game', genre='Platformer', to_user=self.users[0])
+        self.game.to_consoles.add(self.console)
+        self.other_game = Game.objects.create(title='Other Game', genre='Racing', to_user=self.users[0])
+
+    def entries(self, game):
+        return set(GameLeaderboardEntry.objects.filter(to_game=game).values_list('board', 'to_console', 'genre'))
+
+    def test_rated_game_enters_the_overall_console_and_genre_boards(self):
+        GameRating.objects.create(from_user=self.users[0], to_game=self.game, rating=5)
+
+        self.assertEqual(self.entries(self.game), {
+            ('all', None, ''), ('console', self.console.pk, ''), ('genre', None, 'platformer'),
+        })
+        self.assertAlmostEqual(get_leaderboard()[0].score, (5 * 3 + 5) / 6)
+        self.assertFalse(self.entries(self.other_game))
+
+    def test_entries_follow_rating_changes_and_deletes(self):
+        rating = GameRating.objects.create(from_user=self.users[0], to_game=self.game, rating=1)
+        GameRating.objects.create(from_user=self.users[1], to_game=self.other_game, rating=4)
+        self.assertEqual([entry.to_game for entry in get_leaderboard()], [self.other_game, self.game])
+
+        rating.rating = 5
+        rating.save()
+        GameRating.objects.create(from_user=self.users[2], to_game=self.game, rating=5)
+        self.assertEqual([entry.to_game for entry in get_leaderboard()], [self.game, self.other_game])
+
+        GameRating.objects.filter(to_game=self.game).delete()
+        self.assertEqual([entry.to_game for entry in get_leaderboard()], [self.other_game])
+
+    def test_entries_follow_console_and_genre_changes(self):
+        GameRating.objects.create(from_user=self.users[0], to_game=self.game, rating=4)
+        new_console = Console.objects.create(name='New Console', to_user=self.users[0])
+
+        self.game.to_consoles.set([new_console])
+        self.game.genre = 'Puzzle'
+        self.game.save()
+
+        self.assertEqual(self.entries(self.game), {
+            ('all', None, ''), ('console', new_console.pk, ''), ('genre', None, 'puzzle'),
+        })
+        new_console.game_set.clear()
+        self.assertFalse(get_leaderboard(console=new_console))
+
+    def test_rebuild_command_matches_the_incremental_updates(self):
+        GameRating.objects.create(from_user=self.users[0], to_game=self.game, rating=4)
+        GameRating.objects.create(from_user=self.users[1], to_game=self.other_game, rating=2)
+        expected = set(GameLeaderboardEntry.objects.values_list('board', 'to_console', 'genre', 'to_game', 'score'))
+
+        GameLeaderboardEntry.objects.all().delete()
+        call_command('rebuild_leaderboards', stdout=StringIO())
+
+        self.assertEqual(
+            set(GameLeaderboardEntry.objects.values_list('board', 'to_console', 'genre', 'to_game', 'score')), expected
+        )
+        self.assertEqual(get_leaderboard_genres(), ['platformer', 'racing'])
+
+    def test_leaderboard_pages_and_home_show_the_top_games(self):
+        GameRating.objects.create(from_user=self.users[0], to_game=self.game, rating=4)
+
+        response = self.client.get(reverse('leaderboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([entry.to_game for entry in response.context['entries']], [self.game])
+
+        response = self.client.get(reverse('console_leaderboard', kwargs={'console_pk': self.console.pk}))
+        self.assertEqual([entry.to_game for entry in response.context['entries']], [self.game])
+
+        response = self.client.get(reverse('genre_leaderboard', kwargs={'genre': 'Racing'}))
+        self.assertEqual(list(response.context['entries']), [])
+
+        response = self.client.get(reverse('home'))
+        self.assertEqual(response.context['top_games'], [self.game])
+
+        response = self.client.get(reverse('console_detail', kwargs={'pk': self.console.pk}))
+        self.assertEqual([entry.to_game for entry in response.context['leaderboard']], [self.game])
+
+    def test_game_is_once_on_a_board(self):
+        GameRating.objects.create(from_user=self.users[0], to_game=self.game, rating=5)
+
+        with self.assertRaises(IntegrityError):
+            GameLeaderboardEntry.objects.create(
+                board=GameLeaderboardEntry.BOARD_CONSOLE, to_console=self.console, to_game=self.game, score=1,
+                rating_count=1,
+            )
+
+    @skipUnless(connection.vendor == 'postgresql', 'the partial indexes need PostgreSQL')
+    def test_boards_are_read_in_index_order(self):
+        with connection.cursor() as cursor:
+            # the plan of a big table, the test rows fit a page - a sort remains only when no index has the order
+            cursor.execute('SET LOCAL enable_sort = off')
+
+        for board in [get_leaderboard(), get_leaderboard(console=self.console), get_leaderboard(genre='Racing')]:
+            plan = board.explain()
+            self.assertIn('_rank_idx', plan)
+            self.assertNotIn('Sort', plan)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'the row locks need PostgreSQL')
+class ConcurrentLeaderboardRefreshTests(TransactionTestCase):
+    def test_concurrent_refreshes_of_a_game_leave_one_entry_per_board(self):
+        user = GamesArchiveUser.objects.create_user(username='testuser', email='test@example.com', password='pass')
+        console = Console.objects.create(name='Test Console', to_user=user)
+        game = Game.objects.create(title='Test Game', genre='Platformer', to_user=user)
+        game.to_consoles.add(console)
+        GameRating.objects.create(from_user=user, to_game=game, rating=5)
+        start = threading.Barrier(4)
+        errors = []
+
+        def refresh():
+            try:
+                start.wait()
+                for _ in range(10):
+                    refresh_game_leaderboards([game.pk])
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=refresh) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            sorted(GameLeaderboardEntry.objects.filter(to_game=game).values_list('board', flat=True)),
+            ['all', 'console', 'genre'],
+        )
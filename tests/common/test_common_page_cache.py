@@ -0,0 +1,99 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from games_archive.accounts.models import GamesArchiveUser
+from games_archive.common.models import GameRating, GameComment, ConsoleRating
+from games_archive.consoles.models import Console
+from games_archive.games.models import Game
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=60)
+class AnonymousPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = GamesArchiveUser.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123', first_name='Test'
+        )
+        self.console = Console.objects.create(name='Test Console', to_user=self.user)
+        self.game = Game.objects.create(title='Test Game', to_user=self.user)
+        self.game.to_consoles.add(self.console)
+
+        self.urls = [
+            reverse('home'),
+            reverse('game_list'),
+            reverse('console_list'),
+            reverse('game_detail', kwargs={'pk': self.game.pk}),
+            reverse('console_detail', kwargs={'pk': self.console.pk}),
+        ]
+
+    def test_cached_pages_are_served_without_queries(self):
+        for url in self.urls:
+            first = self.client.get(url)
+            with self.assertNumQueries(0):
+                second = self.client.get(url)
+
+            self.assertEqual(second.status_code, 200)
+            self.assertEqual(second.content, first.content)
+            self.assertIn('Cookie', second['Vary'])
+
+    def test_query_strings_are_cached_separately(self):
+        self.client.get(reverse('game_list'))
+        response = self.client.get(reverse('game_list') + '?search=nothing-like-this')
+        self.assertNotContains(response, 'Test Game')
+
+    def test_logged_in_users_get_fresh_pages(self):
+        url = reverse('game_detail', kwargs={'pk': self.game.pk})
+        self.client.get(url)
+
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(url)
+        self.assertContains(response, f'action="{reverse("comment_game", kwargs={"game_pk": self.game.pk})}"')
+
+    def test_game_changes_invalidate_the_game_and_console_pages(self):
+        for url in self.urls:
+            self.client.get(url)
+
+        self.game.title = 'Renamed Game'
+        self.game.save()
+
+        for url in [reverse('home'), reverse('game_list'), *self.urls[3:]]:
+            self.assertContains(self.client.get(url), 'Renamed')
+
+    def test_ratings_invalidate_the_rated_object_pages(self):
+        game_url = reverse('game_detail', kwargs={'pk': self.game.pk})
+        console_url = reverse('console_detail', kwargs={'pk': self.console.pk})
+        before = {url: self.client.get(url).content for url in (game_url, console_url)}
+
+        GameRating.objects.create(from_user=self.user, to_game=self.game, rating=5)
+        ConsoleRating.objects.create(from_user=self.user, to_console=self.console, rating=5)
+
+        for url in (game_url, console_url):
+            self.assertNotEqual(self.client.get(url).content, before[url])
+
+    def test_comments_invalidate_the_detail_page(self):
+        url = reverse('game_detail', kwargs={'pk': self.game.pk})
+        self.client.get(url)
+
+        GameComment.objects.create(from_user=self.user, to_game=self.game, comment='A brand new comment')
+
+        self.assertContains(self.client.get(url), 'A brand new comment')
+
+    def test_console_changes_invalidate_the_pages_of_its_games(self):
+        url = reverse('game_detail', kwargs={'pk': self.game.pk})
+        self.client.get(url)
+
+        self.console.name = 'Renamed Console'
+        self.console.save()
+        self.assertContains(self.client.get(url), 'Renamed Console')
+
+        self.game.to_consoles.remove(self.console)
+        self.assertNotContains(self.client.get(url), 'Renamed Console')
+
+    @override_settings(PAGE_CACHE_TIMEOUT=0)
+    def test_zero_timeout_turns_the_cache_off(self):
+        url = reverse('game_list')
+        self.client.get(url)
+        Game.objects.filter(pk=self.game.pk).update(description='Updated Without Signals')
+
+        self.assertContains(self.client.get(url), 'Updated Without Signals')
@@ -0,0 +1,41 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+
+from games_archive.accounts.models import GamesArchiveUser
+from games_archive.common.ranking import ranking_score, rank_by_rating
+from games_archive.games.models import Game
+
+
+@override_settings(RATING_RANKING_FORMULA='bayesian', RATING_RANKING_PRIOR_MEAN=3, RATING_RANKING_PRIOR_WEIGHT=5)
+class RankingTests(TestCase):
+    def setUp(self):
+        self.user = GamesArchiveUser.objects.create_user(username='testuser', email='test@example.com')
+        # aggregates set directly, they are kept by the rating signals in the app
+        self.one_vote = Game.objects.create(title='One Vote Wonder', to_user=self.user)
+        Game.objects.filter(pk=self.one_vote.pk).update(rating_sum=5, rating_count=1, rating_avg=5)
+        self.classic = Game.objects.create(title='Classic', to_user=self.user)
+        Game.objects.filter(pk=self.classic.pk).update(rating_sum=460, rating_count=100, rating_avg=4.6)
+        self.unrated = Game.objects.create(title='Unrated', to_user=self.user)
+
+    def test_bayesian_average_prefers_many_good_votes_over_one_perfect_vote(self):
+        ranked = list(rank_by_rating(Game.objects.all()))
+
+        self.assertEqual(ranked, [self.classic, self.one_vote, self.unrated])
+        self.assertAlmostEqual(ranked[1].ranking_score, (5 * 3 + 5) / (5 + 1))
+        self.assertAlmostEqual(ranked[2].ranking_score, 3)
+
+    def test_database_and_python_scores_match(self):
+        for game in rank_by_rating(Game.objects.all()):
+            self.assertAlmostEqual(game.ranking_score, ranking_score(game.rating_sum, game.rating_count))
+
+    @override_settings(RATING_RANKING_FORMULA='average')
+    def test_average_formula_ranks_by_the_plain_average(self):
+        ranked = list(rank_by_rating(Game.objects.all()))
+
+        self.assertEqual(ranked, [self.one_vote, self.classic, self.unrated])
+        self.assertEqual(ranking_score(0, 0), 0)
+
+    @override_settings(RATING_RANKING_FORMULA='median')
+    def test_unknown_formula_raises(self):
+        with self.assertRaises(ImproperlyConfigured):
+            rank_by_rating(Game.objects.all())
@@ -1,4 +1,5 @@
 from django.core.management import call_command
+from django.template.loader import render_to_string
 from django.test import TestCase, Client
 from django.urls import reverse
 import json
@@ -132,6 +133,64 @@ class GameRatingViewTests(BaseViewTest):
         response_data = json.loads(response.content)
         self.assertEqual(response_data['rating'], 4)
 
+    def test_get_user_ratings_to_games_returns_all_ratings_with_one_query(self):
+        self.client.login(username='testuser', password='testpass123')
+        other_game = Game.objects.create(title='Other Game', to_user=self.user)
+        GameRating.objects.create(from_user=self.user, to_game=self.game, rating=4)
+
+        url = reverse('get_user_ratings_to_games') + f'?ids={self.game.pk},{other_game.pk}'
+        self.client.get(url)  # warm up the session / user lookups
+        with self.assertNumQueries(3):  # session, user and the ratings
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            json.loads(response.content)['ratings'],
+            {str(self.game.pk): 4, str(other_game.pk): None}
+        )
+
+    def test_get_user_ratings_to_games_with_invalid_ids_should_return_400(self):
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(reverse('get_user_ratings_to_games') + '?ids=1,abc')
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_user_ratings_to_games_unauthenticated_should_redirect_to_login(self):
+        response = self.client.get(reverse('get_user_ratings_to_games') + f'?ids={self.game.pk}')
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(LOGIN_URL, response.url)
+
+    def test_game_list_embeds_the_user_ratings(self):
+        self.client.login(username='testuser', password='testpass123')
+        GameRating.objects.create(from_user=self.user, to_game=self.game, rating=3)
+
+        response = self.client.get(reverse('game_list'))
+
+        self.assertEqual(response.context['games'][0].user_rating, 3)
+        self.assertContains(response, 'data-user-rating="3"')
+
+    def test_rating_widget_without_an_attached_rating_requests_it(self):
+        html = render_to_string('partials/game_rating_stars.html', {'game': self.game})
+        self.assertNotIn('data-user-rating=', html)
+
+        # e.g. the string_if_invalid of a missing attribute
+        self.game.user_rating = ''
+        html = render_to_string('partials/game_rating_stars.html', {'game': self.game})
+        self.assertNotIn('data-user-rating=', html)
+
+        self.game.user_rating = 0
+        html = render_to_string('partials/game_rating_stars.html', {'game': self.game})
+        self.assertIn('data-user-rating="0"', html)
+
+    def test_game_list_loads_the_rating_widget_code_once(self):
+        self.client.login(username='testuser', password='testpass123')
+        Game.objects.create(title='Other Game', to_user=self.user)
+
+        response = self.client.get(reverse('game_list'))
+
+        self.assertContains(response, 'class="star-rating"', count=2)
+        self.assertContains(response, 'assets/js/rating-widget.js', count=1)
+        self.assertNotContains(response, 'fetch(`/games/')
+
 
 class ConsoleRatingViewTests(BaseViewTest):
     def test_add_console_rating_authenticated_should_pass(self):
@@ -186,6 +245,23 @@ class ConsoleRatingViewTests(BaseViewTest):
         response_data = json.loads(response.content)
         self.assertEqual(response_data['rating'], 4)
 
+    def test_get_user_ratings_to_consoles_returns_correctly(self):
+        self.client.login(username='testuser', password='testpass123')
+        ConsoleRating.objects.create(from_user=self.user, to_console=self.console, rating=2)
+
+        response = self.client.get(reverse('get_user_ratings_to_consoles') + f'?ids={self.console.pk}')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['ratings'], {str(self.console.pk): 2})
+
+    def test_console_list_embeds_the_user_ratings_and_zero_for_unrated(self):
+        self.client.login(username='testuser', password='testpass123')
+
+        response = self.client.get(reverse('console_list'))
+
+        self.assertEqual(response.context['consoles'][0].user_rating, 0)
+        self.assertContains(response, 'data-user-rating="0"')
+
 
 class GameCommentViewTests(BaseViewTest):
     def setUp(self):
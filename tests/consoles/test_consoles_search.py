@@ -0,0 +1,39 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from games_archive.accounts.models import GamesArchiveUser
+from games_archive.consoles.models import Console
+from games_archive.consoles.search import search_consoles, SEARCH_MODE_FUZZY
+
+
+class ConsolesSearchTests(TestCase):
+    def setUp(self):
+        self.user = GamesArchiveUser.objects.create_user(username='testuser', email='user@user.com')
+
+        self.snes = Console.objects.create(name='Super Nintendo', manufacturer='Nintendo', to_user=self.user)
+        self.genesis = Console.objects.create(name='Sega Genesis', manufacturer='Sega', to_user=self.user)
+
+    def search(self, query, mode=None):
+        return list(search_consoles(Console.objects.all(), query, mode))
+
+    def test_search_by_name_and_manufacturer(self):
+        self.assertEqual(self.search('genesis'), [self.genesis])
+        self.assertEqual(self.search('nintendo'), [self.snes])
+
+    def test_fuzzy_mode_still_finds_exact_matches(self):
+        self.assertEqual(self.search('Sega', SEARCH_MODE_FUZZY), [self.genesis])
+
+    @skipUnless(connection.vendor == 'postgresql', 'trigram search needs PostgreSQL')
+    def test_fuzzy_search_tolerates_typos(self):
+        self.assertEqual(self.search('Nintedo'), [])
+        self.assertEqual(self.search('Nintedo', SEARCH_MODE_FUZZY), [self.snes])
+
+    def test_console_list_view_keeps_the_search_mode(self):
+        response = self.client.get(reverse('console_list') + f'?search=sega&mode={SEARCH_MODE_FUZZY}')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['consoles']), [self.genesis])
+        self.assertEqual(response.context['search_mode'], SEARCH_MODE_FUZZY)
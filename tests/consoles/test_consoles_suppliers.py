@@ -0,0 +1,82 @@
+from unittest.mock import patch
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+
+from games_archive.accounts.models import GamesArchiveUser
+from games_archive.consoles.models import Console, Supplier
+from games_archive.consoles.suppliers import SubstringAutomaton, supplier_logo_resolver, resolve_logos
+from games_archive.games.models import Game
+
+
+class SubstringAutomatonTests(TestCase):
+    def test_find_longest_returns_longest_contained_pattern(self):
+        automaton = SubstringAutomaton(['sega', 'nintendo', 'nintendo ead', 'ea'])
+
+        self.assertEqual(automaton.find_longest('nintendo ead tokyo'), 'nintendo ead')
+        self.assertEqual(automaton.find_longest('team sega japan'), 'sega')
+        self.assertEqual(automaton.find_longest('ubisoft'), None)
+
+    def test_find_longest_follows_fail_links(self):
+        automaton = SubstringAutomaton(['abcd', 'bc'])
+
+        self.assertEqual(automaton.find_longest('xabcx'), 'bc')
+
+
+class SupplierLogoResolverTests(TestCase):
+    def setUp(self):
+        self.user = GamesArchiveUser.objects.create_user(username='testuser', email='user@user.com')
+        self.nintendo = Supplier.objects.create(
+            name='Nintendo Co.',
+            logo=SimpleUploadedFile('nintendo.png', b'content'),
+        )
+        self.sega = Supplier.objects.create(name='Sega', logo=SimpleUploadedFile('sega.png', b'content'))
+
+    def tearDown(self):
+        for supplier in Supplier.objects.all():
+            supplier.logo.delete(save=False)
+
+    def test_get_supplier_matches_like_icontains_and_contained_names(self):
+        self.assertEqual(supplier_logo_resolver.get_supplier('nintendo'), self.nintendo)
+        self.assertEqual(supplier_logo_resolver.get_supplier('  SEGA '), self.sega)
+        self.assertEqual(supplier_logo_resolver.get_supplier('Sega AM2'), self.sega)
+        self.assertIsNone(supplier_logo_resolver.get_supplier('Capcom'))
+        self.assertIsNone(supplier_logo_resolver.get_supplier(None))
+
+    def test_supplier_changes_refresh_the_index(self):
+        self.assertIsNone(supplier_logo_resolver.get_supplier('Capcom'))
+
+        self.sega.name = 'Capcom'
+        self.sega.save()
+
+        self.assertEqual(supplier_logo_resolver.get_supplier('Capcom'), self.sega)
+
+    def test_old_index_is_rebuilt_without_the_shared_version(self):
+        version = supplier_logo_resolver.current_version()
+        # e.g. changed by another process, with a per process default cache
+        Supplier.objects.filter(pk=self.sega.pk).update(name='Capcom')
+        self.assertIsNone(supplier_logo_resolver.get_supplier('Capcom'))
+
+        with patch.object(supplier_logo_resolver, 'max_age', 0), \
+                patch.object(supplier_logo_resolver, '_checked_at', 0):
+            self.assertEqual(supplier_logo_resolver.get_supplier('Capcom'), self.sega)
+        self.assertNotEqual(supplier_logo_resolver.current_version(), version)
+
+    def test_resolved_names_are_bounded(self):
+        supplier_logo_resolver.ensure_fresh()
+
+        for i in range(supplier_logo_resolver.resolved_size + 10):
+            supplier_logo_resolver.get_supplier(f'Developer {i}')
+
+        self.assertEqual(supplier_logo_resolver._resolve.cache_info().currsize, supplier_logo_resolver.resolved_size)
+
+    def test_resolve_logos_serves_a_page_without_queries(self):
+        games = [Game.objects.create(title=f'Game {i}', developer='Sega', to_user=self.user) for i in range(5)]
+        console = Console.objects.create(name='Famicom', manufacturer='Nintendo', to_user=self.user)
+        supplier_logo_resolver.ensure_fresh()
+
+        with self.assertNumQueries(0):
+            resolve_logos(games + [console])
+            for game in games:
+                self.assertEqual(game.developer_logo, self.sega.logo)
+            self.assertEqual(console.manufacturer_logo, self.nintendo.logo)
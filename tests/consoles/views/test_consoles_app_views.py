@@ -8,6 +8,7 @@ import os
 from games_archive.accounts.models import GamesArchiveUser
 from games_archive.consoles.models import Console
 from games_archive.consoles.forms import ConsoleForm
+from games_archive.games.models import Game
 from games_archive.settings import LOGIN_URL
 
 
@@ -90,6 +91,17 @@ class ConsoleViewsTest(TestCase):
         for item in ['console', 'comments', 'console_comment_form', 'popular_games']:
             self.assertIn(item, response.context)
 
+    def test_console_detail_view_popular_games_are_ranked_and_limited_in_the_database(self):
+        for i in range(8):
+            game = Game.objects.create(title=f'Popular Game {i}', to_user=self.user)
+            game.to_consoles.add(self.console)
+            Game.objects.filter(pk=game.pk).update(rating_sum=i * 10, rating_count=10, rating_avg=i)
+
+        response = self.client.get(reverse('console_detail', kwargs={'pk': self.console.pk}))
+
+        popular_games = list(response.context['popular_games'])
+        self.assertEqual([game.title for game in popular_games], [f'Popular Game {i}' for i in range(7, 1, -1)])
+
     def test_console_detail_view_invalid_pk_should_return_404(self):
         response = self.client.get(reverse('console_detail', kwargs={'pk': 99999}))
         self.assertEqual(response.status_code, 404)
@@ -235,4 +247,16 @@ class ConsoleViewsTest(TestCase):
 
         # Test second page
         response = self.client.get(reverse('console_list'), {'page': 2})
-        self.assertEqual(len(response.context['consoles']), 6)  # 5 + 1 from setUp
\ No newline at end of file
+        self.assertEqual(len(response.context['consoles']), 6)  # 5 + 1 from setUp
+    def test_keyset_pagination(self):
+        for i in range(15):
+            Console.objects.create(name=f'Console {i}', to_user=self.user)
+
+        response = self.client.get(reverse('console_list'), {'after': ''})
+        self.assertEqual(len(response.context['consoles']), 10)
+        self.assertFalse(response.context['is_paginated'])
+
+        response = self.client.get(reverse('console_list'), {'after': response.context['page_obj'].next_after})
+        self.assertEqual(len(response.context['consoles']), 6)
+        self.assertFalse(response.context['page_obj'].has_next())
+        self.assertEqual(response.context['consoles'][-1], self.console)
@@ -0,0 +1,270 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from games_archive.accounts.models import GamesArchiveUser
+from games_archive.common.models import StoredFile
+from games_archive.custom_storages import FileExistenceCache, CachedExistenceFileSystemStorage, \
+    file_existence_cache, file_exists, HashedStaticFilesStorage, ContentAddressedFileSystemStorage
+from games_archive.games.models import Game
+from tests.common.test_common_image_jobs import TempMediaMixin, make_image
+
+
+class FileExistenceCacheTests(TestCase):
+    def test_cache_is_bounded_and_evicts_least_recently_used(self):
+        cache = FileExistenceCache(max_size=2, timeout=60)
+        cache.set('a', True)
+        cache.set('b', False)
+        cache.get('a')
+        cache.set('c', True)
+
+        self.assertTrue(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertTrue(cache.get('c'))
+
+    def test_expired_entries_are_not_returned(self):
+        cache = FileExistenceCache(max_size=2, timeout=60)
+        cache.set('a', True)
+
+        with patch('games_archive.custom_storages.time.monotonic', return_value=10 ** 9):
+            self.assertIsNone(cache.get('a'))
+
+    def test_zero_size_or_timeout_disables_the_cache(self):
+        for cache in [FileExistenceCache(max_size=0, timeout=60), FileExistenceCache(max_size=2, timeout=0)]:
+            cache.set('a', True)
+            self.assertIsNone(cache.get('a'))
+
+
+class CachedExistenceFileSystemStorageTests(TestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.storage = CachedExistenceFileSystemStorage(location=self.location)
+        file_existence_cache.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.location, ignore_errors=True)
+
+    def test_exists_result_is_cached(self):
+        with patch.object(self.storage, 'exists', wraps=self.storage.exists) as exists:
+            self.assertFalse(file_exists('missing.png', self.storage))
+            self.assertFalse(file_exists('missing.png', self.storage))
+
+        self.assertEqual(exists.call_count, 1)
+
+    def test_save_and_delete_update_the_cache(self):
+        self.assertFalse(file_exists('cover.png', self.storage))
+
+        name = self.storage.save('cover.png', ContentFile(b'content'))
+        self.assertTrue(file_exists(name, self.storage))
+
+        self.storage.delete(name)
+        self.assertFalse(file_exists(name, self.storage))
+
+    def test_saving_under_a_cached_name_does_not_overwrite(self):
+        name = self.storage.save('cover.png', ContentFile(b'first'))
+        other_name = self.storage.save('cover.png', ContentFile(b'second'))
+
+        self.assertNotEqual(name, other_name)
+
+
+@override_settings(CONTENT_ADDRESSED_UPLOAD_DIRS=['game_covers/'])
+class ContentAddressedFileSystemStorageTests(TestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location, ignore_errors=True)
+        self.storage = ContentAddressedFileSystemStorage(location=self.location)
+        file_existence_cache.clear()
+
+    def test_identical_uploads_share_one_file(self):
+        name = self.storage.save('game_covers/cover.PNG', ContentFile(b'content'))
+        other_name = self.storage.save('game_covers/other.png', ContentFile(b'content'))
+
+        self.assertEqual(name, other_name)
+        self.assertRegex(name, r'^content/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.png$')
+        self.assertEqual(StoredFile.objects.get(name=name).references, 2)
+        with self.storage.open(name) as stored:
+            self.assertEqual(stored.read(), b'content')
+
+    def test_file_is_removed_with_its_last_reference(self):
+        name = self.storage.save('game_covers/cover.png', ContentFile(b'content'))
+        self.storage.save('game_covers/cover.png', ContentFile(b'content'))
+
+        self.storage.delete(name)
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(StoredFile.objects.get(name=name).references, 1)
+
+        self.storage.delete(name)
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(StoredFile.objects.exists())
+
+    def test_other_names_are_stored_as_given(self):
+        name = self.storage.save('renditions/manifest.json', ContentFile(b'{}'))
+
+        self.assertEqual(name, 'renditions/manifest.json')
+        self.assertFalse(StoredFile.objects.exists())
+
+    def test_batched_references_are_written_together(self):
+        with CaptureQueriesContext(connection) as captured:
+            with self.storage.batched_references():
+                names = [self.storage.save('game_covers/cover.png', ContentFile(f'{i % 3}'.encode())) for i in range(9)]
+
+        # the rows are created and locked, then the references written
+        self.assertEqual(len([query for query in captured if 'SAVEPOINT' not in query['sql']]), 3)
+        self.assertEqual(StoredFile.objects.get(name=names[0]).references, 3)
+
+    def test_batch_writes_a_file_deleted_before_its_row_was_locked_again(self):
+        name = self.storage.save('game_covers/cover.png', ContentFile(b'content'))
+
+        with self.storage.batched_references():
+            self.storage.save('game_covers/cover.png', ContentFile(b'content'))
+            # the last reference is dropped by another request before the batch locks the row
+            self.storage.delete(name)
+
+        self.assertEqual(StoredFile.objects.get(name=name).references, 1)
+        with self.storage.open(name) as stored:
+            self.assertEqual(stored.read(), b'content')
+
+
+@skipUnless(connection.vendor == 'postgresql', 'the row locks need PostgreSQL')
+@override_settings(CONTENT_ADDRESSED_UPLOAD_DIRS=['game_covers/'])
+class ContentAddressedStorageLockTests(TransactionTestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location, ignore_errors=True)
+        self.storage = ContentAddressedFileSystemStorage(location=self.location)
+        file_existence_cache.clear()
+
+    def in_thread(self, target):
+        def run():
+            try:
+                target()
+            finally:
+                connections.close_all()
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        return thread
+
+    def test_delete_of_the_last_reference_waits_for_an_identical_save(self):
+        name = self.storage.save('game_covers/cover.png', ContentFile(b'content'))
+        found = threading.Event()
+        exists = self.storage.exists
+
+        def slow_exists(checked_name):
+            # the save found the file under the row lock, the delete runs now
+            result = exists(checked_name)
+            found.set()
+            time.sleep(0.3)
+            return result
+
+        with patch.object(self.storage, 'exists', side_effect=slow_exists):
+            saving = self.in_thread(lambda: self.storage.save('game_covers/cover.png', ContentFile(b'content')))
+            found.wait(5)
+            deleting = self.in_thread(lambda: self.storage.delete(name))
+            saving.join(5)
+            deleting.join(5)
+
+        self.assertTrue(os.path.exists(self.storage.path(name)))
+        self.assertEqual(StoredFile.objects.get(name=name).references, 1)
+
+
+class StoredFileReferenceTests(TempMediaMixin, TestCase):
+    def upload(self, content):
+        return SimpleUploadedFile('cover.png', content, content_type='image/png')
+
+    def references(self, name):
+        return StoredFile.objects.filter(name=name).values_list('references', flat=True).first()
+
+    def test_deleted_objects_release_their_files(self):
+        content = make_image(40, 30)
+        other_game = Game.objects.create(title='Other Game', to_user=self.user, cover_image=self.upload(content))
+        self.game.cover_image = self.upload(content)
+        self.game.save()
+        name = self.game.cover_image.name
+        self.assertEqual(self.references(name), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other_game.delete()
+        self.assertEqual(self.references(name), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.game.delete()
+        self.assertIsNone(self.references(name))
+        self.assertFalse(self.game.cover_image.storage.exists(name))
+
+    def test_replaced_and_cleared_images_release_their_files(self):
+        content = make_image(40, 30)
+        self.game.cover_image = self.upload(content)
+        self.game.save()
+        first = self.game.cover_image.name
+
+        # the same picture again keeps one reference
+        self.game.cover_image = self.upload(content)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.game.save()
+        self.assertEqual(self.references(first), 1)
+
+        self.game.cover_image = self.upload(make_image(50, 40))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.game.save()
+        self.assertIsNone(self.references(first))
+        second = self.game.cover_image.name
+
+        self.game.cover_image = ''
+        with self.captureOnCommitCallbacks(execute=True):
+            self.game.save()
+        self.assertIsNone(self.references(second))
+
+    def test_saves_without_the_image_keep_the_reference(self):
+        self.user.profile_picture = self.upload(make_image(40, 30))
+        self.user.save()
+        name = self.user.profile_picture.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save(update_fields=['last_login'])
+            self.user.first_name = 'Test'
+            self.user.save()
+
+        self.assertEqual(self.references(name), 1)
+
+
+class ImagePropertiesMemoTests(TestCase):
+    def test_default_image_checks_the_storage_once_per_instance(self):
+        user = GamesArchiveUser.objects.create_user(username='testuser', email='user@user.com')
+        game = Game.objects.create(title='Test Game', cover_image='game_covers/missing.png', to_user=user)
+        file_existence_cache.clear()
+
+        with patch('games_archive.custom_storages.file_exists', return_value=False) as exists:
+            for _ in range(3):
+                self.assertEqual(game.default_image, Game.DEFAULT_IMAGE)
+
+        self.assertEqual(exists.call_count, 1)
+
+
+class HashedStaticFilesStorageTests(TestCase):
+    def setUp(self):
+        self.static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.static_root, ignore_errors=True)
+
+    def test_url_uses_the_plain_name_before_collectstatic(self):
+        storage = HashedStaticFilesStorage(location=self.static_root)
+        self.assertEqual(storage.url('assets/js/rating-widget.js'), '/static/assets/js/rating-widget.js')
+        self.assertEqual(storage.url('/images/history/Pong.svg.png'), '/static/images/history/Pong.svg.png')
+
+    def test_url_uses_the_hashed_name_after_collectstatic(self):
+        with override_settings(STATIC_ROOT=self.static_root):
+            call_command('collectstatic', interactive=False, verbosity=0)
+
+        storage = HashedStaticFilesStorage(location=self.static_root)
+        self.assertRegex(storage.url('assets/js/rating-widget.js'), r'^/static/assets/js/rating-widget\.[0-9a-f]{12}\.js$')
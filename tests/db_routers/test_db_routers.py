@@ -0,0 +1,104 @@
+import json
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.db import connections, DEFAULT_DB_ALIAS, transaction
+from django.http import HttpResponse
+from django.test import SimpleTestCase, TransactionTestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from games_archive.accounts.models import GamesArchiveUser
+from games_archive.db_routers import ReplicaRouter, ReplicaRoutingMiddleware, use_replicas, PIN_PRIMARY_COOKIE
+from games_archive.games.models import Game
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1', 'replica_2'])
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_of_read_only_requests_go_to_a_replica(self):
+        with use_replicas():
+            self.assertIn(self.router.db_for_read(Game), ['replica_1', 'replica_2'])
+
+    def test_other_reads_and_all_writes_go_to_default(self):
+        self.assertEqual(self.router.db_for_read(Game), DEFAULT_DB_ALIAS)
+        with use_replicas():
+            self.assertEqual(self.router.db_for_write(Game), DEFAULT_DB_ALIAS)
+            self.assertEqual(self.router.db_for_read(Session), DEFAULT_DB_ALIAS)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_goes_to_default(self):
+        with use_replicas():
+            self.assertEqual(self.router.db_for_read(Game), DEFAULT_DB_ALIAS)
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica_1', 'games'))
+        self.assertIsNone(self.router.allow_migrate(DEFAULT_DB_ALIAS, 'games'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'], REPLICA_STICKY_SECONDS=15)
+class ReplicaRoutingMiddlewareTests(SimpleTestCase):
+    def route(self, request):
+        routed = []
+
+        def get_response(request):
+            routed.append(ReplicaRouter().db_for_read(Game))
+            return HttpResponse()
+
+        response = ReplicaRoutingMiddleware(get_response)(request)
+        return routed[0], response
+
+    def test_get_reads_from_the_replica(self):
+        database, response = self.route(RequestFactory().get('/'))
+        self.assertEqual(database, 'replica_1')
+        self.assertNotIn(PIN_PRIMARY_COOKIE, response.cookies)
+
+    def test_post_reads_from_the_primary_and_pins_the_next_requests(self):
+        database, response = self.route(RequestFactory().post('/'))
+        self.assertEqual(database, DEFAULT_DB_ALIAS)
+        self.assertEqual(response.cookies[PIN_PRIMARY_COOKIE]['max-age'], 15)
+
+        request = RequestFactory().get('/')
+        request.COOKIES[PIN_PRIMARY_COOKIE] = '1'
+        database, _ = self.route(request)
+        self.assertEqual(database, DEFAULT_DB_ALIAS)
+
+
+@skipUnless(getattr(settings, 'DATABASE_REPLICAS', []), 'needs a replica alias, e.g. DB_REPLICA_HOSTS=127.0.0.1')
+class ReplicaRoutingIntegrationTests(TransactionTestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.replica = settings.DATABASE_REPLICAS[0]
+        self.user = GamesArchiveUser.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+        self.game = Game.objects.create(title='Test Game', to_user=self.user)
+
+    def get(self, url):
+        with CaptureQueriesContext(connections[self.replica]) as replica_queries:
+            response = self.client.get(url)
+        return response, replica_queries
+
+    def test_read_only_pages_read_from_the_replica_until_the_user_writes(self):
+        self.client.login(username='testuser', password='testpass123')
+        url = reverse('get_user_rating_to_game', kwargs={'game_pk': self.game.pk})
+
+        response, replica_queries = self.get(url)
+        self.assertEqual(response.json(), {'rating': None})
+        self.assertTrue(replica_queries)
+
+        self.client.post(
+            reverse('rate_game', kwargs={'game_pk': self.game.pk}),
+            data=json.dumps({'rating': 4}), content_type='application/json',
+        )
+        response, replica_queries = self.get(url)
+        self.assertEqual(response.json(), {'rating': 4})
+        self.assertFalse(replica_queries)
+
+    def test_reads_in_a_transaction_stay_on_default(self):
+        with use_replicas(), transaction.atomic():
+            self.assertEqual(Game.objects.all().db, DEFAULT_DB_ALIAS)
@@ -187,7 +187,9 @@ class ScreenshotFormTests(TestCase):
             self.assertEqual(screenshot.to_game, self.game)
             self.assertEqual(screenshot.from_user, self.user)
             self.assertTrue(screenshot.picture)
-            self.assertIn('game_screenshots/person', screenshot.picture.name)
+            # stored under its content hash, see games_archive.custom_storages
+            self.assertTrue(screenshot.picture.name.startswith('content/'))
+            self.assertTrue(screenshot.picture.name.endswith('.png'))
 
             # Check if the redirect URL contains the screenshot ID
             self.assertIn(f'screenshot-{screenshot.pk}', response.url)
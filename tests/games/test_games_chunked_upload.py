@@ -0,0 +1,163 @@
+import os
+from datetime import timedelta
+from io import BytesIO, StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from games_archive.accounts.models import GamesArchiveUser
+from games_archive.common.models import ImageJob
+from games_archive.games.models import Screenshot, ScreenshotUpload
+from games_archive.games.uploads import part_path, write_part
+from tests.common.test_common_image_jobs import TempMediaMixin, make_image
+
+
+class ChunkedUploadTests(TempMediaMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        settings_override = override_settings(
+            SCREENSHOT_UPLOAD_TEMP_DIR=os.path.join(self.media_root, 'upload-parts'),
+            SCREENSHOT_UPLOAD_CHUNK_SIZE=4096,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client.login(username='testuser', password='pass')
+
+    def start(self, content, name='shot.png', session=None):
+        data = {'name': name, 'size': len(content), 'content_type': 'image/png'}
+        if session:
+            data['session'] = session
+        response = self.client.post(reverse('start_screenshot_upload', args=[self.game.pk]), data)
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    def put(self, upload, content, offset):
+        return self.client.put(
+            f'{upload["url"]}?offset={offset}', content[offset:offset + 4096], content_type='application/octet-stream',
+        )
+
+    def send(self, upload, content):
+        for offset in range(upload['received'], len(content), 4096):
+            self.assertEqual(self.put(upload, content, offset).status_code, 200)
+
+    def finish(self, session):
+        return self.client.post(reverse('finish_screenshot_upload', args=[self.game.pk, session]))
+
+    def test_pictures_of_a_session_are_assembled_into_screenshots(self):
+        contents = [make_image(200, 150), make_image(120, 90)]
+        first = self.start(contents[0])
+        second = self.start(contents[1], name='other.png', session=first['session'])
+        self.send(first, contents[0])
+        self.send(second, contents[1])
+
+        response = self.finish(first['session'])
+
+        self.assertEqual(response.status_code, 201)
+        screenshots = list(Screenshot.objects.order_by('pk'))
+        self.assertEqual(len(screenshots), 2)
+        self.assertEqual(response.json()['redirect_url'], f'#screenshot-{screenshots[0].pk}')
+        for screenshot, content in zip(screenshots, contents):
+            with screenshot.picture.open('rb') as picture:
+                self.assertEqual(picture.read(), content)
+        self.assertEqual(ImageJob.objects.count(), 2)
+        self.assertFalse(ScreenshotUpload.objects.exists())
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'upload-parts')), [])
+
+    def test_upload_resumes_after_the_received_bytes(self):
+        content = make_image(200, 150)
+        upload = self.start(content)
+        self.put(upload, content, 0)
+
+        # the client lost the answer and sends the first part again
+        conflict = self.put(upload, content, 0)
+        self.assertEqual(conflict.status_code, 409)
+        self.assertEqual(conflict.json()['received'], 4096)
+
+        session = self.client.get(reverse('screenshot_upload_session', args=[self.game.pk, upload['session']]))
+        resumed, = session.json()['uploads']
+        self.assertEqual(resumed['received'], 4096)
+        self.send(resumed, content)
+
+        self.assertEqual(self.finish(upload['session']).status_code, 201)
+        self.assertEqual(Screenshot.objects.count(), 1)
+
+    def test_part_cut_short_keeps_the_bytes_that_arrived(self):
+        content = make_image(200, 150)
+        upload = ScreenshotUpload.objects.get(token=self.start(content)['token'])
+
+        upload = write_part(upload, 0, BytesIO(content[:1000]), 4096)
+        self.assertEqual(upload.received, 1000)
+
+        upload = write_part(upload, 1000, BytesIO(content[1000:]), len(content) - 1000)
+        with open(part_path(upload), 'rb') as part:
+            self.assertEqual(part.read(), content)
+
+    def test_finish_waits_for_all_of_the_parts(self):
+        content = make_image(200, 150)
+        upload = self.start(content)
+        self.put(upload, content, 0)
+
+        response = self.finish(upload['session'])
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['uploads'][0]['received'], 4096)
+        self.assertFalse(Screenshot.objects.exists())
+
+    def test_invalid_picture_is_reported_and_the_valid_ones_are_added(self):
+        content = make_image(200, 150)
+        valid = self.start(content)
+        invalid = self.start(b'not an image', name='notes.png', session=valid['session'])
+        self.send(valid, content)
+        self.send(invalid, b'not an image')
+
+        response = self.finish(valid['session'])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(list(response.json()['errors']), [invalid['token']])
+        self.assertEqual(Screenshot.objects.count(), 1)
+        self.assertFalse(ScreenshotUpload.objects.exists())
+
+    def test_too_large_picture_is_refused_before_its_parts(self):
+        response = self.client.post(
+            reverse('start_screenshot_upload', args=[self.game.pk]), {'name': 'big.png', 'size': 6 * 1024 * 1024},
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('5MB', response.json()['error'])
+        self.assertFalse(ScreenshotUpload.objects.exists())
+
+    def test_parts_larger_than_the_chunk_size_are_refused(self):
+        content = make_image(200, 150)
+        upload = self.start(content)
+
+        response = self.client.put(f'{upload["url"]}?offset=0', content[:5000], content_type='application/octet-stream')
+
+        self.assertEqual(response.status_code, 413)
+
+    def test_parts_of_another_users_upload_are_not_found(self):
+        content = make_image(200, 150)
+        upload = self.start(content)
+        GamesArchiveUser.objects.create_user(username='other', email='other@user.com', password='pass')
+        self.client.login(username='other', password='pass')
+
+        self.assertEqual(self.put(upload, content, 0).status_code, 404)
+        self.assertEqual(self.finish(upload['session']).status_code, 404)
+
+    def test_command_purges_the_abandoned_uploads(self):
+        content = make_image(200, 150)
+        abandoned = self.start(content)
+        self.put(abandoned, content, 0)
+        active = self.start(content)
+        ScreenshotUpload.objects.filter(token=abandoned['token']).update(
+            updated_at=timezone.now() - timedelta(days=2)
+        )
+        out = StringIO()
+
+        call_command('purge_screenshot_uploads', stdout=out)
+
+        self.assertIn('Purged 1 expired uploads', out.getvalue())
+        self.assertEqual([str(upload.token) for upload in ScreenshotUpload.objects.all()], [active['token']])
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'upload-parts')), [])
@@ -0,0 +1,84 @@
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from games_archive.common.models import ImageJob
+from games_archive.common.page_cache import get_page_versions, game_page_scope
+from games_archive.games.models import Game, Screenshot
+from tests.common.test_common_image_jobs import TempMediaMixin, make_image
+
+
+def pictures(count):
+    return [SimpleUploadedFile(f'shot{i}.png', make_image(40, 30), content_type='image/png') for i in range(count)]
+
+
+class ScreenshotUploadTests(TempMediaMixin, TestCase):
+
+    def screenshot_queries(self, captured):
+        return [query['sql'] for query in captured if 'games_screenshot' in query['sql']]
+
+    def test_save_inserts_once_without_loading_the_related_objects(self):
+        screenshot = Screenshot(to_game_id=self.game.pk, from_user_id=self.user.pk, picture=pictures(1)[0])
+
+        with CaptureQueriesContext(connection) as captured:
+            screenshot.save()
+
+        writes = [sql for sql in self.screenshot_queries(captured) if not sql.startswith('SELECT')]
+        self.assertEqual(len(writes), 1)
+        self.assertTrue(writes[0].startswith('INSERT'))
+        self.assertFalse(Screenshot.to_game.is_cached(screenshot))
+        self.assertTrue(screenshot.slug.startswith(f'game-{self.game.pk}-user-{self.user.pk}-'))
+
+    def test_slug_uses_the_loaded_names_and_fits_the_field(self):
+        self.game.title = 'A' * 200
+
+        slug = Screenshot(to_game=self.game, from_user=self.user).build_slug()
+
+        self.assertLessEqual(len(slug), Screenshot._meta.get_field('slug').max_length)
+        self.assertTrue(slug.startswith('aaa'))
+        self.assertNotEqual(slug, Screenshot(to_game=self.game, from_user=self.user).build_slug())
+
+    def test_bulk_upload_queries_do_not_grow_with_the_pictures(self):
+        with CaptureQueriesContext(connection) as two:
+            Screenshot.objects.bulk_upload(self.game, self.user, pictures(2))
+        with CaptureQueriesContext(connection) as six:
+            Screenshot.objects.bulk_upload(self.game, self.user, pictures(6))
+
+        self.assertEqual(len(two), len(six))
+        self.assertEqual(Screenshot.objects.count(), 8)
+        self.assertEqual(len(set(Screenshot.objects.values_list('slug', flat=True))), 8)
+
+    def test_bulk_upload_queues_the_renditions_and_refreshes_the_game_page(self):
+        page_version = get_page_versions([game_page_scope(self.game.pk)])
+
+        screenshots = Screenshot.objects.bulk_upload(self.game, self.user, pictures(3))
+
+        self.assertEqual(
+            set(ImageJob.objects.values_list('image_name', flat=True)),
+            {screenshot.picture.name for screenshot in screenshots},
+        )
+        self.assertNotEqual(get_page_versions([game_page_scope(self.game.pk)]), page_version)
+
+    def test_bulk_upload_of_an_invalid_picture_creates_nothing(self):
+        too_large = SimpleUploadedFile('big.jpg', b'x' * (5 * 1024 * 1024 + 1))
+
+        with self.assertRaises(ValidationError):
+            Screenshot.objects.bulk_upload(self.game, self.user, pictures(2) + [too_large])
+
+        self.assertFalse(Screenshot.objects.exists())
+
+    def test_view_uploads_every_selected_file(self):
+        self.client.login(username='testuser', password='pass')
+        detail_url = reverse('game_detail', args=[self.game.pk])
+
+        response = self.client.post(
+            reverse('add_screenshot', args=[self.game.pk]), {'picture': pictures(3)}, HTTP_REFERER=detail_url,
+        )
+
+        first = Screenshot.objects.order_by('pk').first()
+        self.assertRedirects(response, f'{detail_url}#screenshot-{first.pk}', fetch_redirect_response=False)
+        self.assertEqual(Screenshot.objects.filter(to_game=self.game).count(), 3)
+        self.assertEqual(ImageJob.objects.count(), 3)
@@ -0,0 +1,76 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+
+from games_archive.accounts.models import GamesArchiveUser
+from games_archive.consoles.models import Console
+from games_archive.games.models import Game
+from games_archive.consoles.search import SEARCH_MODE_FUZZY
+from games_archive.games.search import search_games, is_full_text_search_supported
+
+
+class GamesSearchTests(TestCase):
+    def setUp(self):
+        self.user = GamesArchiveUser.objects.create_user(
+            username='retrofan',
+            email='user@user.com',
+            first_name='Mario',
+        )
+        self.other_user = GamesArchiveUser.objects.create_user(username='other', email='other@user.com')
+        self.console = Console.objects.create(name='Sega Genesis', to_user=self.user)
+
+        self.sonic = Game.objects.create(
+            title='Sonic the Hedgehog',
+            developer='Sonic Team',
+            description='Fast blue hedgehog collecting rings.',
+            to_user=self.user,
+        )
+        self.sonic.to_consoles.add(self.console)
+        self.zelda = Game.objects.create(
+            title='The Legend of Zelda',
+            developer='Nintendo',
+            description='Adventure in Hyrule.',
+            to_user=self.other_user,
+        )
+
+    def search(self, query, mode=None):
+        return list(search_games(Game.objects.all(), query, mode))
+
+    def test_search_by_title(self):
+        self.assertEqual(self.search('zelda'), [self.zelda])
+
+    def test_search_by_console_name(self):
+        self.assertEqual(self.search('genesis'), [self.sonic])
+
+    def test_search_by_uploader_name(self):
+        self.assertEqual(self.search('mario'), [self.sonic])
+
+    def test_search_follows_console_and_user_changes(self):
+        self.console.name = 'Mega Drive'
+        self.console.save()
+        self.zelda.to_consoles.add(self.console)
+        self.other_user.first_name = 'Link'
+        self.other_user.save()
+
+        self.assertEqual(self.search('drive'), [self.zelda, self.sonic])
+        self.assertEqual(self.search('link'), [self.zelda])
+
+    def test_search_without_matches_returns_empty(self):
+        self.assertEqual(self.search('tetris'), [])
+
+    @skipUnless(connection.vendor == 'postgresql', 'full text search needs PostgreSQL')
+    def test_full_text_search_ranks_title_matches_first(self):
+        hedgehog_fan = Game.objects.create(
+            title='Puzzle Classic',
+            description='A puzzle game loved by every hedgehog fan.',
+            to_user=self.other_user,
+        )
+
+        self.assertTrue(is_full_text_search_supported(Game))
+        self.assertEqual(self.search('hedgehog'), [self.sonic, hedgehog_fan])
+
+    @skipUnless(connection.vendor == 'postgresql', 'trigram search needs PostgreSQL')
+    def test_fuzzy_search_tolerates_typos(self):
+        self.assertEqual(self.search('Nintedo', SEARCH_MODE_FUZZY), [self.zelda])
+        self.assertEqual(self.search('sonik hedgehog', SEARCH_MODE_FUZZY), [self.sonic])
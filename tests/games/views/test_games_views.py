@@ -1,4 +1,6 @@
+from django.db import connection
 from django.test import TestCase, Client, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
 import os
@@ -70,6 +72,32 @@ class GameListViewTests(TestCase):
         response = self.client.get(reverse('game_list') + '?page=2')
         self.assertEqual(len(response.context['games']), 7)  # Second page should have 7 items
 
+    def test_game_list_keyset_pagination(self):
+        for i in range(15):
+            Game.objects.create(title=f'Pagination Game {i}', to_user=self.user)
+        all_games = list(Game.objects.all())
+
+        response = self.client.get(reverse('game_list') + '?after=')
+        self.assertEqual(list(response.context['games']), all_games[:10])
+        self.assertFalse(response.context['is_paginated'])
+        next_after = response.context['page_obj'].next_after
+        self.assertIsNotNone(next_after)
+        self.assertContains(response, f'after={next_after}')
+
+        response = self.client.get(reverse('game_list') + f'?after={next_after}')
+        self.assertEqual(list(response.context['games']), all_games[10:])
+        self.assertIsNone(response.context['page_obj'].next_after)
+
+    def test_game_list_keyset_pagination_does_not_count(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('game_list') + '?after=')
+
+        self.assertFalse([query for query in queries if 'COUNT(' in query['sql'].upper()])
+
+    def test_game_list_keyset_pagination_with_invalid_token_returns_404(self):
+        response = self.client.get(reverse('game_list') + '?after=%%%')
+        self.assertEqual(response.status_code, 404)
+
 
 class GameDetailViewTests(TestCase):
     def setUp(self):
@@ -0,0 +1,124 @@
+import os
+import random
+from io import BytesIO, StringIO
+
+from PIL import Image, ImageDraw
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from games_archive.games.models import Game, Screenshot
+from games_archive.image_hashes import image_dhash, hamming_distance, get_duplicate_max_distance
+from tests.common.test_common_image_jobs import TempMediaMixin
+
+
+def make_picture(seed, size=(400, 300), image_format='PNG', quality=None):
+    # random blocks - a structure that survives resizing, unlike noise
+    rng = random.Random(seed)
+    image = Image.new('RGB', (400, 300), 'white')
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x, y = rng.randrange(350), rng.randrange(250)
+        draw.rectangle([x, y, x + rng.randrange(20, 200), y + rng.randrange(20, 150)],
+                       fill=tuple(rng.randrange(256) for _ in range(3)))
+    buffer = BytesIO()
+    image.resize(size).save(buffer, image_format, **({'quality': quality} if quality else {}))
+    return buffer.getvalue()
+
+
+def upload(content, name='shot.png'):
+    return SimpleUploadedFile(name, content, content_type='image/png')
+
+
+class ImageHashTests(TempMediaMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.other_game = Game.objects.create(title='Other Game', to_user=self.user)
+
+    def test_resized_recompressed_copy_is_a_near_duplicate(self):
+        original = image_dhash(BytesIO(make_picture(1)))
+        copy = image_dhash(BytesIO(make_picture(1, size=(200, 150), image_format='JPEG', quality=60)))
+        other = image_dhash(BytesIO(make_picture(2)))
+
+        self.assertLessEqual(hamming_distance(original, copy), get_duplicate_max_distance())
+        self.assertGreater(hamming_distance(original, other), get_duplicate_max_distance())
+        self.assertEqual(image_dhash(BytesIO(b'not an image')), '')
+
+    def test_same_picture_is_refused_for_the_same_game(self):
+        self.client.login(username='testuser', password='pass')
+        url = reverse('add_screenshot', args=[self.game.pk])
+        detail_url = reverse('game_detail', args=[self.game.pk])
+
+        self.client.post(url, {'picture': upload(make_picture(1))}, HTTP_REFERER=detail_url)
+        response = self.client.post(url, {'picture': upload(make_picture(1))}, HTTP_REFERER=detail_url, follow=True)
+
+        self.assertEqual(Screenshot.objects.count(), 1)
+        self.assertContains(response, Screenshot.DUPLICATE_ERROR)
+
+    def test_near_duplicate_is_refused_in_a_batch(self):
+        copy = make_picture(1, size=(200, 150), image_format='JPEG', quality=60)
+
+        with self.assertRaises(ValidationError):
+            Screenshot.objects.bulk_upload(self.game, self.user, [upload(make_picture(1)), upload(copy, 'copy.jpg')])
+
+        self.assertFalse(Screenshot.objects.exists())
+
+    def test_model_validation_refuses_a_duplicate_of_the_game(self):
+        Screenshot.objects.bulk_upload(self.game, self.user, [upload(make_picture(1))])
+        screenshot = Screenshot(to_game=self.game, from_user=self.user, picture=upload(make_picture(1)))
+
+        with self.assertRaises(ValidationError) as error:
+            screenshot.full_clean()
+
+        self.assertEqual(error.exception.message_dict['picture'], [Screenshot.DUPLICATE_ERROR])
+
+    def test_identical_picture_of_another_game_links_the_stored_file(self):
+        first, = Screenshot.objects.bulk_upload(self.game, self.user, [upload(make_picture(1))])
+        second, = Screenshot.objects.bulk_upload(self.other_game, self.user, [upload(make_picture(1))])
+        third = Screenshot(to_game=Game.objects.create(title='Third Game', to_user=self.user), from_user=self.user,
+                           picture=upload(make_picture(1)))
+        third.save()
+
+        self.assertEqual(second.picture.name, first.picture.name)
+        self.assertEqual(third.picture.name, first.picture.name)
+        self.assertEqual(sum(len(files) for _, _, files in os.walk(os.path.join(self.media_root, 'content'))), 1)
+        self.assertEqual(len(first.picture_sha256), 64)
+
+    def test_identical_cover_is_stored_once(self):
+        self.game.cover_image = upload(make_picture(3), 'cover.png')
+        self.game.save()
+        self.other_game.cover_image = upload(make_picture(3), 'cover.png')
+        self.other_game.save()
+
+        self.assertEqual(self.other_game.cover_image.name, self.game.cover_image.name)
+        self.assertEqual(self.other_game.cover_sha256, self.game.cover_sha256)
+
+
+class BackfillImageHashesTests(TempMediaMixin, TransactionTestCase):
+
+    def test_command_hashes_the_stored_files_and_links_the_copies(self):
+        screenshots = []
+        for game in [self.game, Game.objects.create(title='Other Game', to_user=self.user)]:
+            screenshot = Screenshot(to_game=game, from_user=self.user)
+            screenshot.picture.save('shot.png', ContentFile(make_picture(1)), save=False)
+            screenshot.save()
+            screenshots.append(screenshot)
+        # stored as two files before the uploads were hashed
+        Screenshot.objects.update(picture_sha256='', picture_dhash='')
+        Screenshot.objects.filter(pk=screenshots[1].pk).update(picture='game_screenshots/copy.png')
+        os.makedirs(os.path.join(self.media_root, 'game_screenshots'))
+        with open(os.path.join(self.media_root, 'game_screenshots', 'copy.png'), 'wb') as copy:
+            copy.write(make_picture(1))
+        out = StringIO()
+
+        call_command('backfill_image_hashes', '--processes', '2', '--link', stdout=out)
+
+        self.assertIn('Hashed 2 files, 0 could not be read', out.getvalue())
+        self.assertIn('Linked 1 objects', out.getvalue())
+        names = set(Screenshot.objects.values_list('picture', flat=True))
+        self.assertEqual(names, {screenshots[0].picture.name})
+        self.assertFalse(Screenshot.objects.filter(picture_dhash='').exists())
@@ -0,0 +1,41 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from games_archive.management.commands.benchmark_db_connections import (
+    benchmark_mode, mode_settings, MODE_PER_REQUEST, MODE_PERSISTENT, MODE_POOL,
+)
+
+
+class BenchmarkDbConnectionsCommandTests(TestCase):
+    def test_mode_settings(self):
+        modes = mode_settings({**connection.settings_dict, 'CONN_MAX_AGE': 0})
+
+        self.assertEqual(modes[MODE_PER_REQUEST]['CONN_MAX_AGE'], 0)
+        self.assertEqual(modes[MODE_PERSISTENT]['CONN_MAX_AGE'], 60)
+        self.assertTrue(modes[MODE_PERSISTENT]['CONN_HEALTH_CHECKS'])
+        if MODE_POOL in modes:
+            self.assertEqual(modes[MODE_POOL]['CONN_MAX_AGE'], 0)
+            self.assertIn('pool', modes[MODE_POOL]['OPTIONS'])
+
+    def test_persistent_connections_connect_once(self):
+        modes = mode_settings(connection.settings_dict)
+
+        connects, timings = benchmark_mode(modes[MODE_PERSISTENT], 5, 2)
+        self.assertEqual(connects, 1)
+        self.assertEqual(len(timings), 5)
+
+        # SQLite ignores closing an in-memory database
+        if connection.vendor == 'postgresql':
+            connects, _ = benchmark_mode(modes[MODE_PER_REQUEST], 5, 2)
+            self.assertEqual(connects, 5)
+
+    def test_reports_the_overhead(self):
+        out = StringIO()
+        call_command('benchmark_db_connections', requests=3, stdout=out)
+
+        self.assertIn(MODE_PER_REQUEST, out.getvalue())
+        self.assertIn(MODE_PERSISTENT, out.getvalue())
+        self.assertIn('ms per request', out.getvalue())
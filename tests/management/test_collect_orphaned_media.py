@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.utils import timezone
+
+from games_archive.common.models import StoredFile
+from games_archive.renditions import rendition_dir
+from tests.common.test_common_image_jobs import TempMediaMixin, make_image
+
+
+class CollectOrphanedMediaCommandTests(TempMediaMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.screenshot = self.create_screenshot()
+        self.orphan_content = make_image(50, 40)
+        self.orphan = self.create_screenshot(self.orphan_content)
+        self.orphan_name = self.orphan.picture.name
+        self.orphan.delete()
+        self.write_file(f'{rendition_dir(self.screenshot.picture.name)}/thumb.webp')
+        self.write_file(f'{rendition_dir(self.orphan_name)}/thumb.webp')
+        self.write_file('game_covers/cleared.png')
+
+    def write_file(self, name, age=7 * 24 * 3600):
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(b'x' * 2048)
+        old = os.path.getmtime(path) - age
+        os.utime(path, (old, old))
+
+    def age_files(self):
+        for directory, _, files in os.walk(self.media_root):
+            for file in files:
+                path = os.path.join(directory, file)
+                old = os.path.getmtime(path) - 7 * 24 * 3600
+                os.utime(path, (old, old))
+        StoredFile.objects.update(updated_at=timezone.now() - timedelta(days=7))
+
+    def exists(self, name):
+        return os.path.exists(os.path.join(self.media_root, name))
+
+    def test_removes_the_unreferenced_files_and_their_renditions(self):
+        self.age_files()
+        out = StringIO()
+
+        call_command('collect_orphaned_media', '--batch-size', '2', stdout=out)
+
+        self.assertIn('Removed 3 orphaned files', out.getvalue())
+        self.assertTrue(self.exists(self.screenshot.picture.name))
+        self.assertTrue(self.exists(f'{rendition_dir(self.screenshot.picture.name)}/thumb.webp'))
+        self.assertFalse(self.exists(self.orphan_name))
+        self.assertFalse(self.exists(f'{rendition_dir(self.orphan_name)}/thumb.webp'))
+        self.assertFalse(self.exists('game_covers/cleared.png'))
+        self.assertEqual(list(StoredFile.objects.values_list('name', flat=True)), [self.screenshot.picture.name])
+
+    def test_dry_run_only_lists_the_orphans(self):
+        self.age_files()
+        out = StringIO()
+
+        call_command('collect_orphaned_media', '--dry-run', stdout=out)
+
+        self.assertIn(self.orphan_name, out.getvalue())
+        self.assertIn('Found 3 orphaned files', out.getvalue())
+        self.assertTrue(self.exists(self.orphan_name))
+        self.assertTrue(self.exists('game_covers/cleared.png'))
+
+    def test_quarantine_moves_the_orphans(self):
+        self.age_files()
+        quarantine = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, quarantine, ignore_errors=True)
+
+        call_command('collect_orphaned_media', '--quarantine', quarantine, stdout=StringIO())
+
+        self.assertFalse(self.exists('game_covers/cleared.png'))
+        self.assertTrue(os.path.exists(os.path.join(quarantine, 'game_covers', 'cleared.png')))
+        self.assertTrue(os.path.exists(os.path.join(quarantine, self.orphan_name)))
+
+    def test_recent_files_are_kept(self):
+        out = StringIO()
+
+        call_command('collect_orphaned_media', stdout=out)
+
+        self.assertIn('Removed 2 orphaned files', out.getvalue())
+        self.assertTrue(self.exists(self.orphan_name))
+        self.assertFalse(self.exists('game_covers/cleared.png'))
+
+    def test_stored_file_referenced_again_is_kept(self):
+        self.age_files()
+        # an identical upload links the stored file, its object is not committed yet
+        name = default_storage.save('game_covers/cover.png', SimpleUploadedFile('cover.png', self.orphan_content))
+        self.assertEqual(name, self.orphan_name)
+        out = StringIO()
+
+        call_command('collect_orphaned_media', stdout=out)
+
+        self.assertIn('Removed 2 orphaned files', out.getvalue())
+        self.assertTrue(self.exists(self.orphan_name))
+
+    def test_stored_file_with_a_recent_reference_is_kept(self):
+        self.age_files()
+        StoredFile.objects.filter(name=self.orphan_name).update(updated_at=timezone.now())
+
+        call_command('collect_orphaned_media', stdout=StringIO())
+
+        self.assertTrue(self.exists(self.orphan_name))
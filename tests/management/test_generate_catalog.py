@@ -0,0 +1,53 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Count
+from django.test import TestCase
+
+from games_archive.accounts.models import GamesArchiveUser
+from games_archive.common.models import GameRating, ConsoleRating, GameComment, ConsoleComment
+from games_archive.consoles.models import Console, Supplier
+from games_archive.games.models import Game, Screenshot, GameReview
+
+
+class GenerateCatalogCommandTests(TestCase):
+    def generate(self, **options):
+        options = {
+            'users': 20, 'suppliers': 5, 'consoles': 6, 'games': 30, 'game_ratings': 200, 'console_ratings': 30,
+            'comments': 50, 'reviews': 10, 'screenshots': 15, 'batch_size': 7, 'seed': 1, **options,
+        }
+        call_command('generate_catalog', stdout=StringIO(), **options)
+
+    def test_generates_the_requested_cardinalities(self):
+        self.generate()
+
+        self.assertEqual(GamesArchiveUser.objects.count(), 20)
+        self.assertEqual(Supplier.objects.count(), 5)
+        self.assertEqual(Console.objects.count(), 6)
+        self.assertEqual(Game.objects.count(), 30)
+        self.assertEqual(GameComment.objects.count(), 50)
+        self.assertEqual(ConsoleComment.objects.count(), 5)
+        self.assertEqual(GameReview.objects.count(), 10)
+        self.assertEqual(Screenshot.objects.count(), 15)
+        self.assertTrue(Game.to_consoles.through.objects.exists())
+        # a user rates a game once, so the most popular games can not take all of their picks
+        self.assertLessEqual(GameRating.objects.count(), 200)
+        self.assertLessEqual(ConsoleRating.objects.count(), 30)
+
+    def test_ratings_are_skewed_and_aggregates_rebuilt(self):
+        self.generate(games=50, users=100, game_ratings=500, skew=1.5)
+
+        ratings_per_game = sorted(
+            Game.objects.annotate(total=Count('gamerating')).values_list('total', flat=True), reverse=True
+        )
+        # the top tenth of the games gets most of the ratings
+        self.assertGreater(sum(ratings_per_game[:5]), sum(ratings_per_game) / 2)
+
+        for game in Game.objects.annotate(total=Count('gamerating')):
+            self.assertEqual(game.rating_count, game.total)
+
+    def test_can_run_twice_with_the_same_seed(self):
+        self.generate()
+        self.generate()
+
+        self.assertEqual(Game.objects.count(), 60)
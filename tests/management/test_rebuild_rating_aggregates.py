@@ -0,0 +1,40 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from games_archive.accounts.models import GamesArchiveUser
+from games_archive.common.models import GameRating, ConsoleRating
+from games_archive.consoles.models import Console
+from games_archive.games.models import Game
+
+
+class RebuildRatingAggregatesCommandTests(TestCase):
+    def setUp(self):
+        self.user = GamesArchiveUser.objects.create_user(username='testuser', email='test@example.com')
+        self.user2 = GamesArchiveUser.objects.create_user(username='testuser2', email='test2@example.com')
+
+        self.game = Game.objects.create(title='Test Game', to_user=self.user)
+        self.unrated_game = Game.objects.create(title='Unrated Game', to_user=self.user)
+        self.console = Console.objects.create(name='Test Console', to_user=self.user)
+
+        GameRating.objects.create(rating=3, to_game=self.game, from_user=self.user)
+        GameRating.objects.create(rating=4, to_game=self.game, from_user=self.user2)
+        ConsoleRating.objects.create(rating=5, to_console=self.console, from_user=self.user)
+
+    def test_rebuild_restores_aggregates_after_bypassing_signals(self):
+        # bulk updates skip the signals and leave the stored aggregates stale
+        GameRating.objects.filter(to_game=self.game).update(rating=1)
+        Game.objects.filter(pk=self.unrated_game.pk).update(rating_sum=10, rating_count=2, rating_avg=5)
+        Console.objects.update(rating_sum=0, rating_count=0, rating_avg=0)
+
+        call_command('rebuild_rating_aggregates', stdout=StringIO())
+
+        self.game.refresh_from_db()
+        self.unrated_game.refresh_from_db()
+        self.console.refresh_from_db()
+
+        self.assertEqual((self.game.rating_sum, self.game.rating_count, self.game.rating), (2, 2, 1))
+        self.assertEqual((self.unrated_game.rating_sum, self.unrated_game.rating_count, self.unrated_game.rating),
+                         (0, 0, 0))
+        self.assertEqual((self.console.rating_sum, self.console.rating_count, self.console.rating), (5, 1, 5))
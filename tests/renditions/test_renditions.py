@@ -0,0 +1,129 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest.mock import patch
+
+from PIL import Image
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+
+from games_archive.accounts.models import GamesArchiveUser
+from games_archive.custom_storages import file_existence_cache
+from games_archive.games.models import Game
+from games_archive.renditions import create_renditions, rendition_url, manifest_name, is_rendered, ensure_renditions
+
+
+def make_image(width, height, mode='RGB', image_format='PNG'):
+    buffer = BytesIO()
+    image = Image.effect_noise((width, height), 64).convert(mode)
+    image.save(buffer, image_format)
+    return buffer.getvalue()
+
+
+@override_settings(IMAGE_RENDITION_SIZES={'thumb': 160, 'medium': 800}, IMAGE_RENDITION_FORMAT='webp')
+class RenditionsTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+        file_existence_cache.clear()
+        self.user = GamesArchiveUser.objects.create_user(username='testuser', email='user@user.com')
+
+    def tearDown(self):
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def save_image(self, name, content):
+        return default_storage.save(name, ContentFile(content))
+
+    def test_variants_fit_the_sizes_in_both_formats(self):
+        name = self.save_image('game_covers/cover.png', make_image(2000, 1000, 'RGBA'))
+
+        manifest = create_renditions(name)
+
+        self.assertEqual((manifest['width'], manifest['height']), (2000, 1000))
+        for image_format, pil_format in (('webp', 'WEBP'), ('jpeg', 'JPEG')):
+            variant = manifest['renditions']['thumb'][image_format]
+            self.assertEqual((variant['width'], variant['height']), (160, 80))
+            with default_storage.open(variant['name']) as variant_file:
+                self.assertEqual(Image.open(variant_file).format, pil_format)
+        self.assertLess(manifest['renditions']['thumb']['webp']['bytes'] * 10, default_storage.size(name))
+        self.assertTrue(default_storage.exists(manifest_name(name)))
+
+    def test_small_images_are_not_upscaled(self):
+        name = self.save_image('game_covers/small.jpg', make_image(100, 50, image_format='JPEG'))
+
+        variant = create_renditions(name)['renditions']['medium']['jpeg']
+
+        self.assertEqual((variant['width'], variant['height']), (100, 50))
+
+    def test_links_the_upload_until_rendered_then_the_manifest_variant(self):
+        game = Game.objects.create(title='Test Game', to_user=self.user,
+                                   cover_image=self.save_image('game_covers/cover.png', make_image(400, 400)))
+
+        self.assertEqual(rendition_url(game.cover_image, 'thumb'), game.cover_image.url)
+        self.assertFalse(is_rendered(game.cover_image))
+
+        create_renditions(game.cover_image.name)
+        url = rendition_url(game.cover_image, 'thumb')
+        cache.clear()
+
+        # a process without the cached manifest reads the stored one
+        self.assertEqual(rendition_url(game.cover_image, 'thumb'), url)
+        self.assertTrue(url.endswith('/thumb.webp'))
+        self.assertEqual(rendition_url(game.cover_image, 'thumb', 'jpeg')[-9:], 'thumb.jpg')
+
+    def test_missing_manifest_is_looked_up_once_until_rendered(self):
+        game = Game.objects.create(title='Test Game', to_user=self.user,
+                                   cover_image=self.save_image('game_covers/cover.png', make_image(400, 400)))
+        storage = game.cover_image.storage
+        # a process that has not looked it up yet
+        cache.clear()
+
+        with patch.object(storage, 'open', wraps=storage.open) as storage_open:
+            for _ in range(3):
+                self.assertEqual(rendition_url(game.cover_image, 'thumb'), game.cover_image.url)
+        self.assertEqual(storage_open.call_count, 1)
+
+        create_renditions(game.cover_image.name)
+        self.assertTrue(rendition_url(game.cover_image, 'thumb').endswith('/thumb.webp'))
+
+    def test_unreadable_image_falls_back_to_the_upload_and_is_not_retried(self):
+        game = Game.objects.create(title='Test Game', to_user=self.user,
+                                   cover_image=self.save_image('game_covers/broken.png', b'not an image'))
+
+        with patch('games_archive.renditions.create_renditions', wraps=create_renditions) as create:
+            self.assertEqual(ensure_renditions(game.cover_image), {})
+            self.assertEqual(ensure_renditions(game.cover_image), {})
+
+        self.assertEqual(create.call_count, 1)
+        self.assertEqual(rendition_url(game.cover_image, 'thumb'), game.cover_image.url)
+
+    def test_templates_link_the_variants(self):
+        game = Game.objects.create(title='Test Game', to_user=self.user,
+                                   cover_image=self.save_image('game_covers/cover.png', make_image(400, 300)))
+        no_cover = Game.objects.create(title='No Cover', to_user=self.user)
+        create_renditions(game.cover_image.name)
+
+        rendered = Template(
+            "{% load renditions %}{% rendition_url game.cover_image 'medium' %}|{{ game.default_thumbnail }}"
+        ).render(Context({'game': game}))
+
+        self.assertEqual(rendered.split('|'), [rendition_url(game.cover_image, 'medium'),
+                                               rendition_url(game.cover_image, 'thumb')])
+        self.assertTrue(rendered.endswith('/thumb.webp'))
+        self.assertEqual(no_cover.default_thumbnail, Game.DEFAULT_IMAGE)
+
+    def test_command_renders_the_missing_renditions(self):
+        Game.objects.create(title='Test Game', to_user=self.user,
+                            cover_image=self.save_image('game_covers/cover.png', make_image(1200, 900)))
+        out = StringIO()
+
+        call_command('rebuild_renditions', stdout=out)
+
+        self.assertIn('Renditions of 1 images, 0 could not be read', out.getvalue())